@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Asset Manifest
+Shared access to content/assets.json: resolves image references to files in
+assets/img and caches their pixel dimensions.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from PIL import Image
+
+from content_store import ContentStore, open_store
+from records import load_json, save_json
+from url_canon import is_site_host
+
+
+class AssetManifest:
+    """Image assets from assets.json plus a cache of on-disk dimensions."""
+
+    def __init__(self, content_dir: str = "content", root_dir: str = "."):
+        self.root_dir = Path(root_dir)
+        self.assets_file = Path(content_dir) / "assets.json"
+        # Paths inside assets.json are relative to the site root
+        self.assets_dir = self.root_dir / "assets" / "img"
+
+        data = {}
+        # Only downloaded assets matter here; the content store can hand over just those
+        self.store_path = None
+        store = open_store(content_dir)
+        if store:
+            with store:
+                data = {"assets": store.assets(downloaded_only=True)}
+                dimensions = store.get_meta("dimensions")
+                if dimensions is not None:
+                    data["dimensions"] = dimensions
+            self.store_path = store.path
+        elif self.assets_file.exists():
+            data = load_json(self.assets_file)
+
+        self.data = data
+        self.assets: List[Dict] = data.get("assets", [])
+        # filename -> {"width", "height", "size", "mtime"}
+        self.dimensions: Dict[str, Dict] = data.get("dimensions", {})
+        self.dirty = False
+
+        self.url_index: Dict[str, Dict] = {}
+        # filename of the original or any format variant -> asset
+        self.file_index: Dict[str, Dict] = {}
+        for asset in self.assets:
+            if not asset.get("original"):
+                continue
+            if asset.get("url"):
+                self.url_index.setdefault(asset["url"], asset)
+            for fmt in ("original", "webp", "avif"):
+                path = (asset.get(fmt) or {}).get("path")
+                if path:
+                    self.file_index.setdefault(os.path.basename(path), asset)
+
+    def resolve(self, ref: str) -> Optional[Path]:
+        """Resolve a local path or a scraped remote URL to a file in assets/img."""
+        if not ref:
+            return None
+        ref = ref.strip()
+
+        asset = self.url_index.get(ref)
+        if asset:
+            path = self.root_dir / asset["original"]["path"]
+            return path if path.is_file() else None
+
+        parsed = urlparse(ref)
+        if parsed.netloc and not is_site_host(parsed.netloc):
+            return None
+
+        path = self.root_dir / parsed.path.lstrip("/")
+        if path.is_file() and self.assets_dir in path.parents:
+            return path
+        return None
+
+    def asset_for(self, ref: str) -> Optional[Dict]:
+        """Find the assets.json entry for a remote URL or a local image path."""
+        if not ref:
+            return None
+        ref = ref.strip()
+        if ref in self.url_index:
+            return self.url_index[ref]
+        return self.file_index.get(os.path.basename(urlparse(ref).path))
+
+    def get_dimensions(self, path: Path) -> Optional[Tuple[int, int]]:
+        """Return (width, height) of an image, reading only its header on cache miss."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = path.name
+        cached = self.dimensions.get(key)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime") == int(stat.st_mtime):
+            return cached["width"], cached["height"]
+
+        try:
+            # Image.open parses the header lazily; no pixel data is decoded
+            with Image.open(path) as img:
+                width, height = img.size
+        except Exception:
+            return None
+
+        self.dimensions[key] = {
+            "width": width,
+            "height": height,
+            "size": stat.st_size,
+            "mtime": int(stat.st_mtime)
+        }
+        self.dirty = True
+        return width, height
+
+    def dimensions_for(self, ref: str) -> Optional[Tuple[int, int]]:
+        """Return dimensions for an image reference, if it resolves locally."""
+        path = self.resolve(ref)
+        return self.get_dimensions(path) if path else None
+
+    def prune_dimensions(self):
+        """Drop cached dimensions for files no longer in assets/img."""
+        existing = set(os.listdir(self.assets_dir)) if self.assets_dir.exists() else set()
+        stale = [name for name in self.dimensions if name not in existing]
+        for name in stale:
+            del self.dimensions[name]
+        if stale:
+            self.dirty = True
+
+    def save(self):
+        """Write the dimension cache back into assets.json (or the content store) if it changed."""
+        if not self.dirty:
+            return
+
+        if self.store_path:
+            with ContentStore(self.store_path) as store:
+                store.set_meta("dimensions", self.dimensions)
+            self.dirty = False
+            return
+
+        self.data["dimensions"] = self.dimensions
+        save_json(self.data, self.assets_file)
+        self.dirty = False
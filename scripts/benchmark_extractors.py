@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Extractor Benchmark
+Times every MotoRoverScraper extract_* method, and its peak memory, on each
+page of a fixed offline corpus (tour, booking-policy, brochure and media
+pages), writes the results as JSON and compares them against a saved
+baseline to catch regressions.
+"""
+
+import argparse
+import inspect
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from entity_store import EntityStore
+from fetchers import LocalFetcher
+from records import Page
+from scraper import MotoRoverScraper
+
+CORPUS_GLOBS = ["motorcycle-*.html", "car-*.html", "russia-*.html", "tours.html", "media.html"]
+
+# Extractors that modify the soup get a freshly parsed copy of the page
+MUTATING = {"extract_content_blocks", "extract_page"}
+
+# Extractors that run all the others; reported on their own, never summed with them
+COMPOSITE = {"extract_page"}
+
+REPEATS = 3
+
+# A slowdown is only a regression if it is both this relative and this absolute
+REGRESSION_RATIO = 1.25
+NOISE_FLOOR_SECONDS = 0.002
+
+
+def corpus(root_dir: Path) -> List[Path]:
+    """The checked-in pages the benchmark runs over, in a stable order."""
+    pages = set()
+    for pattern in CORPUS_GLOBS:
+        pages.update(path for path in root_dir.glob(pattern) if "thank" not in path.name)
+    return sorted(pages)
+
+
+def extractors() -> Dict[str, Callable]:
+    """Every extract_* method of the scraper, public or private."""
+    return {
+        name: method for name, method in inspect.getmembers(MotoRoverScraper, inspect.isfunction)
+        if name.startswith(("extract_", "_extract_"))
+    }
+
+
+def _call(scraper: MotoRoverScraper, method: Callable, soup: BeautifulSoup, url: str, page: Page):
+    """Call an extractor with whichever of soup/url/page it takes."""
+    available = {"soup": soup, "url": url, "base_url": url, "page": page}
+    parameters = list(inspect.signature(method).parameters)[1:]
+    return method(scraper, *(available[name] for name in parameters))
+
+
+def _reset(scraper: MotoRoverScraper):
+    # Extractors append to these; keep every run starting from the same state
+    scraper.assets = []
+    scraper.entities = EntityStore()
+    scraper.visited_urls = set()
+    # Each run builds its own page text memo, as the first extractor on a page would
+    scraper._page_text = None
+
+
+def measure(run: Callable, prepare: Callable, repeats: int) -> Dict:
+    """Best-of-N seconds and the peak traced allocation of one more run."""
+    best = None
+    for _ in range(repeats):
+        args = prepare()
+        started = time.perf_counter()
+        run(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Traced separately: tracemalloc slows allocation-heavy code several times over
+    args = prepare()
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peakBytes": peak}
+
+
+def benchmark_page(scraper: MotoRoverScraper, html: str, url: str, repeats: int) -> Dict[str, Dict]:
+    """Measure parsing and every extractor on one page."""
+    results = {"parse": measure(lambda: BeautifulSoup(html, "html.parser"), lambda: (), repeats)}
+
+    shared = BeautifulSoup(html, "html.parser")
+    page = Page.from_dict({"url": url, **scraper.extract_metadata(shared, url)})
+    for name, method in extractors().items():
+        def prepare(name=name):
+            _reset(scraper)
+            soup = BeautifulSoup(html, "html.parser") if name in MUTATING else shared
+            return (soup,)
+
+        results[name] = measure(lambda soup, method=method: _call(scraper, method, soup, url, page),
+                                prepare, repeats)
+    return results
+
+
+def totals(pages: Dict[str, Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Per extractor: summed seconds and the largest peak across the corpus."""
+    summary: Dict[str, Dict] = {}
+    for results in pages.values():
+        for name, result in results.items():
+            entry = summary.setdefault(name, {"seconds": 0.0, "peakBytes": 0, "slowestPage": None, "slowest": 0.0})
+            entry["seconds"] += result["seconds"]
+            entry["peakBytes"] = max(entry["peakBytes"], result["peakBytes"])
+    for page, results in pages.items():
+        for name, result in results.items():
+            if result["seconds"] > summary[name]["slowest"]:
+                summary[name]["slowest"] = result["seconds"]
+                summary[name]["slowestPage"] = page
+    for entry in summary.values():
+        entry["seconds"] = round(entry["seconds"], 6)
+    return summary
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict]) -> List[Dict]:
+    """Extractors whose corpus total got meaningfully slower than the baseline."""
+    regressions = []
+    for name, entry in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        ratio = entry["seconds"] / max(before["seconds"], 1e-9)
+        if ratio > REGRESSION_RATIO and entry["seconds"] - before["seconds"] > NOISE_FLOOR_SECONDS:
+            regressions.append({"extractor": name, "before": before["seconds"],
+                                "after": entry["seconds"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def main():
+    """Benchmark the extractors over the corpus and check for regressions."""
+    parser = argparse.ArgumentParser(description="Benchmark scraper extractors per page")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Timed runs per extractor (best is kept)")
+    parser.add_argument("--limit", type=int, help="Only benchmark the first N corpus pages")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against results saved earlier with --output")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    pages = corpus(root_dir)[:args.limit]
+    # Nothing is saved; the content directory only has to exist
+    fetcher = LocalFetcher(str(root_dir))
+    scraper = MotoRoverScraper(str(root_dir / "content"), fetcher)
+    print(f"Benchmarking {len(extractors())} extractors on {len(pages)} pages ({args.repeats} runs each)")
+
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, Dict]] = {}
+    for path in pages:
+        url = f"{MotoRoverScraper.BASE_URL}/{path.name}"
+        results[path.name] = benchmark_page(scraper, fetcher.fetch(url).text, url, args.repeats)
+    elapsed = time.perf_counter() - started
+
+    summary = totals(results)
+    # Kept apart so summing the totals never counts an extractor twice
+    composites = {name: summary.pop(name) for name in sorted(COMPOSITE) if name in summary}
+    print(f"\n{'extractor':32} {'total ms':>10} {'peak KB':>10}  slowest page")
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]["seconds"]):
+        print(f"{name:32} {entry['seconds'] * 1000:10.1f} {entry['peakBytes'] / 1024:10.0f}  "
+              f"{entry['slowestPage']} ({entry['slowest'] * 1000:.1f} ms)")
+    if composites:
+        print(f"\n{'whole page (not in the totals)':32} {'total ms':>10} {'peak KB':>10}  slowest page")
+        for name, entry in composites.items():
+            print(f"{name:32} {entry['seconds'] * 1000:10.1f} {entry['peakBytes'] / 1024:10.0f}  "
+                  f"{entry['slowestPage']} ({entry['slowest'] * 1000:.1f} ms)")
+    print(f"\nFinished in {elapsed:.1f}s")
+
+    report = {
+        "python": platform.python_version(),
+        "repeats": args.repeats,
+        "pages": results,
+        "totals": summary,
+        "composites": composites,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare({**summary, **composites},
+                              {**baseline.get("totals", {}), **baseline.get("composites", {})})
+        if regressions:
+            print(f"\n{len(regressions)} extractor(s) slower than the baseline:")
+            for regression in regressions:
+                print(f"  {regression['extractor']}: {regression['before'] * 1000:.1f} ms -> "
+                      f"{regression['after'] * 1000:.1f} ms ({regression['ratio']}x)")
+            raise SystemExit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
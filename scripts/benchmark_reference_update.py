@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Reference Update Benchmark
+Times the old per-rename replace loop against the single-scan trie matcher
+used by rename_images_comprehensive.update_file_references(), on the current
+tree with every image in assets/img renamed. Nothing is written to disk.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from multi_replace import MultiReplacer
+from rename_images_comprehensive import find_text_files, update_file_references
+
+
+def naive_update(content: str, filename_mapping: Dict[str, str]) -> str:
+    """The previous algorithm: four str.replace calls and one re.sub per rename."""
+    for old_filename, new_filename in filename_mapping.items():
+        if old_filename == new_filename:
+            continue
+        patterns = [
+            (f'assets/img/{old_filename}', f'assets/img/{new_filename}'),
+            (f'/assets/img/{old_filename}', f'/assets/img/{new_filename}'),
+            (f'"assets/img/{old_filename}"', f'"assets/img/{new_filename}"'),
+            (f"'assets/img/{old_filename}'", f"'assets/img/{new_filename}'"),
+        ]
+        for old_pattern, new_pattern in patterns:
+            content = content.replace(old_pattern, new_pattern)
+
+    for old_filename, new_filename in filename_mapping.items():
+        if old_filename != new_filename:
+            content = re.sub(rf'\b{re.escape(old_filename)}\b', new_filename, content)
+    return content
+
+
+def benchmark_mapping(img_dir: Path, limit: int = None) -> Dict[str, str]:
+    """Rename every image (or the first limit) to a new, non-colliding name."""
+    paths = sorted(p for p in img_dir.iterdir() if p.is_file())
+    if limit:
+        paths = paths[:limit]
+    # A suffix keeps the old name from reappearing inside the new one,
+    # which the per-rename loop would rewrite a second time
+    return {p.name: f"{p.stem}-bench{p.suffix}" for p in paths}
+
+
+def main():
+    """Compare reference update strategies and report the speedup."""
+    parser = argparse.ArgumentParser(description="Benchmark image reference updates")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--limit", type=int, help="Only rename the first N images")
+    parser.add_argument("--workers", type=int, help="Worker processes for the parallel run (default: CPU count)")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    mapping = benchmark_mapping(root_dir / "assets" / "img", args.limit)
+    text_files = find_text_files(root_dir)
+    contents: List[str] = []
+    for path in text_files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            contents.append(f.read())
+
+    total_mb = sum(len(c) for c in contents) / 1024 / 1024
+    print(f"{len(mapping)} renames across {len(text_files)} text files ({total_mb:.1f} MB)")
+
+    started = time.perf_counter()
+    naive_results = [naive_update(content, mapping) for content in contents]
+    naive_seconds = time.perf_counter() - started
+    print(f"  Per-rename loop:        {naive_seconds:8.2f}s")
+
+    started = time.perf_counter()
+    replacer = MultiReplacer(mapping)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    combined_results = [replacer.replace(content)[0] for content in contents]
+    scan_seconds = time.perf_counter() - started
+    print(f"  Trie regex (build):     {build_seconds:8.2f}s")
+    print(f"  Trie regex (scan):      {scan_seconds:8.2f}s")
+
+    # The full update path, reading files in a worker pool (no writes)
+    paths = {str(root_dir / name): new for name, new in mapping.items()}
+    started = time.perf_counter()
+    changed = update_file_references(root_dir, paths, workers=args.workers, write=False)
+    parallel_seconds = time.perf_counter() - started
+    print(f"  update_file_references: {parallel_seconds:8.2f}s ({args.workers or os.cpu_count()} workers, "
+          f"{len(changed)} files would change)")
+
+    mismatches = [str(path) for path, a, b in zip(text_files, naive_results, combined_results) if a != b]
+    speedup = naive_seconds / max(build_seconds + scan_seconds, 1e-9)
+    print(f"\nSpeedup (single process): {speedup:.0f}x")
+    if mismatches:
+        print(f"Output differs from the per-rename loop in {len(mismatches)} files (the loop chains renames):")
+        for path in mismatches[:10]:
+            print(f"  {path}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "renames": len(mapping),
+                "files": len(text_files),
+                "megabytes": round(total_mb, 2),
+                "naiveSeconds": round(naive_seconds, 3),
+                "buildSeconds": round(build_seconds, 3),
+                "scanSeconds": round(scan_seconds, 3),
+                "updateSeconds": round(parallel_seconds, 3),
+                "speedup": round(speedup, 1),
+                "mismatches": mismatches,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
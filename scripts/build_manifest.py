@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Incremental Build Manifest
+Tracks a content hash and last-modified date for every generated file so
+unchanged pages are not rewritten and sitemaps can emit real lastmod values.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+class BuildManifest:
+    """Content hashes and modification dates of generated files."""
+
+    def __init__(self, manifest_path: Union[str, Path] = "content/build-manifest.json"):
+        self.manifest_path = Path(manifest_path)
+        self.files: Dict[str, Dict] = {}
+        self.dirty = False
+
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    @staticmethod
+    def hash_content(content: Union[str, bytes]) -> str:
+        """Return the SHA-256 hex digest of file content."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.sha256(content).hexdigest()
+
+    def is_changed(self, name: str, content: Union[str, bytes]) -> bool:
+        """Check whether content differs from the last recorded build."""
+        entry = self.files.get(name)
+        return not entry or entry.get("hash") != self.hash_content(content)
+
+    def record(self, name: str, content: Union[str, bytes]) -> bool:
+        """Record content for a file; returns True if it changed."""
+        digest = self.hash_content(content)
+        entry = self.files.get(name)
+        if entry and entry.get("hash") == digest:
+            return False
+
+        self.files[name] = {
+            "hash": digest,
+            "lastmod": datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        }
+        self.dirty = True
+        return True
+
+    def lastmod(self, name: str) -> Optional[str]:
+        """Return the W3C date a file last changed, if known."""
+        entry = self.files.get(name)
+        return entry.get("lastmod") if entry else None
+
+    def save(self):
+        """Write the manifest back to disk if anything changed."""
+        if not self.dirty:
+            return
+
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=2, sort_keys=True)
+        self.dirty = False
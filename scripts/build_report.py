@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Build Report
+Records per-page weight after site generation, compares against the previous
+build and enforces performance budgets.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from content_store import open_store
+from url_canon import is_site_host
+
+
+# Default per-page budgets in bytes (image_count is a plain count).
+# Override any of them with a JSON file passed as --budgets.
+DEFAULT_BUDGETS = {
+    "html_bytes": 150_000,
+    "inline_css_bytes": 20_000,
+    "inline_js_bytes": 30_000,
+    "image_count": 60,
+    "image_bytes": 5_000_000,
+    "critical_path_bytes": 250_000,
+    # Maximum growth of any metric relative to the previous build, in percent
+    "max_regression_pct": 20,
+}
+
+METRICS = [
+    "html_bytes",
+    "inline_css_bytes",
+    "inline_js_bytes",
+    "image_count",
+    "image_bytes",
+    "critical_path_bytes",
+]
+
+
+def load_budgets(budgets_path: Optional[str] = None) -> Dict:
+    """Load budgets, falling back to the defaults for missing keys."""
+    budgets = dict(DEFAULT_BUDGETS)
+    if budgets_path and Path(budgets_path).exists():
+        with open(budgets_path, "r", encoding="utf-8") as f:
+            budgets.update(json.load(f))
+    return budgets
+
+
+def build_asset_index(content_dir: Path) -> Dict[str, str]:
+    """Map remote image URLs to their downloaded paths in assets.json (or the content store)."""
+    store = open_store(content_dir)
+    if store:
+        with store:
+            assets = store.assets(downloaded_only=True)
+    else:
+        assets_file = content_dir / "assets.json"
+        if not assets_file.exists():
+            return {}
+        with open(assets_file, "r", encoding="utf-8") as f:
+            assets = json.load(f).get("assets", [])
+
+    index = {}
+    for asset in assets:
+        original = asset.get("original") or {}
+        if asset.get("url") and original.get("path"):
+            index[asset["url"]] = original["path"]
+    return index
+
+
+def _local_path(ref: str, root_dir: Path, asset_index: Dict[str, str]) -> Optional[Path]:
+    """Resolve an image or stylesheet reference to a file on disk."""
+    if not ref:
+        return None
+    ref = ref.strip()
+
+    if ref in asset_index:
+        return root_dir / asset_index[ref]
+
+    parsed = urlparse(ref)
+    if parsed.netloc and not is_site_host(parsed.netloc):
+        return None
+
+    path = root_dir / parsed.path.lstrip("/")
+    return path if path.is_file() else None
+
+
+def _srcset_urls(srcset: str) -> List[str]:
+    """Return the URLs of a srcset attribute."""
+    return [c.strip().split()[0] for c in srcset.split(",") if c.strip()]
+
+
+def analyze_page(html_path: Path, root_dir: Path, asset_index: Dict[str, str]) -> Dict:
+    """Collect weight metrics for a single generated page."""
+    html = html_path.read_bytes()
+    soup = BeautifulSoup(html, "html.parser")
+
+    inline_css = sum(len((tag.string or "").encode("utf-8")) for tag in soup.find_all("style"))
+    inline_css += sum(len(tag["style"].encode("utf-8")) for tag in soup.find_all(style=True))
+
+    inline_js = 0
+    blocking_bytes = 0
+    for script in soup.find_all("script"):
+        if script.get("src"):
+            # Only synchronous scripts block parsing
+            if not script.has_attr("defer") and not script.has_attr("async"):
+                path = _local_path(script["src"], root_dir, asset_index)
+                if path:
+                    blocking_bytes += path.stat().st_size
+        elif script.get("type", "text/javascript") in ("text/javascript", "module"):
+            inline_js += len((script.string or "").encode("utf-8"))
+
+    for link in soup.find_all("link", href=True):
+        rel = [r.lower() for r in link.get("rel", [])]
+        if "stylesheet" in rel and link.get("media", "all") in ("all", "screen"):
+            path = _local_path(link["href"], root_dir, asset_index)
+            if path:
+                blocking_bytes += path.stat().st_size
+
+    images = soup.find_all("img")
+    referenced = set()
+    for img in images:
+        for attr in ("src", "data-src", "data-lazy-src"):
+            if img.get(attr):
+                referenced.add(img[attr])
+        if img.get("srcset"):
+            referenced.update(_srcset_urls(img["srcset"]))
+    for source in soup.find_all("source", srcset=True):
+        referenced.update(_srcset_urls(source["srcset"]))
+
+    image_bytes = 0
+    missing_images = 0
+    for ref in referenced:
+        path = _local_path(ref, root_dir, asset_index)
+        if path and path.is_file():
+            image_bytes += path.stat().st_size
+        else:
+            missing_images += 1
+
+    return {
+        "html_bytes": len(html),
+        "inline_css_bytes": inline_css,
+        "inline_js_bytes": inline_js,
+        "image_count": len(images),
+        "image_bytes": image_bytes,
+        "unresolved_images": missing_images,
+        "critical_path_bytes": len(html) + blocking_bytes,
+    }
+
+
+def check_budgets(pages: Dict[str, Dict], previous: Dict[str, Dict], budgets: Dict) -> List[str]:
+    """Return a human-readable list of budget violations."""
+    violations = []
+    max_regression = budgets.get("max_regression_pct")
+
+    for name, metrics in sorted(pages.items()):
+        for metric in METRICS:
+            value = metrics[metric]
+            limit = budgets.get(metric)
+            if limit is not None and value > limit:
+                violations.append(f"{name}: {metric} {value} exceeds budget {limit}")
+
+            old = previous.get(name, {}).get(metric)
+            if max_regression is not None and old:
+                growth = (value - old) / old * 100
+                if growth > max_regression:
+                    violations.append(
+                        f"{name}: {metric} grew {growth:.1f}% ({old} -> {value}), "
+                        f"limit {max_regression}%"
+                    )
+
+    return violations
+
+
+def load_report(report_path: Path) -> Dict:
+    """Load a previous build report if one exists."""
+    if not report_path.exists():
+        return {}
+    with open(report_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_report(
+    output_dir: str = ".",
+    content_dir: str = "content",
+    report_path: str = "content/build-report.json",
+    budgets_path: Optional[str] = None,
+) -> Dict:
+    """Analyze all generated pages, diff against the last report and save it."""
+    root_dir = Path(output_dir)
+    report_file = Path(report_path)
+    budgets = load_budgets(budgets_path)
+    asset_index = build_asset_index(Path(content_dir))
+
+    pages = {}
+    for html_path in sorted(root_dir.glob("*.html")):
+        pages[html_path.name] = analyze_page(html_path, root_dir, asset_index)
+
+    previous = load_report(report_file).get("pages", {})
+    violations = check_budgets(pages, previous, budgets)
+
+    totals = {metric: sum(p[metric] for p in pages.values()) for metric in METRICS}
+    previous_totals = {metric: sum(p.get(metric, 0) for p in previous.values()) for metric in METRICS}
+
+    report = {
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "budgets": budgets,
+        "totals": totals,
+        "delta": {m: totals[m] - previous_totals[m] for m in METRICS} if previous else {},
+        "pages": pages,
+        "violations": violations,
+    }
+
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_summary(report)
+    return report
+
+
+def print_summary(report: Dict, top: int = 10):
+    """Print the heaviest pages and any budget violations."""
+    pages = report["pages"]
+    print(f"\nBuild report: {len(pages)} pages, {report['totals']['html_bytes'] / 1024:.0f} KB HTML")
+
+    print("Heaviest pages:")
+    heaviest = sorted(pages.items(), key=lambda item: item[1]["html_bytes"], reverse=True)
+    for name, metrics in heaviest[:top]:
+        print(
+            f"  {name}: {metrics['html_bytes'] / 1024:.1f} KB HTML, "
+            f"{metrics['image_count']} images, "
+            f"{metrics['critical_path_bytes'] / 1024:.1f} KB critical path"
+        )
+
+    for metric, change in report["delta"].items():
+        if change:
+            print(f"  {metric}: {change:+d} vs previous build")
+
+    if report["violations"]:
+        print(f"\n❌ {len(report['violations'])} budget violations:")
+        for violation in report["violations"]:
+            print(f"  - {violation}")
+    else:
+        print("✅ All pages within budget")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Report page weight and enforce performance budgets")
+    parser.add_argument("--output-dir", default=".", help="Directory with generated HTML (default: .)")
+    parser.add_argument("--content-dir", default="content", help="Content directory (default: content)")
+    parser.add_argument(
+        "--report",
+        default="content/build-report.json",
+        help="Report file; the previous report is read from here (default: content/build-report.json)"
+    )
+    parser.add_argument("--budgets", help="JSON file overriding the default budgets")
+    args = parser.parse_args()
+
+    report = build_report(args.output_dir, args.content_dir, args.report, args.budgets)
+    if report["violations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
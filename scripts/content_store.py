@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+SQLite Content Store
+An optional alternative to the JSON files in content/: pages, content
+blocks, images, links, assets and entities in one indexed database. Pages
+are upserted one at a time, so an incremental scrape rewrites only what it
+fetched, and readers query just the rows they need instead of parsing every
+file in full. When content/content.db exists the pipeline scripts read it in
+preference to the JSON files; export writes the JSON files back out for
+anything that still expects them.
+
+    python scripts/content_store.py import   # content/*.json -> content/content.db
+    python scripts/content_store.py export   # content/content.db -> content/*.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from entity_store import EntityStore
+from multi_replace import MultiReplacer
+
+DB_NAME = "content.db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    slug TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    meta_description TEXT,
+    canonical TEXT,
+    lang TEXT,
+    -- headings, forms, structured data hints and anything else, as JSON
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_slug ON pages (slug);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    page_url TEXT NOT NULL REFERENCES pages (url) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT,
+    text TEXT,
+    html TEXT,
+    PRIMARY KEY (page_url, position)
+);
+
+CREATE TABLE IF NOT EXISTS images (
+    page_url TEXT NOT NULL REFERENCES pages (url) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    src TEXT,
+    alt TEXT,
+    width INTEGER,
+    height INTEGER,
+    caption TEXT,
+    context TEXT,
+    PRIMARY KEY (page_url, position)
+);
+CREATE INDEX IF NOT EXISTS images_src ON images (src);
+
+CREATE TABLE IF NOT EXISTS links (
+    page_url TEXT NOT NULL REFERENCES pages (url) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    anchor TEXT,
+    target TEXT,
+    PRIMARY KEY (page_url, position)
+);
+CREATE INDEX IF NOT EXISTS links_target ON links (target);
+
+-- One row per reference to an asset, in the order they were found
+CREATE TABLE IF NOT EXISTS assets (
+    seq INTEGER PRIMARY KEY,
+    url TEXT,
+    type TEXT,
+    page_url TEXT,
+    alt TEXT
+);
+CREATE INDEX IF NOT EXISTS assets_url ON assets (url);
+CREATE INDEX IF NOT EXISTS assets_page ON assets (page_url);
+
+-- What download_images made of an asset URL: original/webp/avif files, srcset, sizes
+CREATE TABLE IF NOT EXISTS asset_files (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS entities (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+
+-- Whole documents: the sitemap, the image dimension cache
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columns that can mention local image files, for rewrite_references
+REFERENCE_COLUMNS = [("asset_files", "data"), ("images", "src"), ("blocks", "html"), ("pages", "data"), ("meta", "value")]
+
+# Key order of a page record in content.json
+PAGE_FIELDS = ["url", "slug", "title", "metaDescription", "canonical", "lang", "headings",
+               "contentBlocks", "images", "forms", "internalLinks", "structuredDataHints"]
+# Page fields kept in their own columns or tables rather than in pages.data
+PAGE_COLUMNS = {"title": "title", "metaDescription": "meta_description", "canonical": "canonical", "lang": "lang"}
+CHILD_FIELDS = {"url", "slug", "contentBlocks", "images", "internalLinks"}
+ASSET_COLUMNS = ("url", "type", "page_url", "alt")
+IMAGE_COLUMNS = ("src", "alt", "width", "height", "caption", "context")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def build_hierarchy(urls: Iterable[str]) -> Dict:
+    """Nested dict of URL path segments, each page marked with its "_url"."""
+    hierarchy: Dict = {}
+    for url in urls:
+        current = hierarchy
+        for part in [p for p in urlparse(url).path.split("/") if p]:
+            current = current.setdefault(part, {})
+        current["_url"] = url
+    return hierarchy
+
+
+class ContentStore:
+    """Scraped content in SQLite, readable in parts and writable a page at a time."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{self.path} has schema version {version}, expected {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Writing
+
+    def upsert_page(self, page: Dict, assets: Iterable[Dict] = ()):
+        """Insert or replace one page with its blocks, images, links and asset references."""
+        url = page["url"]
+        data = {field: value for field, value in page.items()
+                if field not in CHILD_FIELDS and field not in PAGE_COLUMNS}
+        with self.db:
+            self.db.execute(
+                """INSERT INTO pages (url, slug, position, title, meta_description, canonical, lang, data)
+                   VALUES (?, ?, (SELECT COALESCE(MAX(position) + 1, 0) FROM pages), ?, ?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET
+                       slug = excluded.slug, title = excluded.title,
+                       meta_description = excluded.meta_description, canonical = excluded.canonical,
+                       lang = excluded.lang, data = excluded.data""",
+                (url, page.get("slug", ""), page.get("title"), page.get("metaDescription"),
+                 page.get("canonical"), page.get("lang"), _dumps(data)))
+            for table in ("blocks", "images", "links"):
+                self.db.execute(f"DELETE FROM {table} WHERE page_url = ?", (url,))
+            self.db.execute("DELETE FROM assets WHERE page_url = ?", (url,))
+
+            self.db.executemany(
+                "INSERT INTO blocks (page_url, position, type, text, html) VALUES (?, ?, ?, ?, ?)",
+                [(url, i, block.get("type"), block.get("content", {}).get("text"), block.get("content", {}).get("html"))
+                 for i, block in enumerate(page.get("contentBlocks", []))])
+            self.db.executemany(
+                "INSERT INTO images (page_url, position, src, alt, width, height, caption, context) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(url, i, *(image.get(column) for column in IMAGE_COLUMNS))
+                 for i, image in enumerate(page.get("images", []))])
+            self.db.executemany(
+                "INSERT INTO links (page_url, position, anchor, target) VALUES (?, ?, ?, ?)",
+                [(url, i, link.get("anchor"), link.get("target"))
+                 for i, link in enumerate(page.get("internalLinks", []))])
+            self._insert_assets(assets)
+
+    def _insert_assets(self, assets: Iterable[Dict]):
+        self.db.executemany("INSERT INTO assets (url, type, page_url, alt) VALUES (?, ?, ?, ?)",
+                            [tuple(asset.get(column) for column in ASSET_COLUMNS) for asset in assets])
+
+    def update_asset_files(self, files: Dict[str, Dict]):
+        """Record what was downloaded for each asset URL (original/webp/avif paths, srcset)."""
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO asset_files (url, data) VALUES (?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET data = excluded.data",
+                [(url, _dumps({field: value for field, value in data.items() if field not in ASSET_COLUMNS}))
+                 for url, data in files.items()])
+
+    def save_entities(self, entities: EntityStore):
+        """Merge entities into the stored ones and write the result back."""
+        merged = self.entities()
+        merged.merge(entities)
+        with self.db:
+            self.db.execute("DELETE FROM entities")
+            rows = []
+            for kind, items in merged.to_dict().items():
+                if kind == "version":
+                    continue
+                rows += [(kind, key, position, _dumps(entity)) for position, (key, entity) in enumerate(items.items())]
+            self.db.executemany("INSERT INTO entities (kind, key, position, data) VALUES (?, ?, ?, ?)", rows)
+
+    def set_meta(self, key: str, value):
+        with self.db:
+            self.db.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                            "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, _dumps(value)))
+
+    def rewrite_references(self, mapping: Dict[str, str]) -> int:
+        """Replace renamed filenames wherever the store mentions them; returns the rows changed."""
+        replacer = MultiReplacer(mapping)
+        changed = 0
+        with self.db:
+            for table, column in REFERENCE_COLUMNS:
+                updates = []
+                for row in self.db.execute(f"SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL"):
+                    value, count = replacer.replace(row[column])
+                    if count:
+                        updates.append((value, row["rowid"]))
+                self.db.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+                changed += len(updates)
+        return changed
+
+    def refresh_sitemap(self, redirects: Optional[Dict[str, Dict]] = None):
+        """Rebuild the stored sitemap from every page in the store, merging this run's redirects into the stored ones."""
+        urls = self.page_urls()
+        redirects = {**self.sitemap().get("redirects", {}), **(redirects or {})}
+        # A URL that is a page again no longer redirects
+        for url in urls:
+            redirects.pop(url, None)
+        self.set_meta("sitemap", {"urls": urls, "hierarchy": build_hierarchy(urls), "redirects": redirects})
+
+    # Reading
+
+    def get_meta(self, key: str, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def page_urls(self) -> List[str]:
+        return [row["url"] for row in self.db.execute("SELECT url FROM pages ORDER BY position")]
+
+    def page(self, url: str) -> Optional[Dict]:
+        """One page record, as it appears in content.json."""
+        row = self.db.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return self._page(row) if row else None
+
+    def page_by_slug(self, slug: str) -> Optional[Dict]:
+        row = self.db.execute("SELECT * FROM pages WHERE slug = ? ORDER BY position LIMIT 1", (slug,)).fetchone()
+        return self._page(row) if row else None
+
+    def pages(self) -> List[Dict]:
+        return [self._page(row) for row in self.db.execute("SELECT * FROM pages ORDER BY position").fetchall()]
+
+    def _page(self, row: sqlite3.Row) -> Dict:
+        url = row["url"]
+        data = json.loads(row["data"])
+        values = {
+            "url": url,
+            "slug": row["slug"],
+            **{field: row[column] for field, column in PAGE_COLUMNS.items()},
+            "contentBlocks": [
+                {"type": block["type"], "content": {"text": block["text"], "html": block["html"]}}
+                for block in self.db.execute(
+                    "SELECT type, text, html FROM blocks WHERE page_url = ? ORDER BY position", (url,))
+            ],
+            "images": [
+                {column: image[column] for column in IMAGE_COLUMNS}
+                for image in self.db.execute(
+                    "SELECT * FROM images WHERE page_url = ? ORDER BY position", (url,))
+            ],
+            "internalLinks": [
+                {"anchor": link["anchor"], "target": link["target"]}
+                for link in self.db.execute(
+                    "SELECT anchor, target FROM links WHERE page_url = ? ORDER BY position", (url,))
+            ],
+            **data,
+        }
+        page = {field: values[field] for field in PAGE_FIELDS if field in values}
+        page.update((field, value) for field, value in values.items() if field not in page)
+        return page
+
+    def image_srcs(self) -> List[str]:
+        """Every image URL referenced by a page."""
+        return [row["src"] for row in self.db.execute(
+            "SELECT DISTINCT src FROM images WHERE src IS NOT NULL AND src != '' ORDER BY src")]
+
+    def assets(self, asset_type: Optional[str] = None, downloaded_only: bool = False) -> List[Dict]:
+        """Asset records as they appear in assets.json, optionally only one type or only downloaded ones."""
+        query = ("SELECT a.url, a.type, a.page_url, a.alt, f.data FROM assets a "
+                 f"{'JOIN' if downloaded_only else 'LEFT JOIN'} asset_files f ON f.url = a.url")
+        params = ()
+        if asset_type:
+            query += " WHERE a.type = ?"
+            params = (asset_type,)
+        assets = []
+        for row in self.db.execute(query + " ORDER BY a.seq", params):
+            asset = {column: row[column] for column in ASSET_COLUMNS}
+            if row["data"]:
+                asset.update(json.loads(row["data"]))
+            assets.append(asset)
+        return assets
+
+    def entity(self, kind: str, key: str) -> Optional[Dict]:
+        """One entity by natural key (a tour's URL, say)."""
+        row = self.db.execute("SELECT data FROM entities WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def entities(self) -> EntityStore:
+        data: Dict[str, Dict] = {}
+        for row in self.db.execute("SELECT kind, key, data FROM entities ORDER BY kind, position"):
+            data.setdefault(row["kind"], {})[row["key"]] = json.loads(row["data"])
+        return EntityStore.from_dict(data)
+
+    def sitemap(self) -> Dict:
+        return self.get_meta("sitemap", {})
+
+    # JSON compatibility
+
+    def import_json(self, content_dir: Path) -> Dict[str, int]:
+        """Load content.json, assets.json, entities.json and sitemap.json, where present."""
+        content_dir = Path(content_dir)
+
+        def load(name: str) -> Optional[Dict]:
+            path = content_dir / name
+            if not path.exists():
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        counts = {"pages": 0, "assets": 0, "entities": 0}
+        content = load("content.json") or {}
+        for page in content.get("pages", []):
+            self.upsert_page(page)
+            counts["pages"] += 1
+
+        assets = load("assets.json")
+        if assets is not None:
+            records = assets.get("assets", [])
+            files = {}
+            for asset in records:
+                extra = {field: value for field, value in asset.items() if field not in ASSET_COLUMNS}
+                if extra and asset.get("url"):
+                    files.setdefault(asset["url"], extra)
+            with self.db:
+                self.db.execute("DELETE FROM assets")
+                self._insert_assets(records)
+            self.update_asset_files(files)
+            if "dimensions" in assets:
+                self.set_meta("dimensions", assets["dimensions"])
+            counts["assets"] = len(records)
+
+        entities = load("entities.json")
+        if entities is not None:
+            store = EntityStore.from_dict(entities)
+            self.save_entities(store)
+            counts["entities"] = sum(store.counts().values())
+
+        sitemap = load("sitemap.json")
+        if sitemap is not None:
+            self.set_meta("sitemap", sitemap)
+        return counts
+
+    def export_json(self, content_dir: Path):
+        """Write the four JSON files the pipeline used before the store existed."""
+        content_dir = Path(content_dir)
+        content_dir.mkdir(parents=True, exist_ok=True)
+        assets: Dict = {"assets": self.assets()}
+        dimensions = self.get_meta("dimensions")
+        if dimensions is not None:
+            assets["dimensions"] = dimensions
+        documents = {
+            "content.json": {"pages": self.pages()},
+            "entities.json": self.entities().to_dict(),
+            "assets.json": assets,
+            "sitemap.json": self.sitemap(),
+        }
+        for name, document in documents.items():
+            path = content_dir / name
+            temp = path.with_name(f".{name}.tmp")
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+            os.replace(temp, path)
+
+
+def open_store(content_dir) -> Optional[ContentStore]:
+    """The content store in content_dir, or None when the pipeline is using the JSON files."""
+    path = Path(content_dir) / DB_NAME
+    return ContentStore(path) if path.exists() else None
+
+
+def main():
+    """Move content between the JSON files and the SQLite store."""
+    parser = argparse.ArgumentParser(description="Import or export the SQLite content store")
+    parser.add_argument("command", choices=["import", "export"],
+                        help="import: JSON files -> database; export: database -> JSON files")
+    parser.add_argument("--content-dir", default=str(Path(__file__).parent.parent / "content"),
+                        help="Directory with the JSON files (default: content)")
+    parser.add_argument("--db", help=f"Database path (default: <content-dir>/{DB_NAME})")
+    args = parser.parse_args()
+
+    content_dir = Path(args.content_dir)
+    db_path = Path(args.db) if args.db else content_dir / DB_NAME
+    if args.command == "export" and not db_path.exists():
+        parser.error(f"{db_path} not found")
+
+    with ContentStore(db_path) as store:
+        if args.command == "import":
+            counts = store.import_json(content_dir)
+            print(f"Imported {counts['pages']} pages, {counts['assets']} asset references "
+                  f"and {counts['entities']} entities into {db_path}")
+        else:
+            store.export_json(content_dir)
+            print(f"Exported {db_path} to {content_dir}")
+
+
+if __name__ == "__main__":
+    main()
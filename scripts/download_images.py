@@ -4,7 +4,7 @@ Image Downloader and Optimizer
 Downloads all images referenced in assets.json and optimizes them.
 """
 
-import json
+import argparse
 import os
 import re
 import shutil
@@ -15,11 +15,17 @@ from urllib.parse import urlparse
 import requests
 from PIL import Image
 
+import instrumentation
+from content_store import open_store
+from instrumentation import Metrics
+from records import Asset, from_dicts, load_assets as read_assets, load_json, save_json
+
 
 class ImageDownloader:
     """Download and optimize images."""
     
-    def __init__(self, content_dir: str = "content", assets_dir: str = "assets/img"):
+    def __init__(self, content_dir: str = "content", assets_dir: str = "assets/img",
+                 metrics: Optional[Metrics] = None):
         self.content_dir = Path(content_dir)
         self.assets_dir = Path(assets_dir)
         self.assets_dir.mkdir(parents=True, exist_ok=True)
@@ -31,18 +37,21 @@ class ImageDownloader:
         
         self.downloaded = {}
         self.failed = []
+        self.metrics = metrics or Metrics("download_images")
     
-    def load_assets(self) -> List[Dict]:
-        """Load assets from assets.json."""
+    def load_assets(self) -> List[Asset]:
+        """Load image assets from the content store, or from assets.json."""
+        store = open_store(self.content_dir)
+        if store:
+            with store:
+                return from_dicts(Asset, store.assets(asset_type="image"), f"{store.path.name}: assets")
+        
         assets_file = self.content_dir / "assets.json"
         if not assets_file.exists():
             print("assets.json not found. Run scraper first.")
             return []
         
-        with open(assets_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        return data.get("assets", [])
+        return read_assets(assets_file)
     
     def sanitize_filename(self, url: str) -> str:
         """Create a safe filename from URL."""
@@ -70,6 +79,7 @@ class ImageDownloader:
     def download_image(self, url: str) -> Optional[Path]:
         """Download a single image."""
         if url in self.downloaded:
+            self.metrics.count("download_cache_hits")
             return self.downloaded[url]
         
         try:
@@ -104,6 +114,7 @@ class ImageDownloader:
             # Save original
             with open(filepath, "wb") as f:
                 shutil.copyfileobj(response.raw, f)
+            self.metrics.count("bytes_fetched", filepath.stat().st_size)
             
             self.downloaded[url] = filepath
             return filepath
@@ -111,6 +122,7 @@ class ImageDownloader:
         except Exception as e:
             print(f"  Error downloading {url}: {e}")
             self.failed.append(url)
+            self.metrics.count("download_errors")
             return None
     
     def optimize_image(self, filepath: Path) -> Dict:
@@ -139,12 +151,14 @@ class ImageDownloader:
             # WebP version
             webp_path = parent / f"{base_name}.webp"
             img.save(webp_path, "WEBP", quality=85, method=6)
+            self.metrics.count("images_encoded", format="webp")
             
             # AVIF version (if pillow supports it)
             avif_path = None
             try:
                 avif_path = parent / f"{base_name}.avif"
                 img.save(avif_path, "AVIF", quality=80)
+                self.metrics.count("images_encoded", format="avif")
             except Exception:
                 pass  # AVIF not supported
             
@@ -174,6 +188,7 @@ class ImageDownloader:
                 # Save WebP
                 webp_resized_path = parent / f"{base_name}-{bp}w.webp"
                 resized.save(webp_resized_path, "WEBP", quality=85, method=6)
+                self.metrics.count("images_encoded", format="webp")
                 srcset_webp.append(f"{webp_resized_path.name} {bp}w")
                 
                 # Save AVIF if supported
@@ -181,6 +196,7 @@ class ImageDownloader:
                     try:
                         avif_resized_path = parent / f"{base_name}-{bp}w.avif"
                         resized.save(avif_resized_path, "AVIF", quality=80)
+                        self.metrics.count("images_encoded", format="avif")
                         srcset_avif.append(f"{avif_resized_path.name} {bp}w")
                     except:
                         pass
@@ -188,6 +204,7 @@ class ImageDownloader:
                 # Save original format resized
                 orig_resized_path = parent / f"{base_name}-{bp}w{filepath.suffix}"
                 resized.save(orig_resized_path, quality=85)
+                self.metrics.count("images_encoded", format=filepath.suffix.lstrip(".").lower())
                 srcset_orig.append(f"{orig_resized_path.name} {bp}w")
             
             return {
@@ -210,47 +227,54 @@ class ImageDownloader:
             
         except Exception as e:
             print(f"  Error optimizing {filepath}: {e}")
+            self.metrics.count("optimize_errors")
             return {}
     
     def process_all(self):
         """Download and optimize all images."""
         assets = self.load_assets()
         
-        image_assets = [a for a in assets if a.get("type") == "image"]
+        image_assets = [a for a in assets if a.type == "image"]
         
         print(f"Found {len(image_assets)} images to download")
         
         optimized_data = {}
         
         for i, asset in enumerate(image_assets, 1):
-            url = asset.get("url")
+            url = asset.url
             if not url:
                 continue
             
             print(f"[{i}/{len(image_assets)}] Processing: {url}")
             
-            filepath = self.download_image(url)
+            with self.metrics.span("download", url=url):
+                filepath = self.download_image(url)
             if filepath:
-                optimized = self.optimize_image(filepath)
+                with self.metrics.span("optimize", file=filepath.name):
+                    optimized = self.optimize_image(filepath)
                 if optimized:
                     optimized_data[url] = {
-                        **asset,
+                        **asset.to_dict(),
                         **optimized
                     }
         
-        # Update assets.json with optimization data
-        assets_file = self.content_dir / "assets.json"
-        with open(assets_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        # Update assets with optimization info
-        for asset in data.get("assets", []):
-            url = asset.get("url")
-            if url in optimized_data:
-                asset.update(optimized_data[url])
-        
-        with open(assets_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        store = open_store(self.content_dir)
+        if store:
+            # Only the rows for these URLs change
+            with store:
+                store.update_asset_files(optimized_data)
+        else:
+            # Update assets.json with optimization data
+            assets_file = self.content_dir / "assets.json"
+            data = load_json(assets_file)
+            
+            # Update assets with optimization info
+            for asset in data.get("assets", []):
+                url = asset.get("url")
+                if url in optimized_data:
+                    asset.update(optimized_data[url])
+            
+            save_json(data, assets_file)
         
         print(f"\nDownload complete!")
         print(f"  Downloaded: {len(self.downloaded)}")
@@ -263,8 +287,15 @@ class ImageDownloader:
 
 def main():
     """Main entry point."""
-    downloader = ImageDownloader()
-    downloader.process_all()
+    parser = argparse.ArgumentParser(description="Download and optimize images from assets.json")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    metrics = instrumentation.from_args("download_images", args)
+    downloader = ImageDownloader(metrics=metrics)
+    with metrics.stage("download-and-optimize"):
+        downloader.process_all()
+    instrumentation.finish(metrics, args)
 
 
 if __name__ == "__main__":
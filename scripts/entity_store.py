@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Entity Store
+Tours, team members, FAQs, testimonials and contact details keyed by their
+natural identity, so an entity seen on many pages is stored once with the
+list of pages it came from, and can be looked up by key without a scan.
+
+Run directly to convert an entities.json written as plain lists:
+    python scripts/entity_store.py content/entities.json
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+FORMAT_VERSION = 2
+
+KINDS = ("tours", "team", "faqs", "testimonials", "payments", "contact")
+
+# Fields older entities.json files used for the page an entity came from
+SOURCE_FIELDS = ("source_url", "source", "url")
+
+# What a contact block says, as opposed to where it was found (url, sources)
+CONTACT_DETAILS = ("email", "phone", "address", "social")
+
+# Digits in a dialable phone number, country code included (E.164 allows 15)
+PHONE_DIGITS = (7, 15)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(_normalize(text).encode("utf-8")).hexdigest()[:16]
+
+
+def _phone_key(phone: str) -> str:
+    """The digits of a phone number; empty for years, status codes and other things that only look like one."""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits if PHONE_DIGITS[0] <= len(digits) <= PHONE_DIGITS[1] else ""
+
+
+def _contact_key(entity: Dict) -> str:
+    """Contacts are the same when their email or real phone number is, or else when every detail they give is."""
+    email = entity.get("email", "").lower()
+    phone = _phone_key(entity.get("phone", ""))
+    if email or phone:
+        return f"{email}|{phone}"
+    details = {field: entity.get(field) for field in CONTACT_DETAILS}
+    return _digest(json.dumps(details, sort_keys=True, ensure_ascii=False))
+
+
+def _clean_contact(entity: Dict) -> Dict:
+    """A contact without the years and status codes the scraper can mistake for its phone number."""
+    if entity.get("phone") and not _phone_key(entity["phone"]):
+        return {**entity, "phone": ""}
+    return entity
+
+
+# kind -> natural key of an entity of that kind
+KEY_FUNCTIONS: Dict[str, Callable[[Dict], str]] = {
+    "tours": lambda entity: entity.get("url", ""),
+    "team": lambda entity: _normalize(entity.get("name", "")),
+    "faqs": lambda entity: _digest(entity.get("question", "")),
+    "testimonials": lambda entity: _digest(entity.get("quote", "")),
+    "contact": _contact_key,
+}
+
+
+# kind -> cleanup applied before an entity of that kind is keyed and stored
+CLEAN_FUNCTIONS: Dict[str, Callable[[Dict], Dict]] = {
+    "contact": _clean_contact,
+}
+
+
+def entity_key(kind: str, entity: Dict) -> str:
+    """The natural key of an entity; kinds without one are keyed by their content."""
+    key_function = KEY_FUNCTIONS.get(kind)
+    if key_function:
+        return key_function(entity)
+    content = {field: value for field, value in entity.items() if field != "sources"}
+    return _digest(json.dumps(content, sort_keys=True, ensure_ascii=False))
+
+
+def _merge_into(existing: Dict, entity: Dict):
+    """Fold a duplicate into the stored entity; what was stored first wins on conflicts."""
+    for field, value in entity.items():
+        current = existing.get(field)
+        if field == "sources":
+            continue
+        if not current and value:
+            existing[field] = value
+        elif isinstance(current, dict) and isinstance(value, dict):
+            for name, item in value.items():
+                current.setdefault(name, item)
+        elif isinstance(current, list) and isinstance(value, list):
+            current.extend(item for item in value if item not in current)
+
+
+class EntityStore:
+    """Entities of each kind by natural key, in the order they were first seen."""
+
+    def __init__(self):
+        self._entities: Dict[str, Dict[str, Dict]] = {kind: {} for kind in KINDS}
+
+    def add(self, kind: str, entity: Dict, source_url: Optional[str] = None) -> Dict:
+        """Store an entity, or merge it into the one with the same key; returns the stored entity."""
+        return self._add(kind, entity, [source_url] if source_url else [])
+
+    def _add(self, kind: str, entity: Dict, sources: Iterable[str]) -> Dict:
+        entities = self._entities.setdefault(kind, {})
+        clean = CLEAN_FUNCTIONS.get(kind)
+        if clean:
+            entity = clean(entity)
+        key = entity_key(kind, entity)
+        stored = entities.get(key)
+        if stored is None:
+            # Merging extends nested lists and dicts; keep the caller's entity untouched
+            stored = copy.deepcopy(entity)
+            stored["sources"] = []
+            entities[key] = stored
+        else:
+            _merge_into(stored, entity)
+        for source in sources:
+            if source not in stored["sources"]:
+                stored["sources"].append(source)
+        return stored
+
+    def extend(self, kind: str, entities: Iterable[Dict], source_url: Optional[str] = None):
+        for entity in entities:
+            self.add(kind, entity, source_url)
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        """The entity of this kind with this natural key (a tour's URL, say), or None."""
+        return self._entities.get(kind, {}).get(key)
+
+    def items(self, kind: str) -> List[Dict]:
+        """Every entity of a kind, in first-seen order."""
+        return list(self._entities.get(kind, {}).values())
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: len(entities) for kind, entities in self._entities.items()}
+
+    def merge(self, other: "EntityStore"):
+        """Fold in another store, e.g. one filled by a worker process."""
+        for kind, entities in other._entities.items():
+            for entity in entities.values():
+                self._add(kind, entity, entity.get("sources", []))
+
+    def to_dict(self) -> Dict:
+        return {"version": FORMAT_VERSION, **self._entities}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EntityStore":
+        """Read the keyed format, or the older one with a plain list per kind."""
+        store = cls()
+        for kind, entities in data.items():
+            if kind == "version":
+                continue
+            if isinstance(entities, dict):
+                entities = entities.values()
+            for entity in entities:
+                sources = entity.get("sources")
+                if sources is None:
+                    sources = [entity[field] for field in SOURCE_FIELDS if entity.get(field)][:1]
+                store._add(kind, entity, sources)
+        return store
+
+    @classmethod
+    def load(cls, path: Path) -> "EntityStore":
+        """Load entities.json; a missing file is an empty store."""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: Path):
+        path = Path(path)
+        temp = path.with_name(f".{path.name}.tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(temp, path)
+
+
+def main():
+    """Rewrite an entities.json in the keyed, de-duplicated format."""
+    parser = argparse.ArgumentParser(description="Convert entities.json to the keyed entity store format")
+    parser.add_argument("path", nargs="?",
+                        default=str(Path(__file__).parent.parent / "content" / "entities.json"),
+                        help="entities.json to convert in place")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    before = {kind: len(entities) for kind, entities in data.items() if kind != "version"}
+    size = path.stat().st_size
+
+    store = EntityStore.from_dict(data)
+    store.save(path)
+    for kind, count in store.counts().items():
+        print(f"  {kind}: {before.get(kind, 0)} -> {count}")
+    print(f"Wrote {path} ({size:,} -> {path.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,345 @@
 #!/usr/bin/env python3
 """
 Extract Critical CSS
-Extracts above-the-fold CSS for inlining.
+Parses css/styles.css (following @import) into a rule tree, matches each
+rule's selectors against every page's above-the-fold DOM, inlines only the
+matching rules and defers the full stylesheet.
 """
 
+import argparse
+import hashlib
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
+from bs4 import BeautifulSoup
 
-def extract_critical_css(css_file: str = "css/styles.css", output_file: str = "css/critical.css") -> str:
-    """Extract critical CSS for above-the-fold content."""
+# Number of element children of <main> treated as above the fold
+FOLD_SECTIONS = 2
+
+# Cap on elements considered above the fold; legacy builder pages nest the
+# whole page inside the first section of <main>
+FOLD_ELEMENTS = 600
+
+# At-rules whose blocks contain further rules rather than declarations
+GROUPING_AT_RULES = {"media", "supports", "layer", "container", "document"}
+
+# State toggled by JS after load; stripped before matching so e.g. dark-theme
+# and open-menu variants of above-the-fold rules stay critical
+RUNTIME_ATTRIBUTE = re.compile(r"\[(?:data-theme|aria-expanded|aria-pressed|open)\b[^\]]*\]")
+DYNAMIC_PSEUDO = re.compile(
+    r"::?(?:hover|focus|focus-visible|focus-within|active|visited|target|checked|"
+    r"before|after|placeholder|selection|marker|first-line|first-letter|"
+    r"-webkit-[\w-]+|-moz-[\w-]+)(?:\([^)]*\))?"
+)
+
+COMMENT_OR_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+IMPORT_URL = re.compile(r"""@import\s+(?:url\()?\s*["']?([^"')\s]+)["']?\s*\)?\s*([^;]*)""", re.I)
+STYLESHEET_LINK = re.compile(r"""<link\b[^>]*\brel=["']stylesheet["'][^>]*\bhref=["'](/css/styles\.css)["'][^>]*>""", re.I)
+DEFERRED_BLOCK = re.compile(
+    r"""<style data-critical>.*?</style>\s*<link rel="preload" href="([^"]+)" as="style"[^>]*>\s*<noscript>.*?</noscript>""",
+    re.S
+)
+
+
+class StyleRule:
+    """A selector list with its declaration block."""
+
+    __slots__ = ("selectors", "body")
+
+    def __init__(self, selectors: List[str], body: str):
+        self.selectors = selectors
+        self.body = body
+
+    def css(self) -> str:
+        return f"{','.join(self.selectors)}{{{self.body}}}"
+
+
+class AtRule:
+    """An at-rule; grouping rules hold children, others keep their raw block."""
+
+    __slots__ = ("name", "prelude", "children", "body")
+
+    def __init__(self, name: str, prelude: str, children: Optional[List] = None, body: Optional[str] = None):
+        self.name = name
+        self.prelude = prelude
+        self.children = children
+        self.body = body
+
+    def css(self) -> str:
+        if self.children is not None:
+            return f"{self.prelude}{{{''.join(child.css() for child in self.children)}}}"
+        if self.body is None:
+            return f"{self.prelude};"
+        return f"{self.prelude}{{{self.body}}}"
+
+
+Node = Union[StyleRule, AtRule]
+
+
+def _split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Split on sep outside parentheses and brackets."""
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        if ch == sep and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _block_end(css: str, start: int) -> int:
+    """Return the index of the '}' closing the block opened just before start."""
+    depth = 1
+    i = start
+    while i < len(css):
+        if css[i] == "{":
+            depth += 1
+        elif css[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def _parse_block(css: str, start: int, end: int, base_dir: Path, seen: set) -> List[Node]:
+    """Parse rules between start and end into a list of nodes."""
+    nodes: List[Node] = []
+    i = start
+    while i < end:
+        while i < end and css[i].isspace():
+            i += 1
+        brace = css.find("{", i, end)
+        semi = css.find(";", i, end)
+
+        # Statement at-rule such as @import or @charset
+        if css.startswith("@", i) and semi != -1 and (brace == -1 or semi < brace):
+            statement = css[i:semi].strip()
+            i = semi + 1
+            match = IMPORT_URL.match(statement)
+            if match:
+                nodes.extend(_parse_import(base_dir / match.group(1), match.group(2).strip(), seen))
+            elif statement:
+                nodes.append(AtRule(statement[1:].split()[0].lower(), statement))
+            continue
+
+        if brace == -1:
+            break
+
+        prelude = " ".join(css[i:brace].split())
+        close = _block_end(css, brace + 1)
+        i = close + 1
+        if not prelude:
+            continue
+
+        if prelude.startswith("@"):
+            name = prelude[1:].split(None, 1)[0].split("(")[0].lower()
+            if name in GROUPING_AT_RULES:
+                nodes.append(AtRule(name, prelude, children=_parse_block(css, brace + 1, close, base_dir, seen)))
+            else:
+                nodes.append(AtRule(name, prelude, body=" ".join(css[brace + 1:close].split())))
+        else:
+            nodes.append(StyleRule(_split_top_level(prelude), " ".join(css[brace + 1:close].split())))
+
+    return nodes
+
+
+def _parse_import(path: Path, media: str, seen: set) -> List[Node]:
+    """Inline an imported stylesheet, wrapped in its media query if any."""
+    path = path.resolve()
+    if path in seen or not path.exists():
+        return []
+    seen.add(path)
+    nodes = parse_css(path.read_text(encoding="utf-8"), path.parent, seen)
+    if media:
+        return [AtRule("media", f"@media {media}", children=nodes)]
+    return nodes
+
+
+def parse_css(css: str, base_dir: Path = Path("."), seen: Optional[set] = None) -> List[Node]:
+    """Parse a stylesheet into a rule tree, following local @imports."""
+    css = COMMENT_OR_STRING.sub(lambda m: m.group(1) or "", css)
+    return _parse_block(css, 0, len(css), base_dir, seen if seen is not None else set())
+
+
+def load_stylesheet(css_file: Union[str, Path]) -> Tuple[List[Node], str]:
+    """Parse a stylesheet file; returns the rule tree and a hash of all sources."""
     css_path = Path(css_file)
-    
-    if not css_path.exists():
-        return ""
-    
-    with open(css_path, "r", encoding="utf-8") as f:
-        css = f.read()
-    
-    # Critical CSS sections (above-the-fold)
-    critical_sections = [
-        r':root\s*\{[^}]*\}',  # CSS variables
-        r'\*[^}]*\{[^}]*\}',  # Reset
-        r'html[^}]*\{[^}]*\}',
-        r'body[^}]*\{[^}]*\}',
-        r'\.skip-link[^}]*\{[^}]*\}',
-        r'\.header[^}]*\{[^}]*\}',
-        r'\.header__[^}]*\{[^}]*\}',
-        r'\.nav[^}]*\{[^}]*\}',
-        r'\.nav__[^}]*\{[^}]*\}',
-        r'\.hero[^}]*\{[^}]*\}',
-        r'\.hero__[^}]*\{[^}]*\}',
-        r'\.container[^}]*\{[^}]*\}',
-        r'\.btn[^}]*\{[^}]*\}',
-        r'\.theme-toggle[^}]*\{[^}]*\}',
-    ]
-    
-    critical_css = ""
-    for pattern in critical_sections:
-        matches = re.findall(pattern, css, re.MULTILINE | re.DOTALL)
-        for match in matches:
-            if match not in critical_css:
-                critical_css += match + "\n"
-    
-    # Save critical CSS
-    output_path = Path(output_file)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(critical_css)
-    
-    print(f"Extracted {len(critical_css)} characters of critical CSS")
-    return critical_css
+    seen = {css_path.resolve()}
+    rules = parse_css(css_path.read_text(encoding="utf-8"), css_path.parent, seen)
+
+    digest = hashlib.sha256()
+    for path in sorted(seen):
+        digest.update(path.read_bytes())
+    return rules, digest.hexdigest()
+
+
+def above_the_fold(html: str) -> BeautifulSoup:
+    """Reduce a page to the DOM visible before scrolling."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(["script", "style", "noscript", "template"]):
+        tag.decompose()
+
+    main = soup.find("main")
+    if main:
+        for child in main.find_all(recursive=False)[FOLD_SECTIONS:]:
+            child.decompose()
+        for sibling in list(main.find_next_siblings()):
+            sibling.decompose()
+
+    # Elements past the budget come later in document order, so never contain earlier ones
+    for tag in (soup.body or soup).find_all(True)[FOLD_ELEMENTS:]:
+        if not tag.decomposed:
+            tag.decompose()
+    return soup
+
+
+def _matching_selector(selector: str) -> str:
+    """Strip runtime state and pseudo parts that a static DOM can't match."""
+    selector = RUNTIME_ATTRIBUTE.sub("", selector)
+    selector = DYNAMIC_PSEUDO.sub("", selector)
+    selector = selector.strip()
+    # A combinator left dangling by stripping means "any descendant"
+    selector = re.sub(r"[>+~]\s*$", "", selector).strip()
+    return selector or "*"
+
+
+def _is_critical(selector: str, fold: BeautifulSoup, memo: Dict[str, bool]) -> bool:
+    """Check whether a selector matches anything above the fold."""
+    if selector not in memo:
+        try:
+            memo[selector] = fold.select_one(_matching_selector(selector)) is not None
+        except Exception:
+            # Selector syntax soupsieve can't evaluate; keep it to be safe
+            memo[selector] = True
+    return memo[selector]
+
+
+def _critical_nodes(nodes: List[Node], fold: BeautifulSoup, memo: Dict[str, bool]) -> List[str]:
+    """Return serialized critical rules from a (sub)tree."""
+    out = []
+    for node in nodes:
+        if isinstance(node, StyleRule):
+            selectors = [s for s in node.selectors if _is_critical(s, fold, memo)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{node.body}}}")
+        elif node.children is not None:
+            inner = _critical_nodes(node.children, fold, memo)
+            if inner:
+                out.append(f"{node.prelude}{{{''.join(inner)}}}")
+        elif node.name in ("font-face", "charset", "property"):
+            out.append(node.css())
+    return out
+
+
+def extract_critical_css(html: str, rules: List[Node]) -> str:
+    """Return the rules needed to render a page's above-the-fold content."""
+    fold = above_the_fold(html)
+    critical = _critical_nodes(rules, fold, {})
+    css = "\n".join(critical)
+
+    # Keep keyframes used by critical rules
+    for node in rules:
+        if isinstance(node, AtRule) and node.name.endswith("keyframes"):
+            name = node.prelude.split(None, 1)[-1]
+            if re.search(rf"\b{re.escape(name)}\b", css):
+                css += "\n" + node.css()
+    return css
+
+
+def strip_inlined_css(html: str) -> str:
+    """Undo a previous run so pages can be reprocessed idempotently."""
+    return DEFERRED_BLOCK.sub(lambda m: f'<link rel="stylesheet" href="{m.group(1)}">', html)
+
+
+def inline_critical_css(html: str, critical_css: str) -> str:
+    """Inline critical CSS and load the full stylesheet without blocking render."""
+    match = STYLESHEET_LINK.search(html)
+    if not match or not critical_css:
+        return html
+
+    href = match.group(1)
+    replacement = (
+        f"<style data-critical>{critical_css}</style>\n"
+        f'  <link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'  <noscript><link rel="stylesheet" href="{href}"></noscript>'
+    )
+    return html[:match.start()] + replacement + html[match.end():]
+
+
+# Per-process state for the worker pool
+_worker_rules: List[Node] = []
+
+
+def _init_worker(css_file: str):
+    global _worker_rules
+    _worker_rules, _ = load_stylesheet(css_file)
+
+
+def process_page(html_path: str, css_hash: str, cache_dir: str) -> Tuple[str, int, bool]:
+    """Inline critical CSS into one page; returns (name, critical bytes, cache hit)."""
+    path = Path(html_path)
+    original = path.read_text(encoding="utf-8")
+    html = strip_inlined_css(original)
+
+    page_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    cache_file = Path(cache_dir) / f"{css_hash[:16]}-{page_hash[:16]}.css"
+
+    cache_hit = cache_file.exists()
+    if cache_hit:
+        critical_css = cache_file.read_text(encoding="utf-8")
+    else:
+        critical_css = extract_critical_css(html, _worker_rules)
+        cache_file.write_text(critical_css, encoding="utf-8")
+
+    updated = inline_critical_css(html, critical_css)
+    if updated != original:
+        path.write_text(updated, encoding="utf-8")
+    return path.name, len(critical_css.encode("utf-8")), cache_hit
+
+
+def process_all(root_dir: Path, css_file: Path, cache_dir: Path, workers: Optional[int] = None):
+    """Inline per-page critical CSS across the site in parallel."""
+    _, css_hash = load_stylesheet(css_file)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    html_files = sorted(root_dir.glob("*.html"))
+
+    print(f"Found {len(html_files)} HTML files")
+
+    hits = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(css_file),)) as pool:
+        futures = [pool.submit(process_page, str(p), css_hash, str(cache_dir)) for p in html_files]
+        for future in futures:
+            try:
+                name, size, cache_hit = future.result()
+                hits += cache_hit
+                print(f"  {name}: {size / 1024:.1f} KB critical CSS{' (cached)' if cache_hit else ''}")
+            except Exception as e:
+                print(f"  Error: {e}")
+
+    print(f"\nInlined critical CSS into {len(html_files)} pages ({hits} from cache)")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Inline per-page critical CSS")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--css", default="css/styles.css", help="Stylesheet relative to root")
+    parser.add_argument("--cache-dir", default=".cache/critical-css", help="Cache directory relative to root")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    process_all(root_dir, root_dir / args.css, root_dir / args.cache_dir, args.workers)
 
 
 if __name__ == "__main__":
-    extract_critical_css()
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Page Fetchers
+Where the scraper gets its HTML from: the live site over HTTP, or the
+checked-in page tree on disk so the extraction pipeline can run offline,
+deterministically and in parallel.
+"""
+
+import mimetypes
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+
+import requests
+
+from redirects import MAX_HOPS, REDIRECTS_FILE, read_redirects_file
+
+
+class FetchResult:
+    """One fetched document; url is where it was found after any redirects."""
+
+    __slots__ = ("url", "text", "content_type", "status", "redirects")
+
+    def __init__(self, url: str, text: str, content_type: str, status: int = 200,
+                 redirects: Optional[List[Tuple[int, str, str]]] = None):
+        self.url = url
+        self.text = text
+        self.content_type = content_type
+        self.status = status
+        # (status, from, to) for each hop, in the order they were followed
+        self.redirects = redirects or []
+
+
+class HttpFetcher:
+    """Fetch pages from the live site with one shared session."""
+
+    remote = True
+    # Be polite to the origin; workers would multiply the request rate
+    parallel = False
+
+    def __init__(self, user_agent: str, timeout: float = 30, delay: float = 1.0):
+        self.timeout = timeout
+        # Seconds to wait between requests
+        self.delay = delay
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+
+    def fetch(self, url: str) -> FetchResult:
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        # requests follows redirects itself; each response in the history is one hop
+        hops = [(hop.status_code, hop.url, following.url)
+                for hop, following in zip(response.history, response.history[1:] + [response])]
+        return FetchResult(response.url, response.text,
+                           response.headers.get("content-type", "").lower(), response.status_code, hops)
+
+
+class LocalFetcher:
+    """Serve site URLs from the page tree on disk (https://host/tours.html -> root/tours.html).
+
+    Like the static host, a _redirects file in the root redirects paths that
+    have no file of their own.
+    """
+
+    remote = False
+    delay = 0.0
+    parallel = True
+
+    def __init__(self, root_dir: str = "."):
+        self.root_dir = Path(root_dir).resolve()
+        redirects_file = self.root_dir / REDIRECTS_FILE
+        # source path -> (target, status)
+        self.redirects: Dict[str, Tuple[str, int]] = (
+            read_redirects_file(redirects_file) if redirects_file.is_file() else {})
+
+    def resolve(self, url: str) -> Optional[Path]:
+        """The file that would be served for url, or None."""
+        path = unquote(urlparse(url).path).lstrip("/")
+        if not path or path.endswith("/"):
+            candidates = [f"{path}index.html"]
+        else:
+            candidates = [path, f"{path}.html", f"{path}/index.html",
+                          # The generator flattens nested pages: blog/post.html -> blog-post.html
+                          path.replace("/", "-")]
+        for candidate in candidates:
+            file_path = (self.root_dir / candidate).resolve()
+            # Never serve anything outside the site root
+            if self.root_dir in file_path.parents and file_path.is_file():
+                return file_path
+        return None
+
+    def fetch(self, url: str) -> FetchResult:
+        hops = []
+        file_path = self.resolve(url)
+        while file_path is None and len(hops) < MAX_HOPS:
+            rule = self.redirects.get(urlparse(url).path)
+            if rule is None:
+                break
+            target = urljoin(url, rule[0])
+            hops.append((rule[1], url, target))
+            url = target
+            file_path = self.resolve(url)
+        if file_path is None:
+            raise FileNotFoundError(f"No local file for {url}")
+        content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        return FetchResult(url, file_path.read_text(encoding="utf-8"), content_type, redirects=hops)
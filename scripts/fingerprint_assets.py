@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Asset Fingerprinting
+Builds the deploy tree: copies images, stylesheets and scripts under
+content-hashed names, rewrites every reference to them in one pass per
+file, and writes a manifest plus cache headers. A changed asset gets a new
+name, so everything else can be cached forever and skipped on upload.
+"""
+
+import argparse
+import gzip
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+from build_manifest import BuildManifest
+from multi_replace import MultiReplacer
+
+# Site-relative globs of fingerprinted assets
+ASSET_GLOBS = ["assets/img/*", "src/styles/*.css", "css/*.css", "js/*.js"]
+# Assets that can reference other assets and are rewritten before hashing
+TEXT_ASSET_EXTENSIONS = {".css", ".js"}
+# Served at stable names, with references rewritten
+PAGE_GLOBS = ["*.html", "manifest.webmanifest", "robots.txt", "sitemap*.xml", "_redirects"]
+# Pages the generator also gzips (sitemap.xml, and its shards past 50k URLs);
+# the copies are recompressed from the rewritten page so they always agree
+GZIP_PAGE_GLOBS = ["sitemap*.xml"]
+
+HASH_LENGTH = 10
+MANIFEST_NAME = "asset-manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def hashed_name(rel: str, content: bytes) -> str:
+    """assets/img/hero.jpg -> assets/img/hero.<hash>.jpg"""
+    path = Path(rel)
+    digest = BuildManifest.hash_content(content)[:HASH_LENGTH]
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def collect_assets(root_dir: Path) -> List[str]:
+    """Site-relative paths of every asset to fingerprint."""
+    assets = set()
+    for pattern in ASSET_GLOBS:
+        for path in root_dir.glob(pattern):
+            if path.is_file():
+                assets.add(path.relative_to(root_dir).as_posix())
+    return sorted(assets)
+
+
+def dependency_order(root_dir: Path, assets: List[str]) -> List[str]:
+    """Order assets so each comes after every asset it references.
+
+    A stylesheet's hash must cover the hashed names of what it imports, or a
+    change to an imported file would be served under the old, cached name.
+    """
+    texts = {
+        rel: (root_dir / rel).read_text(encoding="utf-8", errors="ignore")
+        for rel in assets if Path(rel).suffix in TEXT_ASSET_EXTENSIONS
+    }
+    ordered: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(rel: str):
+        if state.get(rel) == "done":
+            return
+        if state.get(rel) == "visiting":
+            raise ValueError(f"Circular asset reference through {rel}")
+        state[rel] = "visiting"
+        text = texts.get(rel)
+        if text:
+            for dep in texts:
+                if dep != rel and dep in text:
+                    visit(dep)
+        state[rel] = "done"
+        ordered.append(rel)
+
+    # Binary assets have no references, so they go first in one run
+    for rel in assets:
+        if rel not in texts:
+            visit(rel)
+    for rel in texts:
+        visit(rel)
+    return ordered
+
+
+def _write_if_changed(path: Path, content: bytes) -> bool:
+    """Write only when the bytes differ, so unchanged files keep their mtime."""
+    if path.exists() and path.stat().st_size == len(content) and path.read_bytes() == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return True
+
+
+def fingerprint(root_dir: Path, output_dir: Path) -> Dict:
+    """Build the fingerprinted deploy tree; returns the manifest and stats."""
+    assets = dependency_order(root_dir, collect_assets(root_dir))
+    mapping: Dict[str, str] = {}
+    stats = {"assets": len(assets), "uploaded": 0, "pages": 0, "pagesChanged": 0}
+
+    for rel in assets:
+        source = root_dir / rel
+        target_rel = None
+        if Path(rel).suffix in TEXT_ASSET_EXTENSIONS:
+            # Everything this file references is already hashed
+            text = source.read_text(encoding="utf-8")
+            text, _ = MultiReplacer(mapping).replace(text)
+            content = text.encode("utf-8")
+            target_rel = hashed_name(rel, content)
+            if _write_if_changed(output_dir / target_rel, content):
+                stats["uploaded"] += 1
+        else:
+            content = source.read_bytes()
+            target_rel = hashed_name(rel, content)
+            target = output_dir / target_rel
+            # Same name means same bytes; nothing to copy or upload
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, target)
+                stats["uploaded"] += 1
+        mapping[rel] = target_rel
+
+    replacer = MultiReplacer(mapping)
+    for pattern in PAGE_GLOBS:
+        for page in sorted(root_dir.glob(pattern)):
+            text, _ = replacer.replace(page.read_text(encoding="utf-8"))
+            stats["pages"] += 1
+            if _write_if_changed(output_dir / page.name, text.encode("utf-8")):
+                stats["pagesChanged"] += 1
+            if any(page.match(glob) for glob in GZIP_PAGE_GLOBS) and page.with_name(page.name + ".gz").exists():
+                # mtime=0 keeps the bytes stable, so an unchanged page isn't re-uploaded
+                _write_if_changed(output_dir / f"{page.name}.gz", gzip.compress(text.encode("utf-8"), mtime=0))
+
+    manifest = {"hashLength": HASH_LENGTH, "assets": mapping}
+    with open(output_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    write_headers(output_dir, mapping)
+    return {"manifest": manifest, "stats": stats}
+
+
+def write_headers(output_dir: Path, mapping: Dict[str, str]):
+    """Netlify _headers: hashed assets never change, so let the CDN keep them."""
+    directories = sorted({Path(rel).parent.as_posix() for rel in mapping.values()})
+    lines = []
+    for directory in directories:
+        lines += [f"/{directory}/*", f"  Cache-Control: {IMMUTABLE}", ""]
+    _write_if_changed(output_dir / "_headers", "\n".join(lines).encode("utf-8"))
+
+
+def prune(output_dir: Path, mapping: Dict[str, str]) -> int:
+    """Remove hashed files from earlier builds that the current manifest no longer uses."""
+    live = set(mapping.values())
+    removed = 0
+    for directory in sorted({Path(rel).parent for rel in live}):
+        for path in (output_dir / directory).iterdir():
+            rel = path.relative_to(output_dir).as_posix()
+            if path.is_file() and rel not in live:
+                path.unlink()
+                removed += 1
+    return removed
+
+
+def main():
+    """Fingerprint assets into the deploy directory."""
+    parser = argparse.ArgumentParser(description="Copy assets under content-hashed names for deployment")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--output", help="Deploy directory (default: <root>/dist)")
+    parser.add_argument("--prune", action="store_true", help="Delete hashed files from earlier builds")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    output_dir = Path(args.output) if args.output else root_dir / "dist"
+    if output_dir.resolve() == root_dir.resolve():
+        parser.error("--output must differ from the site root")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    result = fingerprint(root_dir, output_dir)
+    stats = result["stats"]
+    print(f"Fingerprinted {stats['assets']} assets ({stats['uploaded']} new, "
+          f"{stats['assets'] - stats['uploaded']} unchanged)")
+    print(f"Rewrote references in {stats['pages']} files ({stats['pagesChanged']} changed)")
+    print(f"Wrote {output_dir / MANIFEST_NAME}")
+
+    if args.prune:
+        print(f"Pruned {prune(output_dir, result['manifest']['assets'])} stale hashed files")
+
+
+if __name__ == "__main__":
+    main()
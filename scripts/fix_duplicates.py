@@ -4,73 +4,67 @@ Script to fix duplicate theme-toggle buttons and indentation issues.
 """
 
 import re
-from pathlib import Path
+
+from rewrite_engine import RewriteRule, apply_rules, rewrite_file, run_cli
+
+THEME_TOGGLE = '<button class="theme-toggle" aria-label="Toggle theme" aria-pressed="false" id="theme-toggle">'
+DUPLICATE_ATTRS = '" aria-label="Toggle theme" aria-pressed="false" id="theme-toggle">'
+
+THEME_TOGGLE_RULES = [
+    # Malformed theme-toggle button with its attributes repeated
+    RewriteRule(
+        "theme-toggle",
+        re.escape(THEME_TOGGLE + DUPLICATE_ATTRS),
+        THEME_TOGGLE,
+        trigger=DUPLICATE_ATTRS
+    ),
+]
+
+# Literal prefix first so the scan is a fast substring search; the lookbehind
+# then requires one more whitespace character (the old leading (\s+) group)
+FOOTER_INDENTATION_RULES = [
+    RewriteRule(
+        "footer-indentation",
+        ' ' * 16 + r'(?<=\s{17})<div>',
+        '        <div>',
+        trigger=' ' * 16 + '<div>'
+    ),
+]
+
+HEADER_ACTIONS_INDENTATION_RULES = [
+    RewriteRule(
+        "header-actions-indentation",
+        ' ' * 16 + r'(?<=\s{17})<div class="header__actions">',
+        '        <div class="header__actions">',
+        trigger=' ' * 16 + '<div class="header__actions">'
+    ),
+]
+
+RULES = THEME_TOGGLE_RULES + FOOTER_INDENTATION_RULES + HEADER_ACTIONS_INDENTATION_RULES
+
 
 def fix_duplicate_theme_toggle(content):
     """Fix duplicate theme-toggle button attributes."""
-    # Fix malformed theme-toggle button
-    pattern = r'<button class="theme-toggle" aria-label="Toggle theme" aria-pressed="false" id="theme-toggle">" aria-label="Toggle theme" aria-pressed="false" id="theme-toggle">'
-    replacement = '<button class="theme-toggle" aria-label="Toggle theme" aria-pressed="false" id="theme-toggle">'
-    content = re.sub(pattern, replacement, content)
-    return content
+    return apply_rules(content, THEME_TOGGLE_RULES)[0]
 
 def fix_footer_indentation(content):
     """Fix extra indentation in footer sections."""
-    # Fix extra indentation before footer divs
-    pattern = r'(\s+)                <div>'
-    replacement = r'\1        <div>'
-    content = re.sub(pattern, replacement, content)
-    return content
+    return apply_rules(content, FOOTER_INDENTATION_RULES)[0]
 
 def fix_header_actions_indentation(content):
     """Fix extra indentation in header actions."""
-    # Fix extra indentation before header__actions
-    pattern = r'(\s+)                <div class="header__actions">'
-    replacement = r'\1        <div class="header__actions">'
-    content = re.sub(pattern, replacement, content)
-    return content
+    return apply_rules(content, HEADER_ACTIONS_INDENTATION_RULES)[0]
 
 def process_html_file(file_path):
     """Process a single HTML file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Fix duplicate theme-toggle
-        content = fix_duplicate_theme_toggle(content)
-        
-        # Fix footer indentation
-        content = fix_footer_indentation(content)
-        
-        # Fix header actions indentation
-        content = fix_header_actions_indentation(content)
-        
-        # Only write if content changed
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
-    except Exception as e:
-        print(f"Error processing {file_path}: {e}")
-        return False
+    result = rewrite_file(file_path, RULES)
+    if result["error"]:
+        print(f"Error processing {file_path}: {result['error']}")
+    return result["changed"]
 
 def main():
     """Main function to process all HTML files."""
-    base_dir = Path(__file__).parent.parent
-    html_files = list(base_dir.glob('*.html'))
-    
-    print(f"Found {len(html_files)} HTML files")
-    
-    fixed_count = 0
-    for html_file in html_files:
-        if process_html_file(html_file):
-            print(f"Fixed: {html_file.name}")
-            fixed_count += 1
-    
-    print(f"\nFixed {fixed_count} files")
+    run_cli(RULES, "Fix duplicate theme-toggle buttons and indentation")
 
 if __name__ == '__main__':
     main()
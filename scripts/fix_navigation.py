@@ -3,9 +3,10 @@
 Script to standardize header and footer navigation across all HTML files.
 """
 
-import os
 import re
-from pathlib import Path
+
+from redirects import LEGACY_REDIRECTS
+from rewrite_engine import RewriteRule, apply_rules, rewrite_file, run_cli
 
 # Standard header navigation (full dropdown version)
 STANDARD_HEADER_NAV = '''          <ul class="nav__list">
@@ -117,114 +118,99 @@ STANDARD_FOOTER_LEGAL = '''        <div>
         </div>'''
 
 
-def fix_header_navigation(content):
-    """Replace simple navigation with standard dropdown navigation."""
-    # Pattern to match simple navigation
-    simple_nav_pattern = r'<ul class="nav__list">\s*<li class="nav__item"><a href="/" class="nav__link">Home</a></li>\s*<li class="nav__item"><a href="/tours/" class="nav__link">Tours</a></li>\s*<li class="nav__item"><a href="/about/" class="nav__link">About</a></li>\s*<li class="nav__item"><a href="/contact\.html" class="nav__link">Contact</a></li>\s*</ul>'
-    
-    if re.search(simple_nav_pattern, content):
-        content = re.sub(simple_nav_pattern, STANDARD_HEADER_NAV, content)
-    
-    # Also handle variations
-    simple_nav_pattern2 = r'<ul class="nav__list">.*?<li class="nav__item"><a href="/" class="nav__link">Home</a></li>.*?<li class="nav__item"><a href="/tours/" class="nav__link">Tours</a></li>.*?<li class="nav__item"><a href="/about/" class="nav__link">About</a></li>.*?<li class="nav__item"><a href="/contact\.html" class="nav__link">Contact</a></li>.*?</ul>'
-    content = re.sub(simple_nav_pattern2, STANDARD_HEADER_NAV, content, flags=re.DOTALL)
-    
-    # Fix header actions - add if missing, or fix contact link
-    if '<div class="header__actions">' not in content:
-        # Check if there's a theme-toggle button that needs header__actions wrapper
-        theme_toggle_pattern = r'(<button class="theme-toggle[^>]*>.*?</button>\s*</div>\s*</div>\s*</header>)'
-        if re.search(theme_toggle_pattern, content, re.DOTALL):
-            # Insert header__actions before theme-toggle
-            content = re.sub(
-                r'(<button class="theme-toggle)',
-                STANDARD_HEADER_ACTIONS.replace('<button class="theme-toggle', r'\1'),
-                content,
-                count=1
-            )
-    
-    # Fix contact link in header actions
-    content = re.sub(
+FOOTER_SECTIONS = {
+    "Tours": STANDARD_FOOTER_TOURS,
+    "Company": STANDARD_FOOTER_COMPANY,
+    "Legal": STANDARD_FOOTER_LEGAL,
+}
+
+# Legacy link targets and their canonical pages (shared with the generator's redirect map)
+LINK_REPLACEMENTS = LEGACY_REDIRECTS
+
+# Anything up to the next </ul>, without scanning past it
+UNTIL_UL_CLOSE = r'(?:[^<]|<(?!/ul>))*?'
+
+
+def _footer_section(match):
+    # The match starts at <div>, after the page's own indentation
+    return FOOTER_SECTIONS[match.group(1)].lstrip()
+
+
+def _canonical_link(match):
+    return f'href="{LINK_REPLACEMENTS[match.group(1)]}"'
+
+
+HEADER_RULES = [
+    # Simple four-link navigation -> standard dropdown navigation
+    RewriteRule(
+        "header-nav",
+        r'<ul class="nav__list">' + UNTIL_UL_CLOSE +
+        r'<li class="nav__item"><a href="/" class="nav__link">Home</a></li>' + UNTIL_UL_CLOSE +
+        r'<li class="nav__item"><a href="/tours/" class="nav__link">Tours</a></li>' + UNTIL_UL_CLOSE +
+        r'<li class="nav__item"><a href="/about/" class="nav__link">About</a></li>' + UNTIL_UL_CLOSE +
+        r'<li class="nav__item"><a href="/contact\.html" class="nav__link">Contact</a></li>' + UNTIL_UL_CLOSE +
+        r'</ul>',
+        STANDARD_HEADER_NAV,
+        trigger='<a href="/tours/" class="nav__link">Tours</a>'
+    ),
+    # Add header__actions in front of a theme-toggle that closes the header
+    RewriteRule(
+        "header-actions",
+        r'(<button class="theme-toggle)(?=[^>]*>(?:[^<]|<(?!/?button\b))*</button>\s*</div>\s*</div>\s*</header>)',
+        STANDARD_HEADER_ACTIONS.replace('<button class="theme-toggle', r'\1'),
+        trigger='<button class="theme-toggle',
+        unless='<div class="header__actions">',
+        count=1
+    ),
+    RewriteRule(
+        "header-contact-link",
         r'<a href="/contact\.html" class="btn btn--primary btn--small">Contact Us</a>',
         '<a href="/contactus.html" class="btn btn--primary btn--small">Contact Us</a>',
-        content
-    )
-    
-    return content
+        trigger='<a href="/contact.html" class="btn'
+    ),
+]
+
+FOOTER_RULES = [
+    # Tours / Company / Legal sections -> standard lists, in one scan
+    RewriteRule(
+        "footer-sections",
+        r'<div>\s*<h3 class="footer__section-title">(Tours|Company|Legal)</h3>\s*<ul class="footer__list">' +
+        UNTIL_UL_CLOSE + r'</ul>\s*</div>',
+        _footer_section,
+        trigger='<h3 class="footer__section-title">'
+    ),
+    RewriteRule(
+        "canonical-links",
+        r'href="(' + "|".join(re.escape(href) for href in LINK_REPLACEMENTS) + r')"',
+        _canonical_link,
+        trigger='href="/'
+    ),
+]
+
+RULES = HEADER_RULES + FOOTER_RULES
+
+
+def fix_header_navigation(content):
+    """Replace simple navigation with standard dropdown navigation."""
+    return apply_rules(content, HEADER_RULES)[0]
 
 
 def fix_footer_navigation(content):
     """Standardize footer navigation links."""
-    # Fix Tours section
-    tours_pattern = r'<div>\s*<h3 class="footer__section-title">Tours</h3>\s*<ul class="footer__list">.*?</ul>\s*</div>'
-    content = re.sub(tours_pattern, STANDARD_FOOTER_TOURS, content, flags=re.DOTALL)
-    
-    # Fix Company section
-    company_pattern = r'<div>\s*<h3 class="footer__section-title">Company</h3>\s*<ul class="footer__list">.*?</ul>\s*</div>'
-    content = re.sub(company_pattern, STANDARD_FOOTER_COMPANY, content, flags=re.DOTALL)
-    
-    # Fix Legal section
-    legal_pattern = r'<div>\s*<h3 class="footer__section-title">Legal</h3>\s*<ul class="footer__list">.*?</ul>\s*</div>'
-    content = re.sub(legal_pattern, STANDARD_FOOTER_LEGAL, content, flags=re.DOTALL)
-    
-    # Fix individual links
-    replacements = [
-        (r'href="/tours/"', 'href="/tours.html"'),
-        (r'href="/about/"', 'href="/about.html"'),
-        (r'href="/contact\.html"', 'href="/contactus.html"'),
-        (r'href="/faq\.html"', 'href="/FAQ.html"'),
-        (r'href="/FAQ\.html"', 'href="/FAQ.html"'),
-        (r'href="/team\.html"', 'href="/the-team.html"'),
-        (r'href="/terms\.html"', 'href="/privacy-terms-refund-pricing.html"'),
-        (r'href="/privacy\.html"', 'href="/privacy-terms-refund-pricing.html"'),
-        (r'href="/tours/motorcycle\.html"', 'href="/tours.html"'),
-        (r'href="/tours/self-drive\.html"', 'href="/tours.html"'),
-    ]
-    
-    for pattern, replacement in replacements:
-        content = re.sub(pattern, replacement, content)
-    
-    return content
+    return apply_rules(content, FOOTER_RULES)[0]
 
 
 def process_html_file(file_path):
     """Process a single HTML file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Fix header navigation
-        content = fix_header_navigation(content)
-        
-        # Fix footer navigation
-        content = fix_footer_navigation(content)
-        
-        # Only write if content changed
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
-    except Exception as e:
-        print(f"Error processing {file_path}: {e}")
-        return False
+    result = rewrite_file(file_path, RULES)
+    if result["error"]:
+        print(f"Error processing {file_path}: {result['error']}")
+    return result["changed"]
 
 
 def main():
     """Main function to process all HTML files."""
-    base_dir = Path(__file__).parent.parent
-    html_files = list(base_dir.glob('*.html'))
-    
-    print(f"Found {len(html_files)} HTML files")
-    
-    fixed_count = 0
-    for html_file in html_files:
-        if process_html_file(html_file):
-            print(f"Fixed: {html_file.name}")
-            fixed_count += 1
-    
-    print(f"\nFixed {fixed_count} files")
+    run_cli(RULES, "Standardize header and footer navigation")
 
 
 if __name__ == '__main__':
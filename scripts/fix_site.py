@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Site Fixer
+Runs every fix_* rewrite rule (navigation, footer, theme-toggle, indentation)
+over each HTML file in a single pass.
+"""
+
+import fix_duplicates
+import fix_navigation
+from rewrite_engine import run_cli
+
+# Order matters: inserting header__actions can duplicate the theme-toggle
+# attributes, which the theme-toggle rule then cleans up
+RULES = fix_navigation.RULES + fix_duplicates.RULES
+
+
+def main():
+    """Apply all site fixes."""
+    run_cli(RULES, "Apply all navigation, footer and markup fixes in one pass")
+
+
+if __name__ == "__main__":
+    main()
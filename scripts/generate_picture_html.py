@@ -5,7 +5,7 @@ Generate optimized <picture> element HTML with AVIF → WebP → JPEG fallbacks.
 
 from pathlib import Path
 
-def generate_picture_html(base_name: str, alt_text: str, sizes: str = "(max-width: 640px) 100vw, (max-width: 1024px) 50vw, 33vw", loading: str = "lazy", class_name: str = "") -> str:
+def generate_picture_html(base_name: str, alt_text: str, sizes: str = "(max-width: 640px) 100vw, (max-width: 1024px) 50vw, 33vw", loading: str = "lazy", class_name: str = "", width: int = None, height: int = None, breakpoints: list = None, fallback_src: str = None) -> str:
     """
     Generate a <picture> element with AVIF, WebP, and JPEG fallbacks.
     
@@ -15,26 +15,35 @@ def generate_picture_html(base_name: str, alt_text: str, sizes: str = "(max-widt
         sizes: Sizes attribute for responsive images
         loading: Loading attribute (lazy/eager)
         class_name: CSS class name for the img tag
+        width: Intrinsic image width, emitted so the browser can reserve space
+        height: Intrinsic image height
+        breakpoints: Widths with -{bp}w derivatives (default: 320-1280); an empty
+            list uses the full-size AVIF/WebP files instead
+        fallback_src: Path for the <img> fallback (default: /assets/img/{base_name}.jpeg)
     
     Returns:
         HTML string with <picture> element
     """
-    breakpoints = [320, 640, 768, 1024, 1280]
+    if breakpoints is None:
+        breakpoints = [320, 640, 768, 1024, 1280]
+    if fallback_src is None:
+        fallback_src = f"/assets/img/{base_name}.jpeg"
     
     # Generate AVIF srcset
     avif_srcset = []
     for bp in breakpoints:
         avif_srcset.append(f"/assets/img/{base_name}-{bp}w.avif {bp}w")
-    avif_srcset_str = ",\n        ".join(avif_srcset)
+    avif_srcset_str = ",\n        ".join(avif_srcset) or f"/assets/img/{base_name}.avif"
     
     # Generate WebP srcset
     webp_srcset = []
     for bp in breakpoints:
         webp_srcset.append(f"/assets/img/{base_name}-{bp}w.webp {bp}w")
-    webp_srcset_str = ",\n        ".join(webp_srcset)
+    webp_srcset_str = ",\n        ".join(webp_srcset) or f"/assets/img/{base_name}.webp"
     
     class_attr = f' class="{class_name}"' if class_name else ""
     loading_attr = f' loading="{loading}"' if loading else ""
+    size_attrs = f' width="{width}" height="{height}"' if width and height else ""
     
     html = f'''<picture>
       <source
@@ -46,8 +55,8 @@ def generate_picture_html(base_name: str, alt_text: str, sizes: str = "(max-widt
         srcset="{webp_srcset_str}"
         sizes="{sizes}">
       <img
-        src="/assets/img/{base_name}.jpeg"
-        alt="{alt_text}"{class_attr}{loading_attr}>
+        src="{fallback_src}"
+        alt="{alt_text}"{class_attr}{loading_attr}{size_attrs}>
     </picture>'''
     
     return html
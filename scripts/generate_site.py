@@ -4,22 +4,44 @@ Static Site Generator
 Generates HTML pages from JSON content using Jinja2 templates.
 """
 
-import json
+import argparse
 import os
+import sys
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+from asset_manifest import AssetManifest
+from build_manifest import BuildManifest
+from build_report import build_report
+from content_store import open_store
+from entity_store import EntityStore
+import instrumentation
+from extract_critical_css import process_all as process_critical_css
+from image_dimensions import inject_dimensions
+from instrumentation import Metrics
+from lcp_preload import prioritize_images
+from partials import load_partials, page_path, stitch_partials
+from records import Page, from_dicts, load_json, load_pages
+from redirects import RedirectMap
+from sitemap_writer import SitemapWriter
+from url_canon import SITE_URL, canonical_url
+
+CURRENT_YEAR = "2024"
+
 
 class SiteGenerator:
     """Generate static HTML site from JSON content."""
     
-    def __init__(self, content_dir: str = "content", output_dir: str = ".", templates_dir: str = "templates"):
+    def __init__(self, content_dir: str = "content", output_dir: str = ".", templates_dir: str = "templates",
+                 metrics: Optional[Metrics] = None):
         self.content_dir = Path(content_dir)
         self.output_dir = Path(output_dir)
         self.templates_dir = Path(templates_dir)
+        self.metrics = metrics or Metrics("generate_site")
         
         # Setup Jinja2
         self.env = Environment(
@@ -27,10 +49,35 @@ class SiteGenerator:
             autoescape=select_autoescape(['html', 'xml'])
         )
         
-        # Load content
-        self.content = self._load_json("content.json")
-        self.entities = self._load_json("entities.json")
-        self.sitemap_data = self._load_json("sitemap.json")
+        # Shared header/footer, rendered once per build
+        self.partials = load_partials(self.templates_dir / "partials", {"currentYear": CURRENT_YEAR})
+        self.env.globals["partials"] = self.partials
+        
+        # Load content, from the SQLite content store when there is one
+        store = open_store(self.content_dir)
+        if store:
+            with store:
+                self.pages = from_dicts(Page, store.pages(), f"{store.path.name}: pages")
+                self.entities = store.entities()
+                self.sitemap_data = store.sitemap()
+        else:
+            self.pages = load_pages(self.content_dir / "content.json")
+            self.entities = EntityStore.load(self.content_dir / "entities.json")
+            self.sitemap_data = self._load_json("sitemap.json")
+        self.pages_by_url = {}
+        for page in self.pages:
+            self.pages_by_url.setdefault(page.url, page)
+        
+        # Redirects the crawler followed plus legacy URLs; a URL with a page of its own is never redirected
+        self.redirects = RedirectMap(self.sitemap_data.get("redirects", {}))
+        for url in self.pages_by_url:
+            self.redirects.discard(url)
+        
+        # Content hashes of the previous build, for incremental writes and lastmod
+        self.manifest = BuildManifest(self.content_dir / "build-manifest.json")
+        
+        # Image assets and their cached pixel dimensions
+        self.assets = AssetManifest(str(self.content_dir), str(self.output_dir))
         
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
@@ -41,28 +88,19 @@ class SiteGenerator:
         if not filepath.exists():
             return {}
         
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json(filepath)
     
-    def _get_page_by_url(self, url: str) -> Optional[Dict]:
+    def _get_page_by_url(self, url: str) -> Optional[Page]:
         """Get page data by URL."""
-        pages = self.content.get("pages", [])
-        for page in pages:
-            if page.get("url") == url:
-                return page
-        return None
+        return self.pages_by_url.get(url)
     
     def _get_tour_by_url(self, url: str) -> Optional[Dict]:
         """Get tour entity by URL."""
-        tours = self.entities.get("tours", [])
-        for tour in tours:
-            if tour.get("url") == url:
-                return tour
-        return None
+        return self.entities.get("tours", url)
     
-    def _build_breadcrumbs(self, page: Dict) -> List[Dict]:
+    def _build_breadcrumbs(self, page: Page) -> List[Dict]:
         """Build breadcrumb trail for a page."""
-        url = page.get("url", "")
+        url = page.url
         parsed = urlparse(url)
         path_parts = [p for p in parsed.path.split("/") if p]
         
@@ -72,10 +110,10 @@ class SiteGenerator:
         for i, part in enumerate(path_parts):
             current_path += f"/{part}"
             # Try to find page title
-            page_data = self._get_page_by_url(f"https://www.motorover.in{current_path}")
+            page_data = self._get_page_by_url(canonical_url(f"{SITE_URL}{current_path}"))
             name = part.replace("-", " ").title()
-            if page_data and page_data.get("title"):
-                name = page_data["title"]
+            if page_data and page_data.title:
+                name = page_data.title
             
             breadcrumbs.append({
                 "name": name,
@@ -84,10 +122,10 @@ class SiteGenerator:
         
         return breadcrumbs
     
-    def _determine_template(self, page: Dict) -> str:
+    def _determine_template(self, page: Page) -> str:
         """Determine which template to use for a page."""
-        url = page.get("url", "").lower()
-        slug = page.get("slug", "").lower()
+        url = page.url.lower()
+        slug = page.slug.lower()
         
         if slug == "index" or url.endswith("/") or url.endswith("/index.html"):
             return "home.html"
@@ -106,23 +144,24 @@ class SiteGenerator:
         else:
             return "base.html"
     
-    def _get_template_context(self, page: Dict) -> Dict:
+    def _get_template_context(self, page: Page) -> Dict:
         """Build template context for a page."""
-        url = page.get("url", "")
-        slug = page.get("slug", "")
+        url = page.url
+        slug = page.slug
         
+        # Templates see the records in their content.json form
         context = {
             "url": url,
             "slug": slug,
-            "title": page.get("title", ""),
-            "metaDescription": page.get("metaDescription", ""),
-            "canonical": page.get("canonical", url),
-            "lang": page.get("lang", "en-IN"),
-            "headings": page.get("headings", {}),
-            "contentBlocks": page.get("contentBlocks", []),
-            "images": page.get("images", []),
-            "forms": page.get("forms", []),
-            "currentYear": "2024"
+            "title": page.title,
+            "metaDescription": page.meta_description,
+            "canonical": page.canonical or url,
+            "lang": page.lang,
+            "headings": page.headings,
+            "contentBlocks": [block.to_dict() for block in page.content_blocks],
+            "images": [image.to_dict() for image in page.images],
+            "forms": page.forms,
+            "currentYear": CURRENT_YEAR
         }
         
         # Add breadcrumbs for non-home pages
@@ -136,22 +175,22 @@ class SiteGenerator:
         
         # Add FAQs if FAQ page
         if "faq" in url.lower():
-            context["faqs"] = self.entities.get("faqs", [])
+            context["faqs"] = self.entities.items("faqs")
         
         # Add team if team page
         if "team" in url.lower():
-            context["team"] = self.entities.get("team", [])
+            context["team"] = self.entities.items("team")
         
         # Add contact info if contact page
         if "contact" in url.lower():
-            contact_list = self.entities.get("contact", [])
+            contact_list = self.entities.items("contact")
             if contact_list:
                 context["contactInfo"] = contact_list[0]
         
         # Add featured tours for homepage
         if slug == "index":
-            context["featuredTours"] = self.entities.get("tours", [])[:6]
-            context["testimonials"] = self.entities.get("testimonials", [])[:4]
+            context["featuredTours"] = self.entities.items("tours")[:6]
+            context["testimonials"] = self.entities.items("testimonials")[:4]
             # Add why us section
             context["whyUs"] = [
                 {"title": "Expert Guides", "description": "Experienced local guides who know every route."},
@@ -162,7 +201,7 @@ class SiteGenerator:
         
         return context
     
-    def generate_page(self, page: Dict) -> str:
+    def generate_page(self, page: Page) -> str:
         """Generate HTML for a single page."""
         template_name = self._determine_template(page)
         template = self.env.get_template(template_name)
@@ -170,12 +209,25 @@ class SiteGenerator:
         context = self._get_template_context(page)
         html = template.render(**context)
         
+        # Stitch in the shared header/footer so nav changes are a single edit
+        html = stitch_partials(html, self.partials, page_path(self._get_output_path(page).name))
+        
+        # Link straight to where redirected URLs end up, saving visitors the round trip
+        html, rewritten = self.redirects.rewrite_links(html, page.url)
+        self.metrics.count("links_unredirected", rewritten)
+        
+        # Reserve image space up front to avoid layout shift
+        html = inject_dimensions(html, self.assets)
+        
+        # Preload the hero image and lazy-load everything else
+        html = prioritize_images(html, self.assets, page)
+        
         return html
     
-    def _get_output_path(self, page: Dict) -> Path:
+    def _get_output_path(self, page: Page) -> Path:
         """Determine output file path for a page."""
-        slug = page.get("slug", "index")
-        url = page.get("url", "")
+        slug = page.slug or "index"
+        url = page.url
         
         # All HTML files go to root directory
         if slug == "index" or url.endswith("/") or url.endswith("/index.html"):
@@ -186,38 +238,67 @@ class SiteGenerator:
     
     def generate_all(self):
         """Generate all pages."""
-        pages = self.content.get("pages", [])
+        pages = self.pages
         
         print(f"Generating {len(pages)} pages...")
+        unchanged = 0
         
         for i, page in enumerate(pages, 1):
-            print(f"[{i}/{len(pages)}] Generating: {page.get('slug', 'unknown')}")
+            print(f"[{i}/{len(pages)}] Generating: {page.slug or 'unknown'}")
             
             try:
-                html = self.generate_page(page)
+                with self.metrics.span("page", slug=page.slug or "unknown"):
+                    html = self.generate_page(page)
                 output_path = self._get_output_path(page)
                 
+                # Skip unchanged pages so their mtime and lastmod stay stable
+                name = output_path.relative_to(self.output_dir).as_posix()
+                if not self.manifest.record(name, html) and output_path.exists():
+                    unchanged += 1
+                    self.metrics.count("pages_unchanged")
+                    continue
+                
                 # Ensure parent directory exists
                 output_path.parent.mkdir(parents=True, exist_ok=True)
                 
                 # Write file
                 with open(output_path, "w", encoding="utf-8") as f:
                     f.write(html)
+                self.metrics.count("pages_written")
+                self.metrics.count("bytes_written", len(html.encode("utf-8")))
                 
             except Exception as e:
-                print(f"  Error generating {page.get('slug')}: {e}")
+                print(f"  Error generating {page.slug}: {e}")
+                self.metrics.count("page_errors")
+        
+        self.manifest.save()
+        self.assets.save()
         
         print(f"\nSite generation complete!")
         print(f"  Pages generated: {len(pages)}")
+        print(f"  Unchanged (skipped): {unchanged}")
     
-    def generate_sitemap_xml(self):
-        """Generate sitemap.xml."""
-        urls = self.sitemap_data.get("urls", [])
-        
-        sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        sitemap += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        
-        for url in urls:
+    def inline_critical_css(self, css_file: str = "css/styles.css"):
+        """Inline per-page critical CSS into the generated pages."""
+        process_critical_css(
+            self.output_dir,
+            self.output_dir / css_file,
+            self.output_dir / ".cache" / "critical-css"
+        )
+    
+    def generate_build_report(self, budgets_path: Optional[str] = None) -> Dict:
+        """Record page weight for this build and check it against budgets."""
+        return build_report(
+            output_dir=str(self.output_dir),
+            content_dir=str(self.content_dir),
+            report_path=str(self.content_dir / "build-report.json"),
+            budgets_path=budgets_path
+        )
+    
+    def _sitemap_entries(self):
+        """Yield (loc, lastmod, priority) for every sitemap URL."""
+        seen = set()
+        for url in self.sitemap_data.get("urls", []):
             # Convert to relative path
             parsed = urlparse(url)
             path = parsed.path
@@ -226,19 +307,31 @@ class SiteGenerator:
             elif not path.endswith(".html"):
                 path = path.rstrip("/") + ".html"
             
-            sitemap += f'  <url>\n'
-            sitemap += f'    <loc>https://www.motorover.in{path}</loc>\n'
-            sitemap += f'    <changefreq>monthly</changefreq>\n'
-            sitemap += f'    <priority>0.8</priority>\n'
-            sitemap += f'  </url>\n'
-        
-        sitemap += '</urlset>\n'
-        
-        sitemap_path = self.output_dir / "sitemap.xml"
-        with open(sitemap_path, "w", encoding="utf-8") as f:
-            f.write(sitemap)
+            # The URL the page is known by: the home page is "/", not "/index.html"
+            loc = canonical_url(f"{SITE_URL}{path}")
+            if loc in seen:
+                continue
+            seen.add(loc)
+            
+            name = path.lstrip("/")
+            lastmod = self.manifest.lastmod(name)
+            if not lastmod:
+                # Fall back to the file's mtime for pages not built by us
+                output_file = self.output_dir / name
+                if output_file.exists():
+                    lastmod = datetime.fromtimestamp(
+                        output_file.stat().st_mtime, timezone.utc
+                    ).strftime("%Y-%m-%d")
+            
+            priority = "1.0" if name == "index.html" else "0.8"
+            yield loc, lastmod, priority
+    
+    def generate_sitemap_xml(self):
+        """Generate sitemap.xml (sharded into an index past 50k URLs) plus a gzipped copy."""
+        writer = SitemapWriter(str(self.output_dir))
+        files = writer.write(self._sitemap_entries())
         
-        print(f"Generated sitemap.xml with {len(urls)} URLs")
+        print(f"Generated sitemap.xml with {writer.total} URLs in {len(files)} file(s)")
     
     def generate_robots_txt(self):
         """Generate robots.txt."""
@@ -252,14 +345,42 @@ class SiteGenerator:
             f.write(robots)
         
         print("Generated robots.txt")
+    
+    def generate_redirects(self):
+        """Generate the static host's _redirects file."""
+        path = self.redirects.write(self.output_dir)
+        print(f"Generated {path.name} with {len(self.redirects.rules())} redirects")
 
 
 def main():
     """Main entry point."""
-    generator = SiteGenerator()
-    generator.generate_all()
-    generator.generate_sitemap_xml()
-    generator.generate_robots_txt()
+    parser = argparse.ArgumentParser(description="Generate the static site from scraped content")
+    parser.add_argument("--budgets", metavar="PATH", help="JSON file overriding the default page budgets")
+    parser.add_argument(
+        "--enforce-budgets",
+        action="store_true",
+        help="Exit with an error when a page is over budget (default: only report it)"
+    )
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    metrics = instrumentation.from_args("generate_site", args)
+    with metrics.stage("load"):
+        generator = SiteGenerator(metrics=metrics)
+    with metrics.stage("pages"):
+        generator.generate_all()
+    with metrics.stage("critical-css"):
+        generator.inline_critical_css()
+    with metrics.stage("sitemap"):
+        generator.generate_sitemap_xml()
+        generator.generate_robots_txt()
+        generator.generate_redirects()
+    
+    with metrics.stage("build-report"):
+        report = generator.generate_build_report(args.budgets)
+    instrumentation.finish(metrics, args)
+    if report["violations"] and args.enforce_budgets:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+HTML Tag Helpers
+Read and edit attributes of individual start tags in place, so build stages
+can touch <img>/<source>/<link> markup without re-serializing whole pages.
+"""
+
+import re
+from typing import List, Optional
+
+IMG_TAG = re.compile(r"<img\b[^>]*>", re.I)
+SOURCE_TAG = re.compile(r"<source\b[^>]*>", re.I)
+PICTURE_BLOCK = re.compile(r"<picture\b[^>]*>.*?</picture\s*>", re.I | re.S)
+HEAD_CLOSE = re.compile(r"</head\s*>", re.I)
+
+
+# The tag name, then one whole name(=value)? pair at a time, so text inside a
+# quoted value ("... src ..." in an alt, say) is never taken for an attribute
+TAG_NAME = re.compile(r"<[^\s/>]+")
+ATTRIBUTE = re.compile(r"""(\s*(?:/(?!>)\s*)*)([^\s"'<>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?""")
+
+
+def _find_attr(tag: str, name: str) -> Optional["re.Match"]:
+    """The first attribute of a start tag with this name (case-insensitive), or None."""
+    name = name.lower()
+    start = TAG_NAME.match(tag)
+    pos = start.end() if start else 0
+    while True:
+        match = ATTRIBUTE.match(tag, pos)
+        if not match:
+            return None
+        if match.group(2).lower() == name:
+            return match
+        pos = match.end()
+
+
+def get_attr(tag: str, name: str) -> Optional[str]:
+    """Return an attribute value, '' for a bare attribute, or None if absent."""
+    match = _find_attr(tag, name)
+    if not match:
+        return None
+    value = match.group(3) or ""
+    if value[:1] in ("'", '"'):
+        value = value[1:-1]
+    return value
+
+
+def has_attr(tag: str, name: str) -> bool:
+    """Check whether a start tag carries an attribute."""
+    return _find_attr(tag, name) is not None
+
+
+def set_attr(tag: str, name: str, value: str) -> str:
+    """Set an attribute, replacing an existing value or appending it."""
+    escaped = value.replace('"', "&quot;")
+    match = _find_attr(tag, name)
+    if match:
+        return f'{tag[:match.start(2)]}{name}="{escaped}"{tag[match.end():]}'
+
+    end = len(tag) - 2 if tag.endswith("/>") else len(tag) - 1
+    head = tag[:end].rstrip()
+    return f'{head} {name}="{escaped}"{tag[end:]}'
+
+
+def remove_attr(tag: str, name: str) -> str:
+    """Remove an attribute from a start tag."""
+    match = _find_attr(tag, name)
+    if not match:
+        return tag
+    # Drop the whitespace before it, but not a stray "/" that was there too
+    return tag[:match.start(1)] + match.group(1).rstrip() + tag[match.end():]
+
+
+def element_end(html: str, start: int, tag_name: str) -> int:
+    """Return the end offset of the element whose start tag begins at start."""
+    pattern = re.compile(rf"<(/?){re.escape(tag_name)}\b[^>]*>", re.I)
+    depth = 0
+    for match in pattern.finditer(html, start):
+        if match.group(0).endswith("/>"):
+            continue
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(html)
+
+
+def srcset_candidates(srcset: str) -> List[tuple]:
+    """Split a srcset into (url, descriptor) pairs."""
+    candidates = []
+    for candidate in srcset.split(","):
+        parts = candidate.strip().split()
+        if parts:
+            candidates.append((parts[0], parts[1] if len(parts) > 1 else ""))
+    return candidates
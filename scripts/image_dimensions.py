@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Image Dimension Injection
+Adds intrinsic width/height to <img> and <picture> <source> markup so browsers
+can reserve space before image bytes arrive (eliminates layout shift).
+Dimensions are read from assets/img and cached in assets.json.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Optional, Tuple
+
+from asset_manifest import AssetManifest
+from html_tags import IMG_TAG, PICTURE_BLOCK, SOURCE_TAG, get_attr, has_attr, set_attr, srcset_candidates
+
+
+def _largest_candidate_dimensions(srcset: str, manifest: AssetManifest) -> Optional[Tuple[int, int]]:
+    """Return dimensions of the widest resolvable srcset candidate."""
+    best = None
+    for url, _descriptor in srcset_candidates(srcset):
+        dims = manifest.dimensions_for(url)
+        if dims and (best is None or dims[0] > best[0]):
+            best = dims
+    return best
+
+
+def _with_dimensions(tag: str, dims: Optional[Tuple[int, int]]) -> str:
+    """Fill in whichever of width/height the tag lacks; attributes the author declared are never changed."""
+    has_width, has_height = has_attr(tag, "width"), has_attr(tag, "height")
+    if not dims or (has_width and has_height):
+        return tag
+
+    width, height = dims
+    if not has_width and not has_height:
+        tag = set_attr(tag, "width", str(width))
+        return set_attr(tag, "height", str(height))
+
+    # Scale the missing side from the declared one, keeping the image's aspect ratio;
+    # a declared value that isn't a pixel count ("100%", "auto") gives nothing to scale from
+    declared = (get_attr(tag, "width" if has_width else "height") or "").strip()
+    if not declared.isdigit() or not width or not height:
+        return tag
+    if has_width:
+        return set_attr(tag, "height", str(round(int(declared) * height / width)))
+    return set_attr(tag, "width", str(round(int(declared) * width / height)))
+
+
+def _img_dimensions(tag: str, manifest: AssetManifest) -> Optional[Tuple[int, int]]:
+    """Resolve dimensions for an <img> from src, lazy-src or srcset."""
+    for attr in ("src", "data-src", "data-lazy-src"):
+        value = get_attr(tag, attr)
+        if value:
+            dims = manifest.dimensions_for(value)
+            if dims:
+                return dims
+
+    srcset = get_attr(tag, "srcset") or get_attr(tag, "data-srcset")
+    if srcset:
+        return _largest_candidate_dimensions(srcset, manifest)
+    return None
+
+
+def inject_dimensions(html: str, manifest: AssetManifest) -> str:
+    """Add width/height to every <img> and <picture> source that lacks them."""
+
+    def fix_picture(match):
+        block = match.group(0)
+        fallback = None
+
+        def fix_source(source_match):
+            nonlocal fallback
+            source = source_match.group(0)
+            dims = _largest_candidate_dimensions(get_attr(source, "srcset") or "", manifest)
+            fallback = fallback or dims
+            return _with_dimensions(source, dims)
+
+        block = SOURCE_TAG.sub(fix_source, block)
+        # The <img> fallback may point at a missing original; borrow the sources' ratio
+        return IMG_TAG.sub(
+            lambda m: _with_dimensions(m.group(0), _img_dimensions(m.group(0), manifest) or fallback),
+            block
+        )
+
+    html = PICTURE_BLOCK.sub(fix_picture, html)
+
+    def fix_img(match):
+        tag = match.group(0)
+        if has_attr(tag, "width") and has_attr(tag, "height"):
+            return tag
+        return _with_dimensions(tag, _img_dimensions(tag, manifest))
+
+    return IMG_TAG.sub(fix_img, html)
+
+
+def process_html_file(file_path: Path, manifest: AssetManifest) -> bool:
+    """Inject dimensions into one page; returns True if it changed."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        updated = inject_dimensions(content, manifest)
+        if updated != content:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(updated)
+            return True
+        return False
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return False
+
+
+def main():
+    """Inject image dimensions into all HTML pages."""
+    parser = argparse.ArgumentParser(description="Add intrinsic width/height to page images")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    manifest = AssetManifest(str(root_dir / "content"), str(root_dir))
+    html_files = sorted(root_dir.glob("*.html"))
+
+    print(f"Found {len(html_files)} HTML files")
+
+    fixed_count = 0
+    for html_file in html_files:
+        if process_html_file(html_file, manifest):
+            print(f"Fixed: {html_file.name}")
+            fixed_count += 1
+
+    manifest.prune_dimensions()
+    manifest.save()
+
+    print(f"\nFixed {fixed_count} files")
+    print(f"  Cached dimensions: {len(manifest.dimensions)} images")
+
+
+if __name__ == "__main__":
+    main()
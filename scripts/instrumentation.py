@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Pipeline Instrumentation
+Shared stage timing, per-item spans, counters and optional cProfile dumps
+for the scraper, downloader, generator and verifier, written out as JSON or
+as a Prometheus textfile so nightly runs can be attributed and trended.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Functions listed per stage when profiling
+PROFILE_TOP = 15
+
+METRIC_PREFIX = "motorover_pipeline"
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metrics:
+    """Collects stages, spans and counters for one pipeline run."""
+
+    def __init__(self, pipeline: str, profile_dir: Optional[str] = None):
+        self.pipeline = pipeline
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.started = time.time()
+        self.stages: Dict[str, float] = {}
+        self.spans: List[Dict] = []
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self._profiling = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a top-level pipeline step, profiling it when --profile is on."""
+        profiler = None
+        if self.profile_dir and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+                self._dump_profile(name, profiler)
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time one unit of work (a URL, an image, a page)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({"name": name, "labels": labels,
+                               "seconds": round(time.perf_counter() - started, 6)})
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Add to a counter such as bytes fetched or cache hits."""
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict:
+        """Spans and counters in a picklable form, for worker processes to send back."""
+        return {"spans": self.spans, "counters": list(self.counters.items())}
+
+    def merge(self, snapshot: Dict):
+        """Fold a worker's snapshot into this run."""
+        self.spans.extend(snapshot["spans"])
+        for (name, labels), value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _dump_profile(self, stage: str, profiler: cProfile.Profile):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        safe_stage = re.sub(r"[^\w-]", "_", stage)
+        path = self.profile_dir / f"{self.pipeline}-{safe_stage}.prof"
+        profiler.dump_stats(str(path))
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"\nProfile of {self.pipeline}/{stage} (full stats in {path}):")
+        print(output.getvalue())
+
+    def span_totals(self) -> Dict[str, Dict]:
+        """Per span name: count, total and slowest seconds."""
+        totals: Dict[str, Dict] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span["name"], {"count": 0, "seconds": 0.0, "slowest": 0.0, "slowestLabels": {}})
+            entry["count"] += 1
+            entry["seconds"] += span["seconds"]
+            if span["seconds"] > entry["slowest"]:
+                entry["slowest"] = span["seconds"]
+                entry["slowestLabels"] = span["labels"]
+        for entry in totals.values():
+            entry["seconds"] = round(entry["seconds"], 6)
+        return totals
+
+    def to_dict(self) -> Dict:
+        return {
+            "pipeline": self.pipeline,
+            "started": self.started,
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "spanTotals": self.span_totals(),
+            "spans": self.spans,
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(self.counters.items())],
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format, for node_exporter's textfile collector."""
+        base = f'pipeline="{self.pipeline}"'
+
+        def labels(extra: Dict) -> str:
+            pairs = [base] + [f'{key}="{_escape(value)}"' for key, value in sorted(extra.items())]
+            return "{" + ",".join(pairs) + "}"
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds Unix time the run started.",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_timestamp_seconds{labels({})} {self.started:.0f}",
+            f"# HELP {METRIC_PREFIX}_stage_seconds Wall time of each pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+        ]
+        for name, seconds in sorted(self.stages.items()):
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{labels({'stage': name})} {seconds:.6f}")
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_seconds Time spent on individual items (URLs, images, pages).",
+            f"# TYPE {METRIC_PREFIX}_span_seconds summary",
+        ]
+        for name, entry in sorted(self.span_totals().items()):
+            lines.append(f"{METRIC_PREFIX}_span_seconds_sum{labels({'span': name})} {entry['seconds']:.6f}")
+            lines.append(f"{METRIC_PREFIX}_span_seconds_count{labels({'span': name})} {entry['count']}")
+
+        by_name: Dict[str, List] = {}
+        for (name, label_pairs), value in sorted(self.counters.items()):
+            by_name.setdefault(name, []).append((dict(label_pairs), value))
+        for name, series in by_name.items():
+            metric = f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for extra, value in series:
+                lines.append(f"{metric}{labels(extra)} {_sample(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write metrics atomically: .prom files as Prometheus text, anything else as JSON."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.suffix == ".prom":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2)
+        # The textfile collector may read at any moment; never expose a partial file
+        temp = target.with_name(f".{target.name}.tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp, target)
+
+    def print_summary(self):
+        """One line per stage and per span kind."""
+        if not self.stages and not self.spans:
+            return
+        print(f"\nTimings ({self.pipeline}):")
+        for name, seconds in self.stages.items():
+            print(f"  {name}: {seconds:.2f}s")
+        for name, entry in self.span_totals().items():
+            slowest = ", ".join(f"{key}={value}" for key, value in entry["slowestLabels"].items())
+            print(f"  {name}: {entry['count']} x, {entry['seconds']:.2f}s total, "
+                  f"slowest {entry['slowest'] * 1000:.0f} ms ({slowest})")
+
+
+def _sample(value: float) -> str:
+    """A sample value at full precision (":g" would round 12345678 bytes to 1.23457e+07)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """The --profile and --metrics flags every pipeline script accepts."""
+    parser.add_argument("--profile", nargs="?", const=".cache/profiles", metavar="DIR",
+                        help="cProfile each stage and dump .prof files to DIR (default: .cache/profiles)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write stage timings, spans and counters (.prom for Prometheus, else JSON)")
+
+
+def from_args(pipeline: str, args: argparse.Namespace) -> Metrics:
+    return Metrics(pipeline, getattr(args, "profile", None))
+
+
+def finish(metrics: Metrics, args: argparse.Namespace):
+    """Print the timing summary and write the metrics file if one was asked for."""
+    metrics.print_summary()
+    if getattr(args, "metrics", None):
+        metrics.write(args.metrics)
+        print(f"Wrote metrics to {args.metrics}")
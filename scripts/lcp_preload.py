@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+LCP Image Prioritization
+Finds each page's hero (Largest Contentful Paint) image, preloads exactly the
+candidates the element will request (its <picture> source, or its own
+srcset/src) and marks it fetchpriority="high"; every other image is
+lazy-loaded and decoded asynchronously.
+"""
+
+import argparse
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from asset_manifest import AssetManifest
+from html_tags import (
+    HEAD_CLOSE, IMG_TAG, PICTURE_BLOCK, SOURCE_TAG,
+    element_end, get_attr, has_attr, remove_attr, set_attr
+)
+from records import Page, load_pages
+
+HERO_START = re.compile(r"""<(\w+)\b[^>]*\bclass\s*=\s*["'][^"']*\b(?:hero|banner)\b[^"']*["'][^>]*>""", re.I)
+IMAGE_PRELOAD = re.compile(r"""<link\b[^>]*\brel\s*=\s*["']?preload["']?[^>]*\bas\s*=\s*["']?image""", re.I)
+
+
+def _img_src(tag: str) -> Optional[str]:
+    """Return the effective source of an <img> tag."""
+    return get_attr(tag, "src") or get_attr(tag, "data-src") or get_attr(tag, "data-lazy-src")
+
+
+def hero_image_sources(page: Optional[Page]) -> List[str]:
+    """Return image sources inside the scraped hero content block."""
+    sources = []
+    for block in page.content_blocks if page else []:
+        if block.type != "hero":
+            continue
+        for match in IMG_TAG.finditer(block.html):
+            src = _img_src(match.group(0))
+            if src:
+                sources.append(src)
+    return sources
+
+
+def find_lcp_candidate(html: str, manifest: AssetManifest, page: Optional[Page] = None) -> Optional[int]:
+    """Return the offset of the hero <img> tag in html, if one can be identified."""
+    images = list(IMG_TAG.finditer(html))
+
+    # Prefer the image the scraper classified as part of the hero block
+    hero_sources = hero_image_sources(page)
+    if hero_sources:
+        hero_files = {manifest.resolve(src) for src in hero_sources} - {None}
+        for match in images:
+            src = _img_src(match.group(0))
+            if src in hero_sources or (src and manifest.resolve(src) in hero_files):
+                return match.start()
+
+    # Otherwise fall back to the first image inside a hero/banner element
+    for hero in HERO_START.finditer(html):
+        end = element_end(html, hero.start(), hero.group(1))
+        for match in images:
+            if hero.end() <= match.start() < end:
+                return match.start()
+
+    return None
+
+
+def _preload_link(tag: str, picture: Optional[str]) -> Optional[str]:
+    """Build a <link rel=preload> for the hero image, for the same resource the element will fetch.
+
+    None when it has nothing to fetch: a preload with an empty href would fetch the page itself.
+    """
+    src = (_img_src(tag) or "").strip()
+    sizes = get_attr(tag, "sizes")
+    srcset = get_attr(tag, "srcset")
+    mime = None
+    media = None
+
+    # A <picture> fetches from its first <source> the browser accepts; preload that one,
+    # limited by its type and media so a browser that skips the source skips the preload too
+    if picture:
+        for source in SOURCE_TAG.finditer(picture):
+            source_tag = source.group(0)
+            if get_attr(source_tag, "srcset"):
+                srcset = get_attr(source_tag, "srcset")
+                sizes = get_attr(source_tag, "sizes") or sizes
+                mime = get_attr(source_tag, "type")
+                media = get_attr(source_tag, "media")
+                break
+
+    srcset = " ".join((srcset or "").split())
+    if not srcset and not src:
+        return None
+
+    link = '<link rel="preload" as="image"'
+    if srcset:
+        link += f' imagesrcset="{srcset}"'
+        link += f' imagesizes="{sizes or "100vw"}"'
+    else:
+        link += f' href="{src}"'
+    if mime:
+        link += f' type="{mime}"'
+    if media:
+        link += f' media="{media}"'
+    return link + ' fetchpriority="high">'
+
+
+def prioritize_images(html: str, manifest: AssetManifest, page: Optional[Page] = None) -> str:
+    """Preload the LCP image and set loading/decoding hints on every <img>."""
+    candidate = find_lcp_candidate(html, manifest, page)
+    if candidate is None:
+        # Without a known hero, forcing lazy loading could delay the real LCP image
+        return IMG_TAG.sub(
+            lambda m: m.group(0) if has_attr(m.group(0), "decoding") else set_attr(m.group(0), "decoding", "async"),
+            html
+        )
+
+    hero_tag = IMG_TAG.match(html, candidate).group(0)
+    picture = None
+    for block in PICTURE_BLOCK.finditer(html):
+        if block.start() <= candidate < block.end():
+            picture = block.group(0)
+            break
+    preload = _preload_link(hero_tag, picture)
+
+    def rewrite(match):
+        tag = match.group(0)
+        if match.start() == candidate:
+            tag = set_attr(tag, "fetchpriority", "high")
+            tag = set_attr(tag, "loading", "eager")
+            return remove_attr(tag, "decoding")
+        tag = set_attr(tag, "loading", "lazy")
+        return set_attr(tag, "decoding", "async")
+
+    html = IMG_TAG.sub(rewrite, html)
+
+    if preload and not IMAGE_PRELOAD.search(html):
+        head_close = HEAD_CLOSE.search(html)
+        if head_close:
+            html = html[:head_close.start()] + f"  {preload}\n" + html[head_close.start():]
+
+    return html
+
+
+def pages_by_slug(content_dir: Path) -> Dict[str, Page]:
+    """Index scraped pages from content.json by slug."""
+    return {page.slug: page for page in load_pages(content_dir / "content.json")}
+
+
+def main():
+    """Prioritize hero images across all HTML pages."""
+    parser = argparse.ArgumentParser(description="Preload LCP images and lazy-load the rest")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    manifest = AssetManifest(str(root_dir / "content"), str(root_dir))
+    pages = pages_by_slug(root_dir / "content")
+    html_files = sorted(root_dir.glob("*.html"))
+
+    print(f"Found {len(html_files)} HTML files")
+
+    fixed_count = 0
+    for html_file in html_files:
+        try:
+            content = html_file.read_text(encoding="utf-8")
+            updated = prioritize_images(content, manifest, pages.get(html_file.stem))
+            if updated != content:
+                html_file.write_text(updated, encoding="utf-8")
+                print(f"Fixed: {html_file.name}")
+                fixed_count += 1
+        except Exception as e:
+            print(f"Error processing {html_file}: {e}")
+
+    print(f"\nFixed {fixed_count} files")
+
+
+if __name__ == "__main__":
+    main()
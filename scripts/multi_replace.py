@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Multi-Pattern Replacement
+Replaces many literal strings in a single scan using one regex built as a
+prefix trie, so the engine only explores names sharing the characters seen
+so far (Aho-Corasick-style matching on top of the stdlib re module).
+"""
+
+import re
+from typing import Dict, Iterable, Tuple
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie of the given words."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: a longer name wins over a name that is its prefix
+        if ends_here:
+            return f"(?:{body})?"
+        return body
+
+    return render(trie)
+
+
+class MultiReplacer:
+    """Rewrite every occurrence of any mapping key in one pass over the text."""
+
+    def __init__(self, mapping: Dict[str, str], word_boundaries: bool = True):
+        self.mapping = {old: new for old, new in mapping.items() if old and old != new}
+        self.pattern = None
+        if self.mapping:
+            body = _trie_pattern(self.mapping)
+            self.pattern = re.compile(rf"\b(?:{body})\b" if word_boundaries else body)
+
+    def _substitute(self, match) -> str:
+        return self.mapping[match.group(0)]
+
+    def replace(self, text: str) -> Tuple[str, int]:
+        """Return (rewritten text, number of replacements)."""
+        if self.pattern is None:
+            return text, 0
+        return self.pattern.subn(self._substitute, text)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Page Text Memo
+The text and markup of every element of a parsed page from one walk of the
+tree. Extractors ask for the text (and HTML) of nested sections, forms and
+the whole document; with the memo each answer is a slice of one precomputed
+string instead of another walk over the same subtree.
+"""
+
+from typing import Dict, List, Tuple
+
+from bs4 import CData, NavigableString, Tag
+
+# What Tag.get_text() collects by default; the match is on the exact type, so
+# comments, script and style bodies and ruby annotations are left out
+TEXT_TYPES = (NavigableString, CData)
+
+# str(tag) renders each tag through this hook (beautifulsoup4 4.13+); without
+# it html() falls back to str()
+CAN_SLICE_HTML = hasattr(Tag, "_format_tag")
+
+
+class PageText:
+    """get_text() and str() for every tag under root, computed once.
+
+    A tag's strings (and its markup) are contiguous in document order, so its
+    text is a slice of the concatenated strings of the whole page. Only valid
+    while the tree is unchanged: build a new memo after decomposing or
+    inserting nodes.
+    """
+
+    def __init__(self, root: Tag):
+        self.root = root
+        # id(tag) -> (tag, raw start, raw end, stripped start, stripped end)
+        self._spans: Dict[int, Tuple[Tag, int, int, int, int]] = {}
+        # id(tag) -> (tag, start, end) in the rendered page; built on first html()
+        self._html_spans: Dict[int, Tuple[Tag, int, int]] = {}
+        self._html = None
+        self._texts: Dict[Tuple[int, bool], str] = {}
+        default_types = set(TEXT_TYPES)
+
+        raw_parts: List[str] = []
+        stripped_parts: List[str] = []
+        raw_length = stripped_length = 0
+        # Tuples on the stack close the tag they name once its children are done
+        stack: List = [root]
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:
+                tag, raw_start, stripped_start = item
+                self._spans[id(tag)] = (tag, raw_start, raw_length, stripped_start, stripped_length)
+            elif isinstance(item, Tag):
+                # <script>, <style> and <template> collect other string types; leave them to bs4
+                if item.interesting_string_types == default_types:
+                    stack.append((item, raw_length, stripped_length))
+                stack.extend(reversed(item.contents))
+            elif type(item) in TEXT_TYPES:
+                raw_parts.append(item)
+                raw_length += len(item)
+                stripped = item.strip()
+                if stripped:
+                    stripped_parts.append(stripped)
+                    stripped_length += len(stripped)
+
+        self._raw = "".join(raw_parts)
+        self._stripped = "".join(stripped_parts)
+
+    def text(self, node: Tag, strip: bool = False) -> str:
+        """Same as node.get_text(strip=strip)."""
+        key = (id(node), strip)
+        text = self._texts.get(key)
+        if text is not None:
+            return text
+
+        span = self._spans.get(id(node))
+        if span is None or span[0] is not node:
+            # Not part of this tree (or not a plain-text tag)
+            return node.get_text(strip=strip)
+        if strip:
+            text = self._stripped[span[3]:span[4]]
+        else:
+            text = self._raw[span[1]:span[2]]
+        self._texts[key] = text
+        return text
+
+    def html(self, node: Tag) -> str:
+        """Same as str(node)."""
+        if not CAN_SLICE_HTML:
+            return str(node)
+        if self._html is None:
+            self._render()
+        span = self._html_spans.get(id(node))
+        if span is None or span[0] is not node:
+            return str(node)
+        return self._html[span[1]:span[2]]
+
+    def _render(self):
+        """Render the whole tree the way Tag.decode() does, noting where each tag starts and ends."""
+        formatter = self.root.formatter_for_name("minimal")
+        parts: List[str] = []
+        length = 0
+        # The root itself is left to str(): a BeautifulSoup object renders differently from a tag
+        stack: List = list(reversed(self.root.contents))
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:
+                tag, start = item
+                piece = tag._format_tag("utf-8", formatter, opening=False)
+                parts.append(piece)
+                length += len(piece)
+                self._html_spans[id(tag)] = (tag, start, length)
+            elif isinstance(item, Tag):
+                start = length
+                piece = item._format_tag("utf-8", formatter, opening=True)
+                parts.append(piece)
+                length += len(piece)
+                if item.is_empty_element:
+                    self._html_spans[id(item)] = (item, start, length)
+                else:
+                    stack.append((item, start))
+                    stack.extend(reversed(item.contents))
+            else:
+                piece = item.output_ready(formatter)
+                parts.append(piece)
+                length += len(piece)
+        self._html = "".join(parts)
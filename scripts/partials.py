@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Shared Header/Footer Partials
+Keeps the site header and footer in templates/partials, rendered once per
+build and stitched into every page. The extract command migrates the current
+(most common) header/footer out of the existing pages; apply re-stitches the
+partials into pages that were not generated from templates.
+"""
+
+import argparse
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from jinja2 import Environment, FileSystemLoader
+
+# Site chrome blocks, keyed by partial name
+PARTIAL_BLOCKS = {
+    "header": re.compile(r'<header class="header" role="banner">.*?</header>', re.S),
+    "footer": re.compile(r'<footer class="footer" role="contentinfo">.*?</footer>', re.S),
+}
+
+COPYRIGHT_YEAR = re.compile(r"(&copy;\s*)\d{4}")
+ARIA_CURRENT = re.compile(r'\s+aria-current="page"')
+
+
+def page_path(file_name: str) -> str:
+    """Return the site path a page is served from."""
+    return "/" if file_name == "index.html" else f"/{file_name}"
+
+
+def extract_partials(html_files: List[Path]) -> Dict[str, Dict]:
+    """Find the most common variant of each partial across pages."""
+    variants: Dict[str, Counter] = {name: Counter() for name in PARTIAL_BLOCKS}
+    missing: Dict[str, int] = {name: 0 for name in PARTIAL_BLOCKS}
+
+    for html_file in html_files:
+        content = html_file.read_text(encoding="utf-8")
+        for name, pattern in PARTIAL_BLOCKS.items():
+            match = pattern.search(content)
+            if not match:
+                missing[name] += 1
+                continue
+            # Per-page state is re-applied at stitch time
+            block = ARIA_CURRENT.sub("", match.group(0))
+            variants[name][COPYRIGHT_YEAR.sub(r"\g<1>{{ currentYear }}", block)] += 1
+
+    partials = {}
+    for name, counter in variants.items():
+        if not counter:
+            continue
+        block, count = counter.most_common(1)[0]
+        partials[name] = {
+            "html": block,
+            "pages": count,
+            "variants": len(counter),
+            "missing": missing[name],
+        }
+    return partials
+
+
+def write_partials(partials: Dict[str, Dict], partials_dir: Path, force: bool = False) -> List[Path]:
+    """Write extracted partials as templates, keeping existing ones unless forced."""
+    partials_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, partial in partials.items():
+        path = partials_dir / f"{name}.html"
+        if path.exists() and not force:
+            print(f"  Keeping existing {path}")
+            continue
+        path.write_text(partial["html"] + "\n", encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def load_partials(partials_dir: Path, context: Optional[Dict] = None) -> Dict[str, str]:
+    """Render every partial template once for the whole build."""
+    partials_dir = Path(partials_dir)
+    if not partials_dir.is_dir():
+        return {}
+
+    env = Environment(loader=FileSystemLoader(str(partials_dir)))
+    partials = {}
+    for name in PARTIAL_BLOCKS:
+        if (partials_dir / f"{name}.html").exists():
+            partials[name] = env.get_template(f"{name}.html").render(**(context or {})).rstrip("\n")
+    return partials
+
+
+def mark_current(block: str, path: str) -> str:
+    """Flag the nav link for the current page with aria-current."""
+    link = f'<a href="{path}" class="nav__link"'
+    return block.replace(link, f'{link} aria-current="page"', 1)
+
+
+def stitch_partials(html: str, partials: Dict[str, str], path: Optional[str] = None) -> str:
+    """Replace each page's header/footer block with the shared partial."""
+    for name, block in partials.items():
+        if path:
+            block = mark_current(block, path)
+        html = PARTIAL_BLOCKS[name].sub(lambda m: block, html, count=1)
+    return html
+
+
+def main():
+    """Extract partials from existing pages, or stitch them back in."""
+    parser = argparse.ArgumentParser(description="Shared header/footer partials")
+    parser.add_argument("command", choices=["extract", "apply"], help="extract: pages -> partials; apply: partials -> pages")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--partials-dir", help="Partials directory (default: <root>/templates/partials)")
+    parser.add_argument("--year", default="2024", help="currentYear used when rendering partials")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing partial templates")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing files")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    partials_dir = Path(args.partials_dir) if args.partials_dir else root_dir / "templates" / "partials"
+    html_files = sorted(root_dir.glob("*.html"))
+    print(f"Found {len(html_files)} HTML files")
+
+    if args.command == "extract":
+        partials = extract_partials(html_files)
+        for name, partial in partials.items():
+            print(
+                f"  {name}: {len(partial['html']) / 1024:.1f} KB, shared by {partial['pages']} pages "
+                f"({partial['variants']} variants, missing from {partial['missing']})"
+            )
+        if not args.dry_run:
+            for path in write_partials(partials, partials_dir, args.force):
+                print(f"  Wrote {path}")
+        return
+
+    partials = load_partials(partials_dir, {"currentYear": args.year})
+    if not partials:
+        print(f"No partials found in {partials_dir}; run the extract command first")
+        return
+
+    started = time.perf_counter()
+    fixed_count = 0
+    for html_file in html_files:
+        content = html_file.read_text(encoding="utf-8")
+        updated = stitch_partials(content, partials, page_path(html_file.name))
+        if updated != content:
+            fixed_count += 1
+            if not args.dry_run:
+                html_file.write_text(updated, encoding="utf-8")
+            print(f"{'Would update' if args.dry_run else 'Updated'}: {html_file.name}")
+
+    print(f"\nStitched {', '.join(partials)} into {fixed_count} files in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
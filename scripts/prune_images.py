@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Orphaned Image Collector
+Finds images in assets/img that nothing can reach - no generated page,
+script, stylesheet or assets.json entry - and deletes or quarantines them.
+Reachability is decided per base name, so an original keeps all of its
+-{bp}w derivatives and format variants alive, and a stale group goes as a whole.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Set
+
+from asset_manifest import AssetManifest
+from html_tags import srcset_candidates
+from reference_index import IMAGE_EXTENSIONS, METADATA_FILES, open_index
+from rename_images import extract_base_name
+
+# Files whose image references ship with the site
+ROOT_EXTENSIONS = {'.html', '.js', '.css'}
+
+QUARANTINE_DIR = Path(".cache") / "image-quarantine"
+QUARANTINE_MANIFEST = "quarantine.json"
+
+
+def referenced_by_site(root_dir: Path) -> Set[str]:
+    """Image filenames referenced by pages, templates, scripts and stylesheets."""
+    index = open_index(root_dir)
+    index.save()
+    return {
+        filename for filename, refs in index.by_image.items()
+        if any(Path(ref["file"]).suffix in ROOT_EXTENSIONS and ref["file"] not in METADATA_FILES
+               for ref in refs)
+    }
+
+
+def referenced_by_assets(manifest: AssetManifest) -> Set[str]:
+    """Image filenames the generator can pick from assets.json (paths and srcsets)."""
+    names = set()
+    for asset in manifest.assets:
+        for fmt in ("original", "webp", "avif"):
+            entry = asset.get(fmt) or {}
+            if entry.get("path"):
+                names.add(os.path.basename(entry["path"]))
+            for url, _ in srcset_candidates(entry.get("srcset") or ""):
+                names.add(os.path.basename(url))
+    return names
+
+
+def find_orphans(root_dir: Path) -> Dict:
+    """Split assets/img into reachable and orphaned files, grouped by base name."""
+    img_dir = root_dir / "assets" / "img"
+    groups: Dict[str, List[Path]] = defaultdict(list)
+    for path in sorted(img_dir.iterdir()):
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+            groups[extract_base_name(path.name)].append(path)
+
+    manifest = AssetManifest(str(root_dir / "content"), str(root_dir))
+    roots = referenced_by_site(root_dir) | referenced_by_assets(manifest)
+    live_bases = {extract_base_name(name) for name in roots}
+
+    orphans = {base: paths for base, paths in groups.items() if base not in live_bases}
+    return {
+        "groups": len(groups),
+        "files": sum(len(paths) for paths in groups.values()),
+        "orphans": orphans,
+        "manifest": manifest,
+    }
+
+
+def quarantine(root_dir: Path, paths: List[Path]) -> Path:
+    """Move files under .cache/image-quarantine/<stamp> and record where they came from."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    target = root_dir / QUARANTINE_DIR / stamp
+    target.mkdir(parents=True, exist_ok=True)
+    moved = []
+    for path in paths:
+        shutil.move(str(path), str(target / path.name))
+        moved.append(path.relative_to(root_dir).as_posix())
+    with open(target / QUARANTINE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump({"created": stamp, "files": moved}, f, indent=2)
+    return target
+
+
+def restore(root_dir: Path, quarantine_dir: Path) -> int:
+    """Move a quarantined batch back to where it came from."""
+    with open(quarantine_dir / QUARANTINE_MANIFEST, "r", encoding="utf-8") as f:
+        files = json.load(f)["files"]
+    restored = 0
+    for rel in files:
+        source = quarantine_dir / Path(rel).name
+        destination = root_dir / rel
+        if not source.exists():
+            continue
+        if destination.exists():
+            print(f"Warning: {rel} exists again, leaving quarantined copy in place")
+            continue
+        shutil.move(str(source), str(destination))
+        restored += 1
+    return restored
+
+
+def main():
+    """Report, quarantine or delete unreachable images."""
+    parser = argparse.ArgumentParser(description="Garbage-collect images nothing references")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--quarantine", action="store_true",
+                        help=f"Move orphans to {QUARANTINE_DIR}/<timestamp> (reversible)")
+    action.add_argument("--delete", action="store_true", help="Delete orphans permanently")
+    action.add_argument("--restore", metavar="DIR", help="Move a quarantined batch back into assets/img")
+    parser.add_argument("--verbose", action="store_true", help="List every orphaned file")
+    parser.add_argument("--output", help="Write the orphan report as JSON")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    if args.restore:
+        print(f"Restored {restore(root_dir, Path(args.restore))} files")
+        return
+
+    result = find_orphans(root_dir)
+    orphans = result["orphans"]
+    paths = [path for group in orphans.values() for path in group]
+    total_bytes = sum(path.stat().st_size for path in paths)
+
+    print(f"Scanned {result['files']} images in {result['groups']} base-name groups")
+    print(f"Orphaned: {len(paths)} files in {len(orphans)} groups ({total_bytes / 1024 / 1024:.1f} MB)")
+    if args.verbose:
+        for base, group in sorted(orphans.items()):
+            print(f"  {base}: {', '.join(path.name for path in group)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(paths),
+                "bytes": total_bytes,
+                "groups": {base: [path.name for path in group] for base, group in sorted(orphans.items())},
+            }, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+    if not paths:
+        return
+    if args.quarantine:
+        target = quarantine(root_dir, paths)
+        print(f"Quarantined {len(paths)} files in {target}")
+    elif args.delete:
+        for path in paths:
+            path.unlink()
+        print(f"Deleted {len(paths)} files")
+    else:
+        print("Dry run: pass --quarantine or --delete to remove them")
+        return
+
+    # Keep the dimension cache in assets.json in step with the directory
+    manifest = result["manifest"]
+    manifest.prune_dimensions()
+    manifest.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Content Records
+Typed records for what the scraper writes and the generator and downloader
+read back - pages with their content blocks and images, assets and tours -
+and the JSON codec for the content files: orjson or msgspec when installed,
+the standard library json module otherwise. Records are checked as they are
+loaded, so a malformed content.json fails with the path of the bad field
+instead of somewhere inside a template.
+
+Run directly to validate the content files and report load time and memory:
+    python scripts/records.py --root .
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson:
+    CODEC = "orjson"
+elif msgspec:
+    CODEC = "msgspec"
+else:
+    CODEC = "json"
+
+NONE = type(None)
+
+
+# --- Codec -----------------------------------------------------------------
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document with the fastest available codec."""
+    if orjson:
+        return orjson.loads(data)
+    if msgspec:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """UTF-8 JSON, byte for byte what json.dump(value, f, indent=2, ensure_ascii=False) writes."""
+    try:
+        if orjson:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2)
+        if msgspec:
+            return msgspec.json.format(msgspec.json.encode(value), indent=2)
+    except Exception:
+        # Values the fast encoders refuse (huge ints, non-string keys) still go through json
+        pass
+    return json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def load_json(path: Path) -> Any:
+    if orjson or msgspec:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    # Decoding the text up front would hold the bytes and the str at once
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(value: Any, path: Path):
+    """Write a JSON file atomically."""
+    path = Path(path)
+    temp = path.with_name(f".{path.name}.tmp")
+    with open(temp, "wb") as f:
+        f.write(dumps(value))
+    os.replace(temp, path)
+
+
+# --- Records ---------------------------------------------------------------
+
+class RecordError(ValueError):
+    """A content record that doesn't have the expected shape."""
+
+
+def _type_names(types: Tuple[type, ...]) -> str:
+    return " or ".join("null" if t is NONE else t.__name__ for t in types)
+
+
+class Field(NamedTuple):
+    """A record attribute and the JSON key it is stored under."""
+    name: str
+    key: str
+    types: Tuple[type, ...]
+    default: Callable[[], Any] = str
+    required: bool = False
+    # The value is a list of records of this class
+    record: Optional[Type["Record"]] = None
+    # Left out of the JSON while None, like the download details of an asset
+    optional: bool = False
+
+
+class Record:
+    """Base for the slotted content records; subclasses list their FIELDS in JSON key order."""
+
+    __slots__ = ("extra",)
+    FIELDS: Tuple[Field, ...] = ()
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field.name, values.pop(field.name) if field.name in values else field.default())
+        # Keys this record doesn't model, kept so a load and save loses nothing
+        self.extra: Dict[str, Any] = values.pop("extra", None) or {}
+        if values:
+            raise TypeError(f"{type(self).__name__} has no field {next(iter(values))!r}")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._BY_KEY = {field.key: field for field in cls.FIELDS}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other.to_dict() == self.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.FIELDS[0].name}={getattr(self, self.FIELDS[0].name)!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field.name)
+            if field.record:
+                value = [item.to_dict() for item in value]
+            elif value is None and field.optional:
+                continue
+            data[field.key] = value
+        data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], where: str = "") -> "Record":
+        """Build a record from its JSON form, raising RecordError if a field has the wrong type."""
+        where = where or cls.__name__
+        if type(data) is not dict:
+            raise RecordError(f"{where}: expected an object, got {_type_names((type(data),))}")
+
+        # Filled in directly rather than through __init__: pages hold thousands of records
+        record = cls.__new__(cls)
+        by_key = cls._BY_KEY
+        extra = {}
+        for key, value in data.items():
+            field = by_key.get(key)
+            if field is None:
+                extra[key] = value
+            elif type(value) not in field.types:
+                raise RecordError(f"{where}.{key}: expected {_type_names(field.types)}, "
+                                  f"got {_type_names((type(value),))}")
+            elif field.record:
+                setattr(record, field.name,
+                        [field.record.from_dict(item, f"{where}.{key}[{i}]") for i, item in enumerate(value)])
+            else:
+                setattr(record, field.name, value)
+        record.extra = extra
+
+        if len(data) - len(extra) < len(cls.FIELDS):
+            for field in cls.FIELDS:
+                if field.key not in data:
+                    if field.required:
+                        raise RecordError(f"{where}: missing {field.key!r}")
+                    setattr(record, field.name, field.default())
+        return record
+
+
+class ContentBlock(Record):
+    """A section of a page: its type (hero, itinerary, faq...) plus its text and HTML."""
+
+    __slots__ = ("type", "text", "html")
+    FIELDS = (
+        Field("type", "type", (str,), required=True),
+        Field("text", "text", (str,)),
+        Field("html", "html", (str,)),
+    )
+
+    # Text and HTML sit under "content" in the JSON
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"type": self.type, "content": {"text": self.text, "html": self.html}}
+        data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], where: str = "") -> "ContentBlock":
+        where = where or cls.__name__
+        if type(data) is not dict:
+            raise RecordError(f"{where}: expected an object, got {_type_names((type(data),))}")
+        content = data.get("content", {})
+        if type(content) is not dict:
+            raise RecordError(f"{where}.content: expected an object, got {_type_names((type(content),))}")
+        if len(data) != 2 or len(content) != 2:
+            # Missing or unexpected keys somewhere; sort them out the general way
+            flat = {key: value for key, value in data.items() if key != "content"}
+            for key, value in content.items():
+                if key not in cls._BY_KEY:
+                    raise RecordError(f"{where}.content: unexpected {key!r}")
+                flat[key] = value
+            return super().from_dict(flat, where)
+
+        block = cls.__new__(cls)
+        block.type = data.get("type")
+        block.text = content.get("text")
+        block.html = content.get("html")
+        block.extra = {}
+        for name in ("type", "text", "html"):
+            value = getattr(block, name)
+            if type(value) is not str:
+                key = name if name == "type" else f"content.{name}"
+                if value is None:
+                    raise RecordError(f"{where}: missing {key!r}")
+                raise RecordError(f"{where}.{key}: expected str, got {_type_names((type(value),))}")
+        return block
+
+
+class Image(Record):
+    """An <img> on a page."""
+
+    __slots__ = ("src", "alt", "width", "height", "caption", "context")
+    FIELDS = (
+        Field("src", "src", (str,), required=True),
+        Field("alt", "alt", (str,)),
+        Field("width", "width", (int, NONE), NONE),
+        Field("height", "height", (int, NONE), NONE),
+        Field("caption", "caption", (str,)),
+        Field("context", "context", (str,), lambda: "page"),
+    )
+
+
+class Page(Record):
+    """A scraped page, as it is stored in content.json."""
+
+    __slots__ = ("url", "slug", "title", "meta_description", "canonical", "lang", "headings",
+                 "content_blocks", "images", "forms", "internal_links", "structured_data_hints")
+    FIELDS = (
+        Field("url", "url", (str,), required=True),
+        Field("slug", "slug", (str,)),
+        Field("title", "title", (str,)),
+        Field("meta_description", "metaDescription", (str,)),
+        # None when the canonical link points off-site
+        Field("canonical", "canonical", (str, NONE)),
+        Field("lang", "lang", (str,), lambda: "en-IN"),
+        Field("headings", "headings", (dict,), dict),
+        Field("content_blocks", "contentBlocks", (list,), list, record=ContentBlock),
+        Field("images", "images", (list,), list, record=Image),
+        Field("forms", "forms", (list,), list),
+        Field("internal_links", "internalLinks", (list,), list),
+        Field("structured_data_hints", "structuredDataHints", (list,), list),
+    )
+
+
+class Asset(Record):
+    """A file referenced by a page; downloaded images also carry their optimized variants."""
+
+    __slots__ = ("url", "type", "page_url", "alt", "original", "webp", "avif", "srcset", "sizes")
+    FIELDS = (
+        Field("url", "url", (str,), required=True),
+        Field("type", "type", (str,), required=True),
+        Field("page_url", "page_url", (str,)),
+        Field("alt", "alt", (str,)),
+        Field("original", "original", (dict, NONE), NONE, optional=True),
+        Field("webp", "webp", (dict, NONE), NONE, optional=True),
+        Field("avif", "avif", (dict, NONE), NONE, optional=True),
+        Field("srcset", "srcset", (str, NONE), NONE, optional=True),
+        Field("sizes", "sizes", (str, NONE), NONE, optional=True),
+    )
+
+
+class Tour(Record):
+    """A tour found on a tour page; stored in the entity store under its URL."""
+
+    __slots__ = ("name", "url", "type", "duration", "dates", "start_location", "end_location",
+                 "highlights", "itinerary", "inclusions", "exclusions", "gallery", "testimonials")
+    FIELDS = (
+        Field("name", "name", (str,), required=True),
+        Field("url", "url", (str,), required=True),
+        Field("type", "type", (str,)),
+        Field("duration", "duration", (str,)),
+        Field("dates", "dates", (list,), list),
+        Field("start_location", "start_location", (str,)),
+        Field("end_location", "end_location", (str,)),
+        Field("highlights", "highlights", (list,), list),
+        Field("itinerary", "itinerary", (list,), list),
+        Field("inclusions", "inclusions", (list,), list),
+        Field("exclusions", "exclusions", (list,), list),
+        Field("gallery", "gallery", (list,), list),
+        Field("testimonials", "testimonials", (list,), list),
+    )
+
+
+def from_dicts(record: Type[Record], items: Any, where: str) -> List[Record]:
+    if type(items) is not list:
+        raise RecordError(f"{where}: expected a list, got {_type_names((type(items),))}")
+    return [record.from_dict(item, f"{where}[{i}]") for i, item in enumerate(items)]
+
+
+def load_pages(path: Path) -> List[Page]:
+    """The pages in content.json, validated; a missing file has none."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    return from_dicts(Page, load_json(path).get("pages", []), f"{path.name}: pages")
+
+
+def load_assets(path: Path) -> List[Asset]:
+    """The assets in assets.json, validated; a missing file has none."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    return from_dicts(Asset, load_json(path).get("assets", []), f"{path.name}: assets")
+
+
+def main():
+    """Validate content.json and assets.json and report what loading them costs."""
+    parser = argparse.ArgumentParser(description="Validate the content files and time loading them")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--content-dir", help="Directory with content.json and assets.json (default: ROOT/content)")
+    args = parser.parse_args()
+
+    content_dir = Path(args.content_dir or Path(args.root) / "content")
+    print(f"Codec: {CODEC}")
+    for filename, loader in (("content.json", load_pages), ("assets.json", load_assets)):
+        path = content_dir / filename
+        if not path.exists():
+            print(f"  {filename}: not found")
+            continue
+        start = time.perf_counter()
+        try:
+            records = loader(path)
+        except RecordError as e:
+            print(f"  {filename}: invalid - {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        del records
+        # Again under tracemalloc, which slows loading down too much to time it
+        tracemalloc.start()
+        records = loader(path)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {filename}: {len(records)} records in {elapsed * 1000:.0f} ms, "
+              f"{retained / 2 ** 20:.1f} MiB retained ({peak / 2 ** 20:.1f} MiB peak)")
+        del records
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    # ru_maxrss is in KiB on Linux
+    print(f"Max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
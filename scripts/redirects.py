@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Redirect Map
+Where moved and legacy URLs end up: the redirect chains the crawler followed
+(sitemap.json "redirects") plus the links older page templates used. The
+generator publishes it as a Netlify _redirects file, so old URLs keep
+working in one hop, and points links in the pages it builds straight at the
+final destination, so visitors never take the detour at all.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from html_tags import get_attr, set_attr
+from url_canon import SITE_URL, canonical_url, site_url
+
+REDIRECTS_FILE = "_redirects"
+
+# Links older page templates used, and the pages that replaced them
+LEGACY_REDIRECTS = {
+    "/tours/": "/tours.html",
+    "/about/": "/about.html",
+    "/contact.html": "/contactus.html",
+    "/faq.html": "/FAQ.html",
+    "/team.html": "/the-team.html",
+    "/terms.html": "/privacy-terms-refund-pricing.html",
+    "/privacy.html": "/privacy-terms-refund-pricing.html",
+    "/tours/motorcycle.html": "/tours.html",
+    "/tours/self-drive.html": "/tours.html",
+}
+
+PERMANENT = {301, 308}
+# Chains longer than this are treated as loops
+MAX_HOPS = 10
+
+ANCHOR_TAG = re.compile(r"<a\b[^>]*>", re.I)
+
+
+def chain_status(hops: List[Dict]) -> int:
+    """301 if every hop of a chain is permanent; one temporary hop makes the whole move temporary (302)."""
+    return 301 if hops and all(hop["status"] in PERMANENT for hop in hops) else 302
+
+
+def read_redirects_file(path: Path) -> Dict[str, Tuple[str, int]]:
+    """Parse a Netlify _redirects file: source path -> (target, status)."""
+    rules = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        parts = line.split("#", 1)[0].split()
+        if len(parts) < 2:
+            continue
+        status = parts[2].rstrip("!") if len(parts) > 2 else "301"
+        rules.setdefault(parts[0], (parts[1], int(status) if status.isdigit() else 301))
+    return rules
+
+
+class RedirectMap:
+    """Canonical source URL -> (status, canonical final URL), with chains already collapsed."""
+
+    def __init__(self, crawled: Optional[Dict[str, Dict]] = None, legacy: Optional[Dict[str, str]] = None):
+        self._targets: Dict[str, Tuple[int, str]] = {}
+        for source, target in (LEGACY_REDIRECTS if legacy is None else legacy).items():
+            self.add(SITE_URL + source, SITE_URL + target)
+        # What the live site actually does wins over the legacy table
+        for source, entry in (crawled or {}).items():
+            hops = entry.get("hops", [])
+            # Every URL along a chain redirects to its end, as permanently as the rest of the chain
+            for i, hop in enumerate(hops[1:], 1):
+                self.add(hop["from"], entry["to"], chain_status(hops[i:]))
+            self.add(source, entry["to"], chain_status(hops))
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def add(self, source: str, target: str, status: int = 301):
+        source = canonical_url(source)
+        target = canonical_url(target) or target
+        if source and source != target:
+            self._targets[source] = (status, target)
+
+    def discard(self, url: str):
+        """Stop redirecting a URL, e.g. because a page is published there."""
+        self._targets.pop(canonical_url(url), None)
+
+    def resolve(self, url: str) -> Optional[str]:
+        """Final destination of a redirected URL, through entries that lead to other entries; None if not redirected."""
+        resolved = self.resolve_chain(url)
+        return resolved[1] if resolved else None
+
+    def resolve_chain(self, url: str) -> Optional[Tuple[int, str]]:
+        """(status, final destination) of a redirected URL; 302 if any entry along the way is temporary.
+
+        None if the URL isn't redirected, or its entries loop (or run past MAX_HOPS) without reaching a page.
+        """
+        url = canonical_url(url)
+        seen = set()
+        permanent = True
+        while url in self._targets and url not in seen and len(seen) < MAX_HOPS:
+            seen.add(url)
+            status, url = self._targets[url]
+            permanent = permanent and status in PERMANENT
+        if not seen or url in self._targets:
+            return None
+        return (301 if permanent else 302), url
+
+    def rules(self) -> List[Tuple[str, str, int]]:
+        """(source path, destination, status) for every redirect, destinations on this site as paths."""
+        rules = []
+        for source in self._targets:
+            parts = urlsplit(source)
+            # Only this site's paths can be redirected by its host, and _redirects can't match on a query
+            if not source.startswith(SITE_URL + "/") or parts.query:
+                continue
+            resolved = self.resolve_chain(source)
+            # Loops can come from merging redirects stored by earlier crawls with this one's
+            if not resolved or resolved[1] == source:
+                continue
+            status, target = resolved
+            rules.append((parts.path, _site_relative(target), status))
+        return rules
+
+    def write(self, output_dir: Path) -> Path:
+        """Write the map as a Netlify _redirects file."""
+        path = Path(output_dir) / REDIRECTS_FILE
+        lines = [f"{source} {target} {status}" for source, target, status in self.rules()]
+        path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+        return path
+
+    def rewrite_links(self, html: str, page_url: str) -> Tuple[str, int]:
+        """Point every <a href> that would be redirected at its final destination; returns (html, links changed)."""
+        if not self._targets:
+            return html, 0
+        changed = 0
+
+        def rewrite(match):
+            nonlocal changed
+            tag = match.group(0)
+            href = get_attr(tag, "href")
+            if not href or href.startswith("#"):
+                return tag
+            target = self.resolve(site_url(href, page_url) or "")
+            if not target:
+                return tag
+            fragment = href.partition("#")[2]
+            changed += 1
+            return set_attr(tag, "href", _site_relative(target) + (f"#{fragment}" if fragment else ""))
+
+        html = ANCHOR_TAG.sub(rewrite, html)
+        return html, changed
+
+
+def _site_relative(url: str) -> str:
+    return url[len(SITE_URL):] if url.startswith(SITE_URL + "/") else url
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Image Reference Index
+Persistent map of where every image is used: filename -> (file, offset,
+attribute) across HTML, CSS, JS, JSON and Markdown. Stored next to
+assets.json and refreshed incrementally from file mtimes, so rename and
+cleanup tools query it instead of re-walking and re-parsing the site.
+"""
+
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+TEXT_EXTENSIONS = {'.html', '.js', '.json', '.css', '.py', '.ts', '.tsx', '.jsx', '.md'}
+SKIP_DIRS = {'node_modules', '.git', '__pycache__', '.venv', '.cursor', '.cache'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif'}
+
+# Files that describe images rather than use them (the asset manifest, build output)
+METADATA_FILES = {'content/assets.json', 'content/build-report.json', 'content/build-manifest.json'}
+
+INDEX_VERSION = 1
+
+# Image extensions are cheap to find; filenames are then read backwards from them
+IMAGE_EXTENSION = re.compile(r'\.(?:jpe?g|png|webp|avif|gif)(?![\w-])', re.I)
+FILENAME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.%-')
+# Characters that open an attribute value, CSS url() or JSON string
+VALUE_OPENERS = ('"', "'", '(', '=', '>')
+# The attribute, CSS function or JSON key that owns a value opened at the end of the text
+ATTRIBUTE_NAME = re.compile(r'''(?:([\w:-]+)["']?\s*[=:]\s*["']?|(url)\(\s*["']?)\Z''')
+CONTEXT_WINDOW = 1000
+
+
+def iter_text_files(root_dir) -> Iterator[Path]:
+    """Yield every file that might reference an image, skipping tool directories."""
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1] in TEXT_EXTENSIONS:
+                yield Path(dirpath) / filename
+
+
+def _attribute_at(content: str, start: int) -> str:
+    """Name the attribute, url() or JSON key whose value contains offset start."""
+    low = max(0, start - CONTEXT_WINDOW)
+    opener = max(content.rfind(char, low, start) for char in VALUE_OPENERS)
+    if opener < 0:
+        return ""
+    match = ATTRIBUTE_NAME.search(content[max(0, opener - 80):opener + 1])
+    if not match:
+        return ""
+    return (match.group(1) or match.group(2)).lower()
+
+
+def scan_references(content: str) -> List[Tuple[str, int, str]]:
+    """Return (filename, offset, attribute) for every image reference in a document."""
+    refs = []
+    for match in IMAGE_EXTENSION.finditer(content):
+        start = match.start()
+        while start > 0 and content[start - 1] in FILENAME_CHARS:
+            start -= 1
+        # Skip bare extensions and template fragments like ${width}w.webp
+        if start == match.start() or content[start - 1] == '}':
+            continue
+        refs.append((content[start:match.end()], start, _attribute_at(content, start)))
+    return refs
+
+
+class ReferenceIndex:
+    """Incrementally maintained index of image references across the site."""
+
+    def __init__(self, content_dir: str = "content", root_dir: str = "."):
+        self.root_dir = Path(root_dir)
+        self.index_file = Path(content_dir) / "image-references.json"
+        self.files: Dict[str, Dict] = {}
+        self._by_image: Optional[Dict[str, List[Dict]]] = None
+        self.dirty = False
+
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError):
+                self.files = {}
+
+    def update(self) -> Dict[str, int]:
+        """Rescan files whose mtime or size changed and drop deleted ones."""
+        stats = {"scanned": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        index_name = self._relative(self.index_file)
+
+        for path in iter_text_files(self.root_dir):
+            name = self._relative(path)
+            if name == index_name:
+                continue
+            seen.add(name)
+
+            stat = path.stat()
+            entry = self.files.get(name)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                stats["unchanged"] += 1
+                continue
+
+            try:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    refs = scan_references(f.read())
+            except OSError as e:
+                print(f"Error indexing {path}: {e}")
+                continue
+            self.files[name] = {"mtime": stat.st_mtime, "size": stat.st_size, "refs": refs}
+            stats["scanned"] += 1
+
+        for name in set(self.files) - seen:
+            del self.files[name]
+            stats["removed"] += 1
+
+        if stats["scanned"] or stats["removed"]:
+            self.dirty = True
+            self._by_image = None
+        return stats
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.root_dir.resolve()).as_posix()
+        except ValueError:
+            return Path(path).as_posix()
+
+    @property
+    def by_image(self) -> Dict[str, List[Dict]]:
+        """filename -> [{file, offset, attribute}], built lazily from the per-file entries."""
+        if self._by_image is None:
+            by_image: Dict[str, List[Dict]] = {}
+            for name, entry in self.files.items():
+                for filename, offset, attribute in entry["refs"]:
+                    by_image.setdefault(filename, []).append(
+                        {"file": name, "offset": offset, "attribute": attribute}
+                    )
+            self._by_image = by_image
+        return self._by_image
+
+    def references(self, filename: str) -> List[Dict]:
+        """Every place an image is referenced."""
+        return self.by_image.get(filename, [])
+
+    def files_referencing(self, filenames: Iterable[str]) -> List[Path]:
+        """Files that reference any of the given image filenames."""
+        files = set()
+        for filename in filenames:
+            for ref in self.by_image.get(filename, []):
+                files.add(ref["file"])
+        return [self.root_dir / name for name in sorted(files)]
+
+    def referenced_images(self, include_metadata: bool = False) -> Set[str]:
+        """Image filenames used anywhere (optionally counting asset metadata as a use)."""
+        return {
+            filename for filename, refs in self.by_image.items()
+            if include_metadata or any(ref["file"] not in METADATA_FILES for ref in refs)
+        }
+
+    def unused_images(self, img_dir: Optional[Path] = None) -> List[Path]:
+        """Images in assets/img that no page, script, or stylesheet references."""
+        img_dir = Path(img_dir) if img_dir else self.root_dir / "assets" / "img"
+        used = self.referenced_images()
+        return sorted(
+            path for path in img_dir.iterdir()
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS and path.name not in used
+        )
+
+    def save(self):
+        """Persist the index if anything changed."""
+        if not self.dirty:
+            return
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_file, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f, separators=(",", ":"))
+        self.dirty = False
+
+
+def open_index(root_dir) -> ReferenceIndex:
+    """Load the index stored under root_dir/content and bring it up to date."""
+    root_dir = Path(root_dir)
+    index = ReferenceIndex(str(root_dir / "content"), str(root_dir))
+    index.update()
+    return index
+
+
+def main():
+    """Refresh the index and report image usage."""
+    parser = argparse.ArgumentParser(description="Index where images are referenced across the site")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--image", action="append", default=[], help="Show references to this image filename")
+    parser.add_argument("--unused", action="store_true", help="List images in assets/img that nothing references")
+    parser.add_argument("--output", help="Write the unused-images report as JSON")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    index = ReferenceIndex(str(root_dir / "content"), str(root_dir))
+    stats = index.update()
+    index.save()
+
+    print(f"Indexed {len(index.files)} files ({stats['scanned']} rescanned, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed)")
+    print(f"  {sum(len(refs) for refs in index.by_image.values())} references to {len(index.by_image)} images")
+
+    for filename in args.image:
+        refs = index.references(filename)
+        print(f"\n{filename}: {len(refs)} references")
+        for ref in refs:
+            print(f"  {ref['file']}:{ref['offset']} ({ref['attribute'] or '-'})")
+
+    if args.unused or args.output:
+        unused = index.unused_images()
+        total_bytes = sum(path.stat().st_size for path in unused)
+        print(f"\nUnused images: {len(unused)} ({total_bytes / 1024 / 1024:.1f} MB)")
+        if args.unused:
+            for path in unused:
+                print(f"  {path.name}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({
+                    "count": len(unused),
+                    "bytes": total_bytes,
+                    "images": [path.name for path in unused],
+                }, f, indent=2)
+            print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
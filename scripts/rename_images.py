@@ -10,6 +10,8 @@ import json
 from pathlib import Path
 from collections import defaultdict
 
+from reference_index import open_index
+
 def normalize_name(name):
     """Convert a name to a normalized format: lowercase with dashes."""
     # Remove leading numbers (timestamps)
@@ -161,15 +163,9 @@ def update_file_references(root_dir, mapping):
         old_filename = os.path.basename(old_path)
         filename_mapping[old_filename] = new_name
     
-    # Find all files that might reference images
-    text_files = []
-    for ext in ['.html', '.js', '.json', '.css', '.py', '.ts', '.tsx', '.jsx', '.md']:
-        for filepath in Path(root_dir).rglob(f'*{ext}'):
-            if filepath.is_file():
-                # Skip node_modules, .git, etc.
-                if any(skip in str(filepath) for skip in ['node_modules', '.git', '__pycache__', '.venv']):
-                    continue
-                text_files.append(filepath)
+    # Only files the reference index says mention a renamed image
+    index = open_index(root_dir)
+    text_files = index.files_referencing(filename_mapping)
     
     # Update references
     updated_files = []
@@ -203,6 +199,8 @@ def update_file_references(root_dir, mapping):
         except Exception as e:
             print(f"Error updating {filepath}: {e}")
     
+    index.update()
+    index.save()
     return updated_files
 
 def main():
@@ -10,10 +10,16 @@ Comprehensive image renaming script that:
 import os
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from collections import defaultdict
 from bs4 import BeautifulSoup
 
+from content_store import open_store
+from multi_replace import MultiReplacer
+from reference_index import iter_text_files, open_index
+from rename_journal import RenameTransaction, recover, staged_path
+
 def normalize_name(name):
     """Convert a name to a normalized format: lowercase with dashes."""
     if not name:
@@ -76,7 +82,14 @@ def extract_html_image_references(root_dir):
     """Extract image references from HTML files with alt text."""
     html_refs = {}
     
-    for html_file in Path(root_dir).rglob('*.html'):
+    # Only pages the reference index says use a local image need parsing
+    img_dir = Path(root_dir) / 'assets' / 'img'
+    index = open_index(root_dir)
+    index.save()
+    local_images = [p.name for p in img_dir.iterdir()] if img_dir.is_dir() else []
+    html_files = [p for p in index.files_referencing(local_images) if p.suffix == '.html']
+    
+    for html_file in html_files:
         try:
             with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
@@ -104,19 +117,25 @@ def extract_html_image_references(root_dir):
     
     return html_refs
 
-def extract_json_image_references(root_dir):
-    """Extract image references from assets.json with alt text and page context."""
-    json_refs = {}
-    assets_file = Path(root_dir) / 'content' / 'assets.json'
+def _downloaded_assets(root_dir):
+    """Downloaded asset records, from the content store when there is one, else assets.json."""
+    store = open_store(Path(root_dir) / 'content')
+    if store:
+        with store:
+            return store.assets(downloaded_only=True)
     
+    assets_file = Path(root_dir) / 'content' / 'assets.json'
     if not assets_file.exists():
-        return json_refs
+        return []
+    with open(assets_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('assets', [])
+
+def extract_json_image_references(root_dir):
+    """Extract image references from the asset records with alt text and page context."""
+    json_refs = {}
     
     try:
-        with open(assets_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for asset in data.get('assets', []):
+        for asset in _downloaded_assets(root_dir):
             alt_text = asset.get('alt', '').strip()
             page_url = asset.get('page_url', '')
             
@@ -163,7 +182,7 @@ def extract_json_image_references(root_dir):
                             'page_name': page_name
                         }
     except Exception as e:
-        print(f"Error processing assets.json: {e}")
+        print(f"Error reading asset records: {e}")
     
     return json_refs
 
@@ -302,11 +321,15 @@ def create_rename_mapping(base_groups, context_map):
     
     return mapping
 
-def fix_srcset_in_assets_json(assets_file, filename_mapping):
+def fix_srcset_in_assets_json(assets_file, filename_mapping, transaction=None):
     """Fix srcset strings in assets.json that contain old timestamped names."""
     try:
-        with open(assets_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if transaction:
+            # Build on any reference updates already staged for assets.json
+            data = json.loads(transaction.read_text(assets_file))
+        else:
+            with open(assets_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         updated = False
         
@@ -403,8 +426,11 @@ def fix_srcset_in_assets_json(assets_file, filename_mapping):
                             updated = True
         
         if updated:
-            with open(assets_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if transaction:
+                transaction.stage_rewrite(assets_file, json.dumps(data, indent=2, ensure_ascii=False))
+            else:
+                with open(assets_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
             return True
         
         return False
@@ -412,67 +438,80 @@ def fix_srcset_in_assets_json(assets_file, filename_mapping):
         print(f"Error fixing srcset in assets.json: {e}")
         return False
 
-def update_file_references(root_dir, mapping):
-    """Update all file references including srcset in JSON."""
+def find_text_files(root_dir):
+    """Find all files that might reference images."""
+    return list(iter_text_files(root_dir))
+
+# Per-process matcher for the worker pool, built once per worker
+_worker_replacer = None
+
+def _init_reference_worker(filename_mapping):
+    global _worker_replacer
+    _worker_replacer = MultiReplacer(filename_mapping)
+
+def _update_references_in_file(filepath, write=True, stage=False):
+    """Rewrite one file's references in a single scan; returns the path if it changed.
+
+    With stage=True the new content goes to the transaction's staged file
+    instead of replacing filepath.
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        
+        # Bare filenames cover assets/img/..., quoted paths and srcset entries alike
+        content, count = _worker_replacer.replace(content)
+        
+        if not count:
+            return None
+        if write:
+            target = staged_path(filepath) if stage else filepath
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(content)
+                if stage:
+                    f.flush()
+                    os.fsync(f.fileno())
+        return str(filepath)
+    except Exception as e:
+        print(f"Error updating {filepath}: {e}")
+    return None
+
+def update_file_references(root_dir, mapping, workers=None, write=True, transaction=None):
+    """Update all file references including srcset in JSON.
+
+    With a transaction, rewrites are staged into it rather than applied.
+    """
     # Create reverse mapping: old filename -> new filename
     filename_mapping = {}
     for old_path, new_name in mapping.items():
         old_filename = os.path.basename(old_path)
         filename_mapping[old_filename] = new_name
     
-    # Find all files that might reference images
-    text_files = []
-    for ext in ['.html', '.js', '.json', '.css', '.py', '.ts', '.tsx', '.jsx', '.md']:
-        for filepath in Path(root_dir).rglob(f'*{ext}'):
-            if filepath.is_file():
-                # Skip node_modules, .git, etc.
-                if any(skip in str(filepath) for skip in ['node_modules', '.git', '__pycache__', '.venv', '.cursor']):
-                    continue
-                text_files.append(filepath)
-    
-    updated_files = []
-    
-    for filepath in text_files:
-        try:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            original_content = content
-            
-            # Update direct filename references
-            for old_filename, new_filename in filename_mapping.items():
-                # Skip if already updated
-                if old_filename == new_filename:
-                    continue
-                
-                # Replace in various path formats
-                patterns = [
-                    (f'assets/img/{old_filename}', f'assets/img/{new_filename}'),
-                    (f'/assets/img/{old_filename}', f'/assets/img/{new_filename}'),
-                    (f'"assets/img/{old_filename}"', f'"assets/img/{new_filename}"'),
-                    (f"'assets/img/{old_filename}'", f"'assets/img/{new_filename}'"),
-                ]
-                
-                for old_pattern, new_pattern in patterns:
-                    content = content.replace(old_pattern, new_pattern)
-            
-            # Update direct filename references in srcset
-            for old_filename, new_filename in filename_mapping.items():
-                if old_filename != new_filename:
-                    # Direct filename replacement
-                    content = re.sub(
-                        rf'\b{re.escape(old_filename)}\b',
-                        new_filename,
-                        content
-                    )
-            
-            if content != original_content:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                updated_files.append(str(filepath))
-        except Exception as e:
-            print(f"Error updating {filepath}: {e}")
-    
+    # Only files the reference index says mention a renamed image
+    index = open_index(root_dir)
+    text_files = [str(p) for p in index.files_referencing(filename_mapping)]
+    
+    # One combined matcher per worker instead of a replace per rename per file
+    stage = transaction is not None
+    if stage:
+        # Journaled first, so staged files are cleaned up even if a worker dies after writing one
+        transaction.reserve_rewrites(text_files)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_reference_worker(filename_mapping)
+        results = [_update_references_in_file(p, write, stage) for p in text_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_reference_worker,
+                                 initargs=(filename_mapping,)) as pool:
+            results = list(pool.map(_update_references_in_file, text_files, [write] * len(text_files),
+                                    [stage] * len(text_files), chunksize=8))
+    
+    updated_files = [path for path in results if path]
+    if stage:
+        transaction.release_rewrites(updated_files)
+    elif write:
+        index.update()
+    index.save()
     return updated_files
 
 def main():
@@ -489,6 +528,12 @@ def main():
     print(f"Image directory: {img_dir}")
     print()
     
+    # Never start on top of a half-applied earlier run
+    outcome = recover(root_dir)
+    if outcome:
+        print(f"Found an interrupted rename transaction: {outcome}")
+        print()
+    
     # Step 1: Build context mapping
     print("Step 1: Building context mapping...")
     context_map = build_context_mapping(root_dir)
@@ -531,42 +576,54 @@ def main():
         print(f"Auto-confirming: proceeding with renaming {len(actual_renames)} files...")
         print()
     
-    # Step 4: Update references first (before renaming files)
-    print("Step 4: Updating file references...")
-    updated_files = update_file_references(root_dir, actual_renames)
-    
-    # Special handling for assets.json srcset
-    assets_file = root_dir / 'content' / 'assets.json'
-    if assets_file.exists():
-        print("Fixing srcset strings in assets.json...")
-        if fix_srcset_in_assets_json(assets_file, {os.path.basename(k): v for k, v in actual_renames.items()}):
-            print("Updated srcset strings in assets.json")
-            if str(assets_file) not in updated_files:
-                updated_files.append(str(assets_file))
-    
-    print(f"Updated {len(updated_files)} files with new references")
-    print()
-    
-    # Step 5: Rename files
-    print("Step 5: Renaming files...")
-    renamed_count = 0
+    # Step 4: Stage renames; refused ones keep their old references
+    print("Step 4: Staging renames...")
+    transaction = RenameTransaction(root_dir)
     errors = []
+    for old_path, new_name in list(actual_renames.items()):
+        reason = transaction.stage_rename(old_path, Path(old_path).parent / new_name)
+        if reason:
+            errors.append(f"Warning: {reason}, skipping {old_path}")
+            del actual_renames[old_path]
+    for old_rel, reason in transaction.drop_conflicts().items():
+        errors.append(f"Warning: {reason}, skipping {old_rel}")
+        actual_renames.pop(str(root_dir / old_rel), None)
+    print(f"Staged {len(transaction.renames)} renames")
+    print()
     
-    for old_path, new_name in actual_renames.items():
-        old_file = Path(old_path)
-        new_file = old_file.parent / new_name
-        
-        if new_file.exists():
-            errors.append(f"Warning: {new_file} already exists, skipping {old_file}")
-            continue
+    # Step 5: Stage reference updates (in parallel) without touching the tree
+    print("Step 5: Staging file reference updates...")
+    try:
+        updated_files = update_file_references(root_dir, actual_renames, transaction=transaction)
         
-        try:
-            old_file.rename(new_file)
-            renamed_count += 1
-        except Exception as e:
-            errors.append(f"Error renaming {old_file}: {e}")
+        # Special handling for assets.json srcset
+        assets_file = root_dir / 'content' / 'assets.json'
+        if assets_file.exists():
+            print("Fixing srcset strings in assets.json...")
+            if fix_srcset_in_assets_json(assets_file, {os.path.basename(k): v for k, v in actual_renames.items()},
+                                         transaction):
+                print("Updated srcset strings in assets.json")
+                if str(assets_file) not in updated_files:
+                    updated_files.append(str(assets_file))
+    except BaseException:
+        transaction.discard()
+        raise
+    
+    print(f"Staged {len(updated_files)} files with new references")
+    print()
     
-    print(f"Renamed {renamed_count} files")
+    # Step 6: Apply every rewrite and rename in one journaled step
+    print("Step 6: Committing...")
+    transaction.commit()
+    open_index(root_dir).save()
+    print(f"Renamed {len(transaction.renames)} files and updated {len(transaction.rewrites)} files")
+    
+    # The SQLite content store is not a text file; update it once the files are in place
+    store = open_store(root_dir / 'content')
+    if store:
+        with store:
+            rows = store.rewrite_references({os.path.basename(k): v for k, v in actual_renames.items()})
+        print(f"Updated {rows} rows in {store.path}")
     
     if errors:
         print(f"\n{len(errors)} errors/warnings:")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Transactional Bulk Rename
+Stages every file rewrite to a temp file, then applies all rewrites and
+renames in one commit step guarded by a write-ahead journal. Staged files are
+journaled before they are written, so a crash or error at any point can be
+rolled back: the tree is never left half-renamed or littered with them.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+JOURNAL_NAME = "rename-journal.json"
+
+# Journal states, in commit order
+STAGING = "staging"        # staged files being written, nothing else on disk changed
+PREPARED = "prepared"      # rewrites staged, nothing on disk changed yet
+MOVED_ASIDE = "moved-aside"  # rename sources parked under temp names
+COMMITTED = "committed"    # every rewrite and rename applied
+
+
+def _sibling(path: Path, tag: str) -> Path:
+    """Hidden file next to path, on the same filesystem so renames stay atomic."""
+    return path.with_name(f".{path.name}.{tag}")
+
+
+def staged_path(path) -> Path:
+    """Where the staged rewrite of path is written."""
+    return _sibling(Path(path), "rename-new")
+
+
+def _fsync_write(path: Path, content: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class RenameTransaction:
+    """Collects rewrites and renames, then applies them all-or-nothing."""
+
+    def __init__(self, root_dir: str = ".", journal_dir: Optional[str] = None):
+        self.root_dir = Path(root_dir)
+        self.journal_file = Path(journal_dir or self.root_dir / ".cache") / JOURNAL_NAME
+        self.rewrites: Dict[str, str] = {}  # path -> staged temp file
+        self.renames: Dict[str, str] = {}   # source -> destination
+
+    def _rel(self, path) -> str:
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.root_dir / path
+        return path.resolve().relative_to(self.root_dir.resolve()).as_posix()
+
+    def _abs(self, rel: str) -> Path:
+        return self.root_dir / rel
+
+    # Staging ----------------------------------------------------------------
+
+    def stage_rewrite(self, path, content: str):
+        """Write the new content of path to a temp file beside it."""
+        rel = self._rel(path)
+        self.reserve_rewrites([rel])
+        _fsync_write(staged_path(self._abs(rel)), content)
+
+    def reserve_rewrites(self, paths):
+        """Journal that staged rewrites of paths may be written, before anything (a worker, say) writes one."""
+        for path in paths:
+            rel = self._rel(path)
+            self.rewrites[rel] = staged_path(self._abs(rel)).name
+        self._write_journal(STAGING)
+
+    def release_rewrites(self, keep):
+        """Drop reserved rewrites of every path not in keep, with anything a failed worker staged for them."""
+        keep = {self._rel(path) for path in keep}
+        for rel in [rel for rel in self.rewrites if rel not in keep]:
+            self._abs(rel).with_name(self.rewrites.pop(rel)).unlink(missing_ok=True)
+        self._write_journal(STAGING)
+
+    def read_text(self, path) -> str:
+        """Current content of path, including any staged rewrite."""
+        rel = self._rel(path)
+        source = self._abs(rel).with_name(self.rewrites[rel]) if rel in self.rewrites else self._abs(rel)
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def stage_rename(self, source, destination) -> Optional[str]:
+        """Queue a rename; returns the reason if it was refused."""
+        src = self._rel(source)
+        dst = self._rel(destination)
+        if src == dst:
+            return None
+        if dst in self.renames.values():
+            return f"{dst} is already the target of another rename"
+        self.renames[src] = dst
+        return None
+
+    def drop_conflicts(self) -> Dict[str, str]:
+        """Drop renames whose destination stays occupied; returns {source: reason}.
+
+        A destination is free if nothing is there or its file is itself being
+        renamed away, so queue order does not matter for chains and swaps.
+        """
+        dropped = {}
+        changed = True
+        while changed:
+            changed = False
+            for src, dst in list(self.renames.items()):
+                if self._abs(dst).exists() and dst not in self.renames:
+                    dropped[src] = f"{dst} already exists"
+                    del self.renames[src]
+                    changed = True
+        return dropped
+
+    def discard(self):
+        """Drop staged temp files and their journal without touching the tree."""
+        for rel, temp in self.rewrites.items():
+            self._abs(rel).with_name(temp).unlink(missing_ok=True)
+        self.rewrites.clear()
+        self.renames.clear()
+        self.journal_file.unlink(missing_ok=True)
+
+    # Commit -------------------------------------------------------------------
+
+    def _write_journal(self, state: str):
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        journal = {
+            "state": state,
+            "root": str(self.root_dir.resolve()),
+            "rewrites": [
+                {"path": rel, "staged": temp, "backup": _sibling(self._abs(rel), "rename-bak").name}
+                for rel, temp in sorted(self.rewrites.items())
+            ],
+            "renames": [
+                {"source": src, "destination": dst, "aside": _sibling(self._abs(src), "rename-aside").name}
+                for src, dst in sorted(self.renames.items())
+            ],
+        }
+        temp = _sibling(self.journal_file, "tmp")
+        _fsync_write(temp, json.dumps(journal, indent=2))
+        os.replace(temp, self.journal_file)
+
+    def commit(self, keep_backups: bool = False):
+        """Apply all staged work; rolls everything back if any step fails."""
+        # Validate before anything on disk changes
+        sources = set(self.renames)
+        for src, dst in self.renames.items():
+            if not self._abs(src).exists():
+                raise FileNotFoundError(f"Rename source missing: {src}")
+            if self._abs(dst).exists() and dst not in sources:
+                raise FileExistsError(f"Rename destination exists: {dst}")
+        overlap = set(self.rewrites) & sources
+        if overlap:
+            raise ValueError(f"Files both rewritten and renamed: {', '.join(sorted(overlap))}")
+
+        # A stale backup from an earlier run must never be "restored" by a rollback
+        for rel in self.rewrites:
+            _sibling(self._abs(rel), "rename-bak").unlink(missing_ok=True)
+
+        try:
+            self._write_journal(PREPARED)
+        except BaseException:
+            self.discard()
+            raise
+        try:
+            # Rewrites: keep a hard link to the original, then swap the new file in atomically
+            for rel, temp in self.rewrites.items():
+                path = self._abs(rel)
+                backup = _sibling(path, "rename-bak")
+                try:
+                    os.link(path, backup)
+                except OSError:
+                    shutil.copy2(path, backup)
+                os.replace(path.with_name(temp), path)
+
+            # Renames in two phases, so swaps and chains (a->b, b->c) never collide
+            for src in self.renames:
+                os.rename(self._abs(src), _sibling(self._abs(src), "rename-aside"))
+            self._write_journal(MOVED_ASIDE)
+            for src, dst in self.renames.items():
+                os.rename(_sibling(self._abs(src), "rename-aside"), self._abs(dst))
+
+            self._write_journal(COMMITTED)
+        except BaseException:
+            rollback(self.journal_file)
+            raise
+
+        if not keep_backups:
+            finish(self.journal_file)
+
+
+def _load_journal(journal_file: Path) -> Optional[Dict]:
+    if not journal_file.exists():
+        return None
+    with open(journal_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rollback(journal_file) -> bool:
+    """Undo a transaction from its journal, whatever state it reached."""
+    journal_file = Path(journal_file)
+    journal = _load_journal(journal_file)
+    if not journal:
+        return False
+    root = Path(journal["root"])
+
+    # Renames: once sources were parked, any existing destination came from this transaction
+    if journal["state"] in (MOVED_ASIDE, COMMITTED):
+        for op in reversed(journal["renames"]):
+            dst = root / op["destination"]
+            aside = (root / op["source"]).with_name(op["aside"])
+            if dst.exists() and not aside.exists():
+                os.rename(dst, aside)
+    for op in reversed(journal["renames"]):
+        src = root / op["source"]
+        aside = src.with_name(op["aside"])
+        if aside.exists() and not src.exists():
+            os.rename(aside, src)
+
+    # Rewrites: restore each original from its backup and drop staged files
+    for op in journal["rewrites"]:
+        path = root / op["path"]
+        backup = path.with_name(op["backup"])
+        # While staging, a backup can only be left over from an earlier run
+        if journal["state"] != STAGING and backup.exists():
+            # rename() is a no-op between two links to one file, so drop the spare link instead
+            if path.exists() and os.path.samefile(backup, path):
+                backup.unlink()
+            else:
+                os.replace(backup, path)
+        path.with_name(op["staged"]).unlink(missing_ok=True)
+
+    journal_file.unlink()
+    return True
+
+
+def finish(journal_file) -> bool:
+    """Drop backups and the journal of a committed transaction."""
+    journal_file = Path(journal_file)
+    journal = _load_journal(journal_file)
+    if not journal or journal["state"] != COMMITTED:
+        return False
+    root = Path(journal["root"])
+    for op in journal["rewrites"]:
+        (root / op["path"]).with_name(op["backup"]).unlink(missing_ok=True)
+    journal_file.unlink()
+    return True
+
+
+def recover(root_dir: str = ".") -> Optional[str]:
+    """Resolve a journal left by an interrupted run: roll back, or finish if it committed."""
+    journal_file = Path(root_dir) / ".cache" / JOURNAL_NAME
+    journal = _load_journal(journal_file)
+    if not journal:
+        return None
+    if journal["state"] == COMMITTED:
+        finish(journal_file)
+        return "finished"
+    rollback(journal_file)
+    return "rolled back"
+
+
+def main():
+    """Inspect, roll back or finish a pending rename transaction."""
+    parser = argparse.ArgumentParser(description="Manage the bulk rename journal")
+    parser.add_argument("command", choices=["status", "recover", "rollback", "finish"],
+                        help="recover: roll back unless committed; rollback: undo even a committed run")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    args = parser.parse_args()
+
+    journal_file = Path(args.root) / ".cache" / JOURNAL_NAME
+    journal = _load_journal(journal_file)
+    if not journal:
+        print("No pending rename transaction")
+        return
+
+    if args.command == "status":
+        print(f"Transaction {journal['state']}: {len(journal['rewrites'])} rewrites, "
+              f"{len(journal['renames'])} renames")
+    elif args.command == "recover":
+        print(f"Transaction {recover(args.root)}")
+    elif args.command == "rollback":
+        rollback(journal_file)
+        print("Transaction rolled back")
+    elif args.command == "finish":
+        print("Transaction finished" if finish(journal_file) else "Transaction has not committed; use rollback")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@
 import re
 from pathlib import Path
 
+from multi_replace import MultiReplacer
+from reference_index import open_index
+
 
 BASE_PATTERN = re.compile(r"(spain-france-tra\d+)")
 
@@ -25,6 +28,7 @@ def main() -> None:
         return
 
     # Rename all spain-france-tra* files (avif, webp, jpeg and responsive variants)
+    renames = {}
     for pattern in ("spain-france-tra*.avif", "spain-france-tra*.webp", "spain-france-tra*.jpeg"):
         for src in sorted(images_dir.glob(pattern)):
             m = BASE_PATTERN.match(src.stem)
@@ -46,6 +50,20 @@ def main() -> None:
 
             print(f"{src.name} -> {dst.name}")
             src.rename(dst)
+            renames[src.name] = dst.name
+
+    # Point existing references at the new names, touching only files that use them
+    if renames:
+        index = open_index(".")
+        replacer = MultiReplacer(renames)
+        for path in index.files_referencing(renames):
+            content = path.read_text(encoding="utf-8")
+            updated, count = replacer.replace(content)
+            if count:
+                path.write_text(updated, encoding="utf-8")
+                print(f"Updated {count} references in {path}")
+        index.update()
+        index.save()
 
     print("Done.")
 
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+HTML Rewrite Engine
+Applies an ordered registry of precompiled rewrite rules to each page with a
+single read and write per file, in parallel, with a dry-run diff mode.
+Every rule is timed per file and can be held to a hard timeout.
+"""
+
+import argparse
+import difflib
+import os
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class RuleTimeout(Exception):
+    """Raised when a rule exceeds its time budget on one document."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Interrupt the enclosed block after seconds (the re engine checks signals)."""
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise RuleTimeout(f"exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# Generous next to the few milliseconds a healthy rule needs on the largest page
+DEFAULT_RULE_TIMEOUT = 5.0
+
+
+class RewriteRule:
+    """A named, precompiled substitution with cheap substring guards."""
+
+    __slots__ = ("name", "pattern", "replacement", "trigger", "unless", "count")
+
+    def __init__(self, name: str, pattern: str, replacement, trigger: Optional[str] = None,
+                 unless: Optional[str] = None, count: int = 0, flags: int = 0):
+        # replacement is a re template string or a module-level callable (workers pickle it)
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.replacement = replacement
+        self.trigger = trigger
+        self.unless = unless
+        self.count = count
+
+    def applies_to(self, content: str) -> bool:
+        """Skip the regex scan entirely when the page cannot match."""
+        if self.trigger is not None and self.trigger not in content:
+            return False
+        if self.unless is not None and self.unless in content:
+            return False
+        return True
+
+    def apply(self, content: str) -> Tuple[str, int]:
+        """Apply the rule; returns (content, replacements made)."""
+        if not self.applies_to(content):
+            return content, 0
+        return self.pattern.subn(self.replacement, content, count=self.count)
+
+
+def apply_rules(content: str, rules: List[RewriteRule], timings: Optional[Dict[str, float]] = None,
+                timeout: Optional[float] = None, timed_out: Optional[List[str]] = None) -> Tuple[str, Dict[str, int]]:
+    """Run every rule in order over one document; returns (content, hits per rule).
+
+    Per-rule seconds are added to timings. A rule that exceeds timeout is
+    skipped for this document and its name appended to timed_out.
+    """
+    hits = {}
+    for rule in rules:
+        started = time.perf_counter()
+        try:
+            with deadline(timeout):
+                updated, count = rule.apply(content)
+        except RuleTimeout:
+            if timed_out is not None:
+                timed_out.append(rule.name)
+            updated, count = content, 0
+        if timings is not None:
+            timings[rule.name] = timings.get(rule.name, 0.0) + time.perf_counter() - started
+        content = updated
+        if count:
+            hits[rule.name] = hits.get(rule.name, 0) + count
+    return content, hits
+
+
+def rewrite_file(file_path, rules: List[RewriteRule], dry_run: bool = False,
+                 timeout: Optional[float] = None) -> Dict:
+    """Rewrite one page in place (or diff it in dry-run mode)."""
+    path = Path(file_path)
+    result = {"name": path.name, "changed": False, "hits": {}, "timings": {}, "timeouts": [],
+              "diff": None, "error": None}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            original = f.read()
+
+        content, result["hits"] = apply_rules(original, rules, result["timings"], timeout, result["timeouts"])
+        if content == original:
+            return result
+
+        result["changed"] = True
+        if dry_run:
+            result["diff"] = "".join(difflib.unified_diff(
+                original.splitlines(keepends=True),
+                content.splitlines(keepends=True),
+                fromfile=f"a/{path.name}",
+                tofile=f"b/{path.name}"
+            ))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+# Per-process rule registry for the worker pool
+_worker_rules: List[RewriteRule] = []
+
+
+def _init_worker(rules: List[RewriteRule]):
+    global _worker_rules
+    _worker_rules = rules
+
+
+def _rewrite_in_worker(file_path: str, dry_run: bool, timeout: Optional[float]) -> Dict:
+    return rewrite_file(file_path, _worker_rules, dry_run, timeout)
+
+
+def rewrite_files(files: List[Path], rules: List[RewriteRule], dry_run: bool = False,
+                  workers: Optional[int] = None, timeout: Optional[float] = None) -> List[Dict]:
+    """Rewrite many pages, fanning out to worker processes when worthwhile."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) < 2 * workers:
+        return [rewrite_file(path, rules, dry_run, timeout) for path in files]
+
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules,)) as pool:
+        return list(pool.map(_rewrite_in_worker, [str(p) for p in files], [dry_run] * len(files),
+                             [timeout] * len(files), chunksize=chunksize))
+
+
+def run_cli(rules: List[RewriteRule], description: str):
+    """Shared command-line entry point for the fix_* scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--dry-run", action="store_true", help="Print a unified diff instead of writing files")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_RULE_TIMEOUT,
+                        help=f"Per-rule, per-file time limit in seconds (default: {DEFAULT_RULE_TIMEOUT})")
+    parser.add_argument("--timings", action="store_true", help="Print time spent in each rule")
+    args = parser.parse_args()
+
+    html_files = sorted(Path(args.root).glob("*.html"))
+    print(f"Found {len(html_files)} HTML files")
+
+    started = time.perf_counter()
+    results = rewrite_files(html_files, rules, args.dry_run, args.workers, args.timeout)
+    elapsed = time.perf_counter() - started
+
+    fixed_count = 0
+    totals: Dict[str, int] = {}
+    seconds: Dict[str, float] = {}
+    slowest: Dict[str, Tuple[float, str]] = {}
+    for result in results:
+        if result["error"]:
+            print(f"Error processing {result['name']}: {result['error']}")
+            continue
+        for name in result["timeouts"]:
+            print(f"Timeout: rule {name} skipped on {result['name']} after {args.timeout}s")
+        for name, count in result["hits"].items():
+            totals[name] = totals.get(name, 0) + count
+        for name, spent in result["timings"].items():
+            seconds[name] = seconds.get(name, 0.0) + spent
+            if spent > slowest.get(name, (0.0, ""))[0]:
+                slowest[name] = (spent, result["name"])
+        if result["changed"]:
+            fixed_count += 1
+            if args.dry_run:
+                print(result["diff"], end="")
+            else:
+                print(f"Fixed: {result['name']}")
+
+    verb = "Would fix" if args.dry_run else "Fixed"
+    print(f"\n{verb} {fixed_count} files in {elapsed:.2f}s")
+    for rule in rules:
+        if rule.name in totals:
+            print(f"  {rule.name}: {totals[rule.name]} replacements")
+
+    if args.timings:
+        print("\nRule timings:")
+        for rule in rules:
+            spent, page = slowest.get(rule.name, (0.0, "-"))
+            print(f"  {rule.name}: {seconds.get(rule.name, 0.0) * 1000:.1f} ms total, "
+                  f"slowest {spent * 1000:.1f} ms ({page})")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Legacy Gallery Rewriter
+Replaces the dead viamagus/galleria builder galleries on legacy tour pages
+with responsive <picture> grids pointing at the AVIF/WebP derivatives already
+in assets/img, and strips empty builder wrappers. Reports bytes saved per page.
+"""
+
+import argparse
+import html as html_lib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from asset_manifest import AssetManifest
+from generate_picture_html import generate_picture_html
+from html_tags import element_end
+
+BREAKPOINTS = [320, 640, 768, 1024, 1280]
+GALLERY_SIZES = "(max-width: 640px) 100vw, (max-width: 1024px) 50vw, 33vw"
+
+# Builder elements that render nothing once the viamagus runtime is gone
+EMPTY_WRAPPER_CLASSES = {"viamagus-component-bg-colour", "viamagus-component-content", "viamagus-spacer"}
+
+
+def _line_offsets(text: str) -> List[int]:
+    """Return the offset at which each (1-based) source line starts."""
+    offsets = [0, 0]
+    pos = text.find("\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = text.find("\n", pos + 1)
+    return offsets
+
+
+def _span(tag: Tag, text: str, lines: List[int]) -> Optional[Tuple[int, int]]:
+    """Locate a parsed tag's exact source span."""
+    if tag.sourceline is None:
+        return None
+    start = lines[tag.sourceline] + tag.sourcepos
+    return start, element_end(text, start, tag.name)
+
+
+def picture_for(url: str, alt: str, manifest: AssetManifest) -> Optional[str]:
+    """Build a <picture> for a legacy image URL from its local derivatives."""
+    path = manifest.resolve(url)
+    if not path:
+        return None
+
+    stem = path.stem
+    assets_dir = manifest.assets_dir
+    if not ((assets_dir / f"{stem}.avif").exists() or any(assets_dir.glob(f"{stem}-*w.avif"))):
+        return None
+
+    breakpoints = [
+        bp for bp in BREAKPOINTS
+        if (assets_dir / f"{stem}-{bp}w.avif").exists() and (assets_dir / f"{stem}-{bp}w.webp").exists()
+    ]
+    dims = manifest.get_dimensions(path) or (None, None)
+
+    return generate_picture_html(
+        stem,
+        html_lib.escape(alt, quote=True),
+        sizes=GALLERY_SIZES,
+        class_name="gallery-img",
+        width=dims[0],
+        height=dims[1],
+        breakpoints=breakpoints,
+        fallback_src=f"/assets/img/{path.name}"
+    ).replace("<picture>", '<picture class="gallery-picture">', 1)
+
+
+def gallery_html(urls: List[str], alt_base: str, manifest: AssetManifest) -> str:
+    """Render a gallery grid compatible with the lightbox in js/main.js."""
+    items = []
+    for index, url in enumerate(urls, 1):
+        asset = manifest.asset_for(url) or {}
+        alt = asset.get("alt") or f"{alt_base} photo {index}"
+        path = manifest.resolve(url)
+        href = f"/assets/img/{path.name}" if path else url
+
+        picture = picture_for(url, alt, manifest)
+        if not picture:
+            picture = f'<img src="{html_lib.escape(url, quote=True)}" alt="{html_lib.escape(alt, quote=True)}" class="gallery-img" loading="lazy" decoding="async">'
+
+        items.append(
+            f'<div class="gallery-item-wrapper">\n'
+            f'  <a href="{html_lib.escape(href, quote=True)}" data-lightbox="gallery">\n'
+            f'    {picture}\n'
+            f'  </a>\n'
+            f'</div>'
+        )
+    return '<div class="grid grid--3 grid--gap-sm">\n' + "\n".join(items) + "\n</div>"
+
+
+def _is_empty_wrapper(tag: Tag) -> bool:
+    """Check for builder wrappers with no content left to render."""
+    classes = set(tag.get("class", []))
+    if not classes & EMPTY_WRAPPER_CLASSES:
+        return False
+    if tag.get_text(strip=True):
+        return False
+    return tag.find(["img", "picture", "iframe", "video", "svg", "form", "input", "a"]) is None
+
+
+def rewrite_page(text: str, manifest: AssetManifest) -> str:
+    """Rewrite galleries and strip dead wrappers in a single page."""
+    soup = BeautifulSoup(text, "html.parser")
+    lines = _line_offsets(text)
+    title = soup.title.get_text(strip=True) if soup.title else "Tour"
+
+    edits: List[Tuple[int, int, str]] = []
+
+    for gallery in soup.select(".viamagus-component.galleria"):
+        urls = []
+        for img in gallery.find_all("img"):
+            src = img.get("src")
+            if src and src not in urls:
+                urls.append(src)
+        span = _span(gallery, text, lines)
+        if span and urls:
+            edits.append((span[0], span[1], gallery_html(urls, title, manifest)))
+        elif span:
+            edits.append((span[0], span[1], ""))
+
+    for wrapper in soup.find_all(class_=lambda c: c and c in EMPTY_WRAPPER_CLASSES):
+        if _is_empty_wrapper(wrapper):
+            span = _span(wrapper, text, lines)
+            if span:
+                edits.append((span[0], span[1], ""))
+
+    # Apply outermost edits only, from the end so offsets stay valid
+    edits.sort(key=lambda e: (e[0], -e[1]))
+    applied: List[Tuple[int, int, str]] = []
+    for edit in edits:
+        if applied and edit[0] < applied[-1][1]:
+            continue
+        applied.append(edit)
+
+    for start, end, replacement in reversed(applied):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+# Per-process manifest for the worker pool
+_worker_manifest: Optional[AssetManifest] = None
+
+
+def _init_worker(root_dir: str):
+    global _worker_manifest
+    _worker_manifest = AssetManifest(os.path.join(root_dir, "content"), root_dir)
+
+
+def process_html_file(file_path: str, dry_run: bool = False) -> Tuple[str, int, int, int]:
+    """Rewrite one page; returns (name, bytes before, bytes after, pictures added)."""
+    path = Path(file_path)
+    original = path.read_text(encoding="utf-8")
+    updated = rewrite_page(original, _worker_manifest)
+    if updated != original and not dry_run:
+        path.write_text(updated, encoding="utf-8")
+    pictures = updated.count('<picture class="gallery-picture">') - original.count('<picture class="gallery-picture">')
+    return path.name, len(original.encode("utf-8")), len(updated.encode("utf-8")), pictures
+
+
+def main():
+    """Rewrite legacy galleries across all HTML pages in parallel."""
+    parser = argparse.ArgumentParser(description="Rewrite legacy galleries to responsive <picture> grids")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing files")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    html_files = sorted(root_dir.glob("*.html"))
+    print(f"Found {len(html_files)} HTML files")
+
+    total_saved = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(str(root_dir),)) as pool:
+        futures = [pool.submit(process_html_file, str(p), args.dry_run) for p in html_files]
+        for future in futures:
+            try:
+                name, before, after, pictures = future.result()
+            except Exception as e:
+                print(f"  Error: {e}")
+                continue
+            if before != after:
+                saved = before - after
+                total_saved += saved
+                print(
+                    f"  {name}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB "
+                    f"({saved / 1024:+.1f} KB saved, {pictures} <picture> elements)"
+                )
+
+    print(f"\nTotal saved: {total_saved / 1024:.1f} KB{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
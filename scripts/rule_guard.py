@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Rewrite Rule Guard
+Detects catastrophic backtracking in rewrite rules before it reaches a build:
+times every rule on generated inputs of doubling size, fits how its cost grows,
+and flags rules that scale worse than linearly or hit the hard timeout.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from rewrite_engine import DEFAULT_RULE_TIMEOUT, RewriteRule, RuleTimeout, deadline
+
+SIZES = [16_384, 32_768, 65_536, 131_072, 262_144, 524_288]
+
+# Cost growth exponent above which a rule is flagged (1.0 = linear, 2.0 = quadratic)
+MAX_EXPONENT = 1.5
+
+# Below this, timings are dominated by noise and say nothing about growth
+MIN_SIGNAL_SECONDS = 0.002
+
+REPEATS = 3
+
+
+def _tile(seed: str, size: int) -> str:
+    """Repeat seed until it is size characters long."""
+    if not seed:
+        return ""
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def input_families(rule: RewriteRule, sample: str) -> Dict[str, Callable[[int], str]]:
+    """Generators for inputs of a given size that stress a rule differently."""
+    trigger = rule.trigger or ""
+    return {
+        # Realistic markup at increasing scale
+        "page": lambda size: _tile(sample, size),
+        # Repeated near-misses: the rule's trigger text, never completed
+        "near-miss": lambda size: _tile(f"{trigger}\n  <li>x</li>\n", size),
+        # One long whitespace run, the classic trap for leading \s+ groups
+        "whitespace": lambda size: trigger + " " * size + "<div",
+    }
+
+
+def time_rule(rule: RewriteRule, text: str, timeout: float) -> Optional[float]:
+    """Best-of-N seconds for one application, or None if it timed out."""
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        try:
+            with deadline(timeout):
+                # Run the pattern directly so triggers can't mask the cost
+                rule.pattern.subn(rule.replacement, text, count=rule.count)
+        except RuleTimeout:
+            return None
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def growth_exponent(sizes: List[int], seconds: List[float]) -> float:
+    """Least-squares slope of log(time) against log(size)."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def check_rule(rule: RewriteRule, sample: str, sizes: List[int], timeout: float) -> Dict:
+    """Measure a rule's scaling on every input family."""
+    result = {"rule": rule.name, "flagged": False, "families": {}}
+
+    for family, generate in input_families(rule, sample).items():
+        measured_sizes = []
+        seconds = []
+        timed_out_at = None
+        for size in sizes:
+            elapsed = time_rule(rule, generate(size), timeout)
+            if elapsed is None:
+                timed_out_at = size
+                break
+            measured_sizes.append(size)
+            seconds.append(elapsed)
+
+        exponent = None
+        if timed_out_at is None and len(seconds) >= 2 and seconds[-1] >= MIN_SIGNAL_SECONDS:
+            exponent = round(growth_exponent(measured_sizes, seconds), 2)
+
+        flagged = timed_out_at is not None or (exponent is not None and exponent > MAX_EXPONENT)
+        result["families"][family] = {
+            "sizes": measured_sizes,
+            "seconds": [round(s, 6) for s in seconds],
+            "exponent": exponent,
+            "timedOutAt": timed_out_at,
+            "flagged": flagged,
+        }
+        result["flagged"] = result["flagged"] or flagged
+
+    return result
+
+
+def load_rules(module_name: str) -> List[RewriteRule]:
+    """Import a fix_* module and return its RULES registry."""
+    return list(importlib.import_module(module_name).RULES)
+
+
+def main():
+    """Check every rule in a registry for super-linear growth."""
+    parser = argparse.ArgumentParser(description="Flag rewrite rules whose cost grows non-linearly")
+    parser.add_argument("--rules", default="fix_site", help="Module exposing RULES (default: fix_site)")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--sample", help="Page used as realistic input (default: largest HTML file)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_RULE_TIMEOUT, help="Per-run time limit in seconds")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1], help="Largest generated input in characters")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.sample:
+        sample_path = Path(args.sample)
+    else:
+        sample_path = max(Path(args.root).glob("*.html"), key=lambda p: p.stat().st_size)
+    sample = sample_path.read_text(encoding="utf-8")
+    sizes = [size for size in SIZES if size <= args.max_size]
+
+    rules = load_rules(args.rules)
+    print(f"Checking {len(rules)} rules from {args.rules} (sample: {sample_path.name})")
+
+    results = []
+    for rule in rules:
+        result = check_rule(rule, sample, sizes, args.timeout)
+        results.append(result)
+
+        status = "FLAGGED" if result["flagged"] else "ok"
+        details = []
+        for family, data in result["families"].items():
+            if data["timedOutAt"]:
+                details.append(f"{family}: timeout at {data['timedOutAt'] // 1024} KB")
+            elif data["exponent"] is not None:
+                details.append(f"{family}: n^{data['exponent']}")
+            else:
+                details.append(f"{family}: {data['seconds'][-1] * 1000:.1f} ms")
+        print(f"  [{status}] {rule.name} - {', '.join(details)}")
+
+    flagged = [r["rule"] for r in results if r["flagged"]]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"maxExponent": MAX_EXPONENT, "rules": results, "flagged": flagged}, f, indent=2)
+        print(f"\nWrote report to {args.output}")
+
+    if flagged:
+        print(f"\n{len(flagged)} rule(s) scale super-linearly: {', '.join(flagged)}")
+        raise SystemExit(1)
+    print("\nAll rules scale linearly")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,29 @@ Scrapes all content from motorover.in and extracts structured data.
 
 import argparse
 import json
+import os
 import re
 import time
 import urllib.parse
 import urllib.robotparser
-import xml.etree.ElementTree as ET
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Set, Optional, Any
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup, Tag, NavigableString
 
+import instrumentation
+from content_store import ContentStore, DB_NAME, build_hierarchy
+from entity_store import EntityStore
+from fetchers import HttpFetcher, LocalFetcher
+from instrumentation import Metrics
+from page_text import PageText
+from records import Asset, ContentBlock, Image, Page, Tour, save_json
+from sitemap_reader import read_sitemap_urls
+from url_canon import resolve_url, site_url
+
 
 class MotoRoverScraper:
     """Scraper for motorover.in website."""
@@ -29,55 +39,61 @@ class MotoRoverScraper:
     MAX_DEPTH = 10
     USER_AGENT = "MotoRoverScraper/1.0 (+https://www.motorover.in)"
     
-    def __init__(self, output_dir: str = "content"):
+    # Run once per page over the text of the whole document
+    DURATION_PATTERN = re.compile(r"(\d+)\s*(?:days?|nights?)", re.I)
+    DATE_PATTERNS = [
+        re.compile(r"\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}", re.I),
+        re.compile(r"\d{4}-\d{2}-\d{2}", re.I)
+    ]
+    EMAIL_PATTERN = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+    PHONE_PATTERN = re.compile(r"[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,9}")
+    
+    def __init__(self, output_dir: str = "content", fetcher=None, metrics: Optional[Metrics] = None,
+                 store: Optional[ContentStore] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        # SQLite content store to upsert into; the JSON files are written when there is none
+        self.store = store
+        # HttpFetcher for the live site, LocalFetcher for the checked-in pages
+        self.fetcher = fetcher or HttpFetcher(self.USER_AGENT, delay=self.RATE_LIMIT)
+        self.metrics = metrics or Metrics("scraper")
         
         self.visited_urls: Set[str] = set()
+        # Requested URL -> {"to": final URL, "hops": [{"status", "from", "to"}, ...]}
+        self.redirects: Dict[str, Dict] = {}
         self.url_queue: deque = deque()
-        self.pages_data: List[Dict] = []
-        self.assets: List[Dict] = []
-        self.entities: Dict[str, List] = {
-            "tours": [],
-            "team": [],
-            "faqs": [],
-            "testimonials": [],
-            "payments": [],
-            "contact": []
-        }
-        
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.USER_AGENT})
-        
-        # Check robots.txt
+        self.pages_data: List[Page] = []
+        self.assets: List[Asset] = []
+        # Keyed by natural identity; an entity found on many pages is kept once
+        self.entities = EntityStore()
+        # Text of the page being extracted; see page_text()
+        self._page_text: Optional[PageText] = None
+        
+        # Check robots.txt (only meaningful when fetching from the live site)
         self.robots_parser = urllib.robotparser.RobotFileParser()
         self.robots_parser.set_url(f"{self.BASE_URL}/robots.txt")
-        try:
-            self.robots_parser.read()
-        except:
-            pass  # Continue if robots.txt is not accessible
+        if self.fetcher.remote:
+            try:
+                self.robots_parser.read()
+            except:
+                pass  # Continue if robots.txt is not accessible
     
     def load_urls_from_sitemap(self, sitemap_path: str = "sitemap.xml") -> List[str]:
-        """Load all URLs from sitemap.xml file."""
+        """Load all URLs from sitemap.xml file (or a sitemap index, gzipped or not)."""
         sitemap_file = Path(sitemap_path)
         if not sitemap_file.exists():
             print(f"Sitemap file not found: {sitemap_path}")
             return []
         
         try:
-            tree = ET.parse(sitemap_file)
-            root = tree.getroot()
-            ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-            
             urls = []
-            for url_elem in root.findall("ns:url", ns):
-                loc_elem = url_elem.find("ns:loc", ns)
-                if loc_elem is not None and loc_elem.text:
-                    url = loc_elem.text.strip()
-                    # Normalize URL
-                    normalized = self.normalize_url(url)
-                    if normalized:
-                        urls.append(normalized)
+            for url in read_sitemap_urls(sitemap_file):
+                # Normalize URL
+                normalized = self.normalize_url(url)
+                if normalized:
+                    urls.append(normalized)
+            # Variants of one URL (index.html and "/", say) are scraped once
+            urls = list(dict.fromkeys(urls))
             
             print(f"Loaded {len(urls)} URLs from sitemap.xml")
             return urls
@@ -87,41 +103,16 @@ class MotoRoverScraper:
     
     def is_allowed(self, url: str) -> bool:
         """Check if URL is allowed by robots.txt."""
+        if not self.fetcher.remote:
+            return True
         try:
             return self.robots_parser.can_fetch(self.USER_AGENT, url)
         except:
             return True
     
     def normalize_url(self, url: str, base_url: str = None) -> Optional[str]:
-        """Normalize and validate URL."""
-        if not url:
-            return None
-        
-        # Handle relative URLs
-        if base_url:
-            url = urljoin(base_url, url)
-        
-        parsed = urlparse(url)
-        
-        # Only process same-domain URLs
-        if parsed.netloc and parsed.netloc.replace("www.", "") != self.DOMAIN:
-            return None
-        
-        # Remove fragments and normalize
-        normalized = urlunparse((
-            parsed.scheme or "https",
-            parsed.netloc or self.DOMAIN,
-            parsed.path or "/",
-            parsed.params,
-            parsed.query,
-            ""  # Remove fragment
-        ))
-        
-        # Ensure https
-        if normalized.startswith("http://"):
-            normalized = normalized.replace("http://", "https://")
-        
-        return normalized
+        """Canonical form of a link to this site (see url_canon); None for other hosts and schemes."""
+        return site_url(url, base_url)
     
     def extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract all internal links from page."""
@@ -135,6 +126,21 @@ class MotoRoverScraper:
         
         return links
     
+    def page_text(self, soup: BeautifulSoup) -> PageText:
+        """Text and markup of every element of soup, computed on first use.
+        
+        Extractors that change the tree must reset self._page_text.
+        """
+        if self._page_text is None or self._page_text.root is not soup:
+            self._page_text = PageText(soup)
+        return self._page_text
+    
+    def _text(self, soup: BeautifulSoup, node: Tag, strip: bool = False) -> str:
+        """node.get_text(), from the page's text memo when one has been built."""
+        if self._page_text is not None and self._page_text.root is soup:
+            return self._page_text.text(node, strip)
+        return node.get_text(strip=strip)
+    
     def extract_metadata(self, soup: BeautifulSoup, url: str) -> Dict:
         """Extract page metadata."""
         title = ""
@@ -183,7 +189,7 @@ class MotoRoverScraper:
         
         return headings
     
-    def extract_images(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    def extract_images(self, soup: BeautifulSoup, base_url: str) -> List[Image]:
         """Extract all images from page."""
         images = []
         
@@ -192,19 +198,8 @@ class MotoRoverScraper:
             if not src:
                 continue
             
-            # Normalize image URL - allow external URLs for images
-            img_url = self.normalize_url(src, base_url)
-            # If normalize_url returns None (external domain), try to use the original URL
-            if not img_url:
-                # For images, allow external URLs (CDN, etc.)
-                if src.startswith("http://") or src.startswith("https://"):
-                    img_url = src
-                elif src.startswith("//"):
-                    img_url = "https:" + src
-                else:
-                    # Relative URL
-                    img_url = urljoin(base_url, src)
-            
+            # Images may come from other hosts (CDN, etc.); data: URIs are skipped
+            img_url = resolve_url(src, base_url)
             if not img_url:
                 continue
             
@@ -218,31 +213,31 @@ class MotoRoverScraper:
             if not height:
                 height = img.get("data-height")
             
-            image_data = {
-                "src": img_url,
-                "alt": alt,
-                "width": int(width) if width and str(width).isdigit() else None,
-                "height": int(height) if height and str(height).isdigit() else None,
-                "caption": "",
-                "context": "page"
-            }
+            image = Image(
+                src=img_url,
+                alt=alt,
+                width=int(width) if width and str(width).isdigit() else None,
+                height=int(height) if height and str(height).isdigit() else None,
+                caption="",
+                context="page"
+            )
             
             # Look for caption (common patterns)
             parent = img.parent
             if parent:
                 figcaption = parent.find("figcaption")
                 if figcaption:
-                    image_data["caption"] = figcaption.get_text(strip=True)
+                    image.caption = self._text(soup, figcaption, strip=True)
             
-            images.append(image_data)
+            images.append(image)
             
             # Track asset
-            self.assets.append({
-                "url": img_url,
-                "type": "image",
-                "page_url": base_url,
-                "alt": alt
-            })
+            self.assets.append(Asset(
+                url=img_url,
+                type="image",
+                page_url=base_url,
+                alt=alt
+            ))
         
         return images
     
@@ -271,13 +266,13 @@ class MotoRoverScraper:
                 if field_id:
                     label = soup.find("label", attrs={"for": field_id})
                     if label:
-                        label_text = label.get_text(strip=True)
+                        label_text = self._text(soup, label, strip=True)
                 
                 # If no label by for, check if label wraps input
                 if not label_text:
                     parent = input_tag.parent
                     if parent and parent.name == "label":
-                        label_text = parent.get_text(strip=True)
+                        label_text = self._text(soup, parent, strip=True)
                 
                 fields.append({
                     "name": name,
@@ -290,7 +285,7 @@ class MotoRoverScraper:
             
             forms.append({
                 "id": form_id,
-                "purpose": self._infer_form_purpose(form),
+                "purpose": self._infer_form_purpose(soup, form),
                 "action": action,
                 "method": method,
                 "fields": fields
@@ -298,9 +293,9 @@ class MotoRoverScraper:
         
         return forms
     
-    def _infer_form_purpose(self, form: Tag) -> str:
+    def _infer_form_purpose(self, soup: BeautifulSoup, form: Tag) -> str:
         """Infer form purpose from context."""
-        form_text = form.get_text().lower()
+        form_text = self._text(soup, form).lower()
         
         if "contact" in form_text or "enquiry" in form_text:
             return "contact"
@@ -313,7 +308,7 @@ class MotoRoverScraper:
         else:
             return "general"
     
-    def extract_content_blocks(self, soup: BeautifulSoup) -> List[Dict]:
+    def extract_content_blocks(self, soup: BeautifulSoup) -> List[ContentBlock]:
         """Extract structured content blocks."""
         blocks = []
         main_content = soup.find("main") or soup.find("article") or soup.find("body")
@@ -324,22 +319,19 @@ class MotoRoverScraper:
         # Remove script and style tags
         for tag in main_content.find_all(["script", "style", "nav", "header", "footer"]):
             tag.decompose()
+        # Text and markup of the tree as it is now, shared by the extractors that follow
+        self._page_text = None
+        texts = self.page_text(soup)
         
         # Extract hero section
         hero = main_content.find(class_=re.compile(r"hero|banner|header", re.I))
         if hero:
-            blocks.append({
-                "type": "hero",
-                "content": {
-                    "text": hero.get_text(strip=True),
-                    "html": str(hero)
-                }
-            })
+            blocks.append(ContentBlock(type="hero", text=texts.text(hero, strip=True), html=texts.html(hero)))
         
         # Extract sections
         for section in main_content.find_all(["section", "div"], class_=True):
             classes = " ".join(section.get("class", []))
-            text = section.get_text(strip=True)
+            text = texts.text(section, strip=True)
             
             if not text or len(text) < 10:
                 continue
@@ -361,25 +353,13 @@ class MotoRoverScraper:
             elif re.search(r"cta|call.*action|button", classes, re.I):
                 block_type = "cta"
             
-            blocks.append({
-                "type": block_type,
-                "content": {
-                    "text": text,
-                    "html": str(section)
-                }
-            })
+            blocks.append(ContentBlock(type=block_type, text=text, html=texts.html(section)))
         
         # If no blocks found, create a text block from main content
         if not blocks:
             text_content = main_content.get_text(separator="\n", strip=True)
             if text_content:
-                blocks.append({
-                    "type": "text",
-                    "content": {
-                        "text": text_content,
-                        "html": str(main_content)
-                    }
-                })
+                blocks.append(ContentBlock(type="text", text=text_content, html=str(main_content)))
         
         return blocks
     
@@ -391,8 +371,8 @@ class MotoRoverScraper:
             href = a["href"]
             normalized = self.normalize_url(href, base_url)
             
-            if normalized and self.DOMAIN in normalized:
-                anchor_text = a.get_text(strip=True)
+            if normalized:
+                anchor_text = self._text(soup, a, strip=True)
                 links.append({
                     "anchor": anchor_text,
                     "target": normalized
@@ -426,7 +406,7 @@ class MotoRoverScraper:
         
         return hints
     
-    def extract_entities(self, soup: BeautifulSoup, url: str, page_data: Dict):
+    def extract_entities(self, soup: BeautifulSoup, url: str, page: Page):
         """Extract normalized entities (tours, team, FAQs, etc.)."""
         # Extract FAQs
         for faq_item in soup.find_all(class_=re.compile(r"faq|question|answer", re.I)):
@@ -437,93 +417,78 @@ class MotoRoverScraper:
             a_tag = faq_item.find(class_=re.compile(r"answer|a|response", re.I))
             
             if q_tag:
-                question = q_tag.get_text(strip=True)
+                question = self._text(soup, q_tag, strip=True)
             if a_tag:
-                answer = a_tag.get_text(strip=True)
+                answer = self._text(soup, a_tag, strip=True)
             
             if question and answer:
-                self.entities["faqs"].append({
+                self.entities.add("faqs", {
                     "question": question,
                     "answer": answer,
                     "source_url": url
-                })
+                }, url)
         
         # Extract testimonials
         for testimonial in soup.find_all(class_=re.compile(r"testimonial|review|quote", re.I)):
-            quote = testimonial.get_text(strip=True)
+            quote = self._text(soup, testimonial, strip=True)
             author = ""
             source = ""
             
             author_tag = testimonial.find(class_=re.compile(r"author|name|person", re.I))
             if author_tag:
-                author = author_tag.get_text(strip=True)
+                author = self._text(soup, author_tag, strip=True)
             
             if quote and len(quote) > 20:  # Minimum length for testimonial
-                self.entities["testimonials"].append({
+                self.entities.add("testimonials", {
                     "quote": quote,
                     "author": author,
                     "source": source or url
-                })
+                }, url)
         
         # Extract tour information (if on tour page)
         if "tour" in url.lower() or "motorcycle" in url.lower() or "self-drive" in url.lower():
-            tour_data = self._extract_tour_data(soup, url, page_data)
-            if tour_data:
-                self.entities["tours"].append(tour_data)
+            tour = self._extract_tour_data(soup, url, page)
+            if tour:
+                self.entities.add("tours", tour.to_dict(), url)
         
         # Extract team members (if on team/about page)
         if "team" in url.lower() or "about" in url.lower():
             team_members = self._extract_team_data(soup, url)
-            self.entities["team"].extend(team_members)
+            self.entities.extend("team", team_members, url)
         
         # Extract contact information
         contact_info = self._extract_contact_data(soup, url)
         if contact_info:
-            self.entities["contact"].append(contact_info)
+            self.entities.add("contact", contact_info, url)
     
-    def _extract_tour_data(self, soup: BeautifulSoup, url: str, page_data: Dict) -> Optional[Dict]:
+    def _extract_tour_data(self, soup: BeautifulSoup, url: str, page: Page) -> Optional[Tour]:
         """Extract tour-specific data."""
-        tour = {
-            "name": page_data.get("title", ""),
-            "url": url,
-            "type": "motorcycle" if "motorcycle" in url.lower() else "self-drive",
-            "duration": "",
-            "dates": [],
-            "start_location": "",
-            "end_location": "",
-            "highlights": [],
-            "itinerary": [],
-            "inclusions": [],
-            "exclusions": [],
-            "gallery": [],
-            "testimonials": []
-        }
+        tour = Tour(
+            name=page.title,
+            url=url,
+            type="motorcycle" if "motorcycle" in url.lower() else "self-drive"
+        )
         
         # Try to extract duration, dates, locations from content
-        content_text = soup.get_text()
+        content_text = self._text(soup, soup)
         
         # Duration pattern
-        duration_match = re.search(r"(\d+)\s*(?:days?|nights?)", content_text, re.I)
+        duration_match = self.DURATION_PATTERN.search(content_text)
         if duration_match:
-            tour["duration"] = duration_match.group(0)
+            tour.duration = duration_match.group(0)
         
         # Date patterns
-        date_patterns = [
-            r"\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}",
-            r"\d{4}-\d{2}-\d{2}"
-        ]
-        for pattern in date_patterns:
-            dates = re.findall(pattern, content_text, re.I)
-            tour["dates"].extend(dates)
+        for pattern in self.DATE_PATTERNS:
+            tour.dates.extend(pattern.findall(content_text))
         
         # Extract highlights, itinerary, etc. from structured content
-        for block in page_data.get("contentBlocks", []):
-            if block["type"] == "itinerary":
-                tour["itinerary"].append(block["content"]["text"])
-            elif block["type"] == "feature-list":
-                tour["highlights"].append(block["content"]["text"])
+        for block in page.content_blocks:
+            if block.type == "itinerary":
+                tour.itinerary.append(block.text)
+            elif block.type == "feature-list":
+                tour.highlights.append(block.text)
         
-        return tour if tour["name"] else None
+        return tour if tour.name else None
     
     def _extract_team_data(self, soup: BeautifulSoup, url: str) -> List[Dict]:
         """Extract team member data."""
@@ -538,15 +503,15 @@ class MotoRoverScraper:
             
             name_tag = member.find(class_=re.compile(r"name|title", re.I))
             if name_tag:
-                name = name_tag.get_text(strip=True)
+                name = self._text(soup, name_tag, strip=True)
             
             role_tag = member.find(class_=re.compile(r"role|position|title", re.I))
             if role_tag:
-                role = role_tag.get_text(strip=True)
+                role = self._text(soup, role_tag, strip=True)
             
             bio_tag = member.find(class_=re.compile(r"bio|description|about", re.I))
             if bio_tag:
-                bio = bio_tag.get_text(strip=True)
+                bio = self._text(soup, bio_tag, strip=True)
             
             img_tag = member.find("img")
             if img_tag:
@@ -573,15 +538,15 @@ class MotoRoverScraper:
             "social": {}
         }
         
-        content_text = soup.get_text()
+        content_text = self._text(soup, soup)
         
         # Email
-        email_match = re.search(r"[\w\.-]+@[\w\.-]+\.\w+", content_text)
+        email_match = self.EMAIL_PATTERN.search(content_text)
         if email_match:
             contact["email"] = email_match.group(0)
         
         # Phone
-        phone_match = re.search(r"[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,9}", content_text)
+        phone_match = self.PHONE_PATTERN.search(content_text)
         if phone_match:
             contact["phone"] = phone_match.group(0)
         
@@ -599,7 +564,7 @@ class MotoRoverScraper:
         
         return contact if contact["email"] or contact["phone"] else None
     
-    def scrape_page(self, url: str, check_robots: bool = True) -> Optional[Dict]:
+    def scrape_page(self, url: str, check_robots: bool = True) -> Optional[Page]:
         """Scrape a single page.
         
         Args:
@@ -616,42 +581,78 @@ class MotoRoverScraper:
         print(f"Scraping: {url}")
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            with self.metrics.span("fetch", url=url):
+                response = self.fetcher.fetch(url)
+            self.metrics.count("bytes_fetched", len(response.text.encode("utf-8")))
+            
+            if response.redirects:
+                url = self._record_redirect(url, response)
+                if url is None or url in self.visited_urls:
+                    return None
             
             # Check content type
-            content_type = response.headers.get("content-type", "").lower()
-            if "text/html" not in content_type:
+            if "text/html" not in response.content_type:
                 print(f"Skipping {url} (not HTML)")
+                self.metrics.count("pages_skipped")
                 return None
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            with self.metrics.span("extract", url=url):
+                soup = BeautifulSoup(response.text, "html.parser")
+                page = self.extract_page(soup, url)
             
+            self.visited_urls.add(url)
+            self.metrics.count("pages_scraped")
+            return page
+            
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            self.metrics.count("scrape_errors")
+            return None
+    
+    def _record_redirect(self, url: str, response) -> Optional[str]:
+        """Record the redirect chain a fetch followed; returns the URL the page is known by, None if off-site."""
+        self.metrics.count("redirects")
+        final_url = self.normalize_url(response.url)
+        self.redirects[url] = {
+            "to": final_url or response.url,
+            "hops": [{"status": status, "from": source, "to": target}
+                     for status, source, target in response.redirects]
+        }
+        self.visited_urls.add(url)
+        print(f"  Redirected to {response.url} ({len(response.redirects)} hop(s))")
+        if final_url is None:
+            print(f"Skipping {url} (redirects off-site)")
+            self.metrics.count("pages_skipped")
+        return final_url
+    
+    def extract_page(self, soup: BeautifulSoup, url: str) -> Page:
+        """Run every extractor over a parsed page (which is modified) and record its entities."""
+        try:
             # Extract all data
             metadata = self.extract_metadata(soup, url)
             slug = self._url_to_slug(url)
             
-            page_data = {
-                "url": url,
-                "slug": slug,
-                **metadata,
-                "headings": self.extract_headings(soup),
-                "contentBlocks": self.extract_content_blocks(soup),
-                "images": self.extract_images(soup, url),
-                "forms": self.extract_forms(soup, url),
-                "internalLinks": self.extract_internal_links(soup, url),
-                "structuredDataHints": self.extract_structured_data_hints(soup)
-            }
+            page = Page(
+                url=url,
+                slug=slug,
+                title=metadata["title"],
+                meta_description=metadata["metaDescription"],
+                canonical=metadata["canonical"],
+                lang=metadata["lang"],
+                headings=self.extract_headings(soup),
+                content_blocks=self.extract_content_blocks(soup),
+                images=self.extract_images(soup, url),
+                forms=self.extract_forms(soup, url),
+                internal_links=self.extract_internal_links(soup, url),
+                structured_data_hints=self.extract_structured_data_hints(soup)
+            )
             
             # Extract entities
-            self.extract_entities(soup, url, page_data)
-            
-            self.visited_urls.add(url)
-            return page_data
-            
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return None
+            self.extract_entities(soup, url, page)
+            return page
+        finally:
+            # Don't keep the page alive until the next one
+            self._page_text = None
     
     def _url_to_slug(self, url: str) -> str:
         """Convert URL to slug."""
@@ -669,23 +670,28 @@ class MotoRoverScraper:
         
         return slug or "index"
     
-    def crawl(self, start_url: str = None, url_list: List[str] = None, ignore_robots: bool = False):
+    def crawl(self, start_url: str = None, url_list: List[str] = None, ignore_robots: bool = False,
+              workers: Optional[int] = None):
         """Crawl the entire site.
         
         Args:
             start_url: Single URL to start crawling from (uses link-following)
             url_list: List of URLs to scrape directly (no link-following)
             ignore_robots: If True, skip robots.txt checks (default: False)
+            workers: Processes for URL lists when the fetcher allows it (default: CPU count)
         """
         # If URL list provided, scrape those directly
         if url_list:
             print(f"Scraping {len(url_list)} URLs from provided list")
+            if self.fetcher.parallel and (workers or 0) != 1:
+                self._scrape_parallel(url_list, workers)
+                return
             for url in url_list:
                 page_data = self.scrape_page(url, check_robots=not ignore_robots)
                 if page_data:
                     self.pages_data.append(page_data)
                 # Rate limiting
-                time.sleep(self.RATE_LIMIT)
+                time.sleep(self.fetcher.delay)
             return
         
         # Otherwise use link-following crawl
@@ -697,6 +703,8 @@ class MotoRoverScraper:
             return
         
         self.url_queue.append((start_url, 0))  # (url, depth)
+        # Every URL ever queued, so a page linked from many others is queued once
+        queued = {start_url}
         
         while self.url_queue:
             url, depth = self.url_queue.popleft()
@@ -710,66 +718,107 @@ class MotoRoverScraper:
                 
                 # Add new links to queue
                 if depth < self.MAX_DEPTH:
-                    links = [link["target"] for link in page_data.get("internalLinks", [])]
+                    links = [link["target"] for link in page_data.internal_links]
                     for link in links:
-                        if link not in self.visited_urls and (link, depth + 1) not in self.url_queue:
+                        if link not in self.visited_urls and link not in queued:
+                            queued.add(link)
                             self.url_queue.append((link, depth + 1))
             
             # Rate limiting
-            time.sleep(self.RATE_LIMIT)
+            time.sleep(self.fetcher.delay)
+    
+    def _scrape_parallel(self, url_list: List[str], workers: Optional[int] = None):
+        """Scrape a URL list in worker processes, merging results in list order."""
+        workers = workers or os.cpu_count() or 1
+        urls = [url for url in dict.fromkeys(url_list) if url not in self.visited_urls]
+        chunksize = max(1, len(urls) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(self.output_dir), self.fetcher)) as pool:
+            for url, (page_data, assets, entities, redirects, metrics) in zip(
+                    urls, pool.map(_scrape_in_worker, urls, chunksize=chunksize)):
+                self.metrics.merge(metrics)
+                self.redirects.update(redirects)
+                # Two listed URLs can redirect to the same page; keep the first
+                if not page_data or page_data.url in self.visited_urls:
+                    continue
+                self.visited_urls.add(url)
+                self.visited_urls.add(page_data.url)
+                self.pages_data.append(page_data)
+                self.assets.extend(assets)
+                self.entities.merge(entities)
     
     def save(self):
-        """Save all scraped data to JSON files."""
+        """Save all scraped data to the content store, or to JSON files."""
+        if self.store:
+            self._save_to_store()
+            return
+        
         # Save content.json
-        content_file = self.output_dir / "content.json"
-        with open(content_file, "w", encoding="utf-8") as f:
-            json.dump({"pages": self.pages_data}, f, indent=2, ensure_ascii=False)
+        save_json({"pages": [page.to_dict() for page in self.pages_data]}, self.output_dir / "content.json")
         
         # Save entities.json
-        entities_file = self.output_dir / "entities.json"
-        with open(entities_file, "w", encoding="utf-8") as f:
-            json.dump(self.entities, f, indent=2, ensure_ascii=False)
+        self.entities.save(self.output_dir / "entities.json")
         
         # Save assets.json
-        assets_file = self.output_dir / "assets.json"
-        with open(assets_file, "w", encoding="utf-8") as f:
-            json.dump({"assets": self.assets}, f, indent=2, ensure_ascii=False)
+        save_json({"assets": [asset.to_dict() for asset in self.assets]}, self.output_dir / "assets.json")
         
         # Save sitemap.json
         sitemap_data = {
-            "urls": [page["url"] for page in self.pages_data],
+            "urls": [page.url for page in self.pages_data],
             "hierarchy": self._build_hierarchy(),
-            "redirects": {}
+            "redirects": self.redirects
         }
-        sitemap_file = self.output_dir / "sitemap.json"
-        with open(sitemap_file, "w", encoding="utf-8") as f:
-            json.dump(sitemap_data, f, indent=2, ensure_ascii=False)
+        save_json(sitemap_data, self.output_dir / "sitemap.json")
         
         print(f"\nScraping complete!")
         print(f"  Pages scraped: {len(self.pages_data)}")
         print(f"  Assets found: {len(self.assets)}")
-        print(f"  Tours: {len(self.entities['tours'])}")
-        print(f"  FAQs: {len(self.entities['faqs'])}")
-        print(f"  Testimonials: {len(self.entities['testimonials'])}")
-        print(f"  Team members: {len(self.entities['team'])}")
+        print(f"  Redirects followed: {len(self.redirects)}")
+        counts = self.entities.counts()
+        print(f"  Tours: {counts['tours']}")
+        print(f"  FAQs: {counts['faqs']}")
+        print(f"  Testimonials: {counts['testimonials']}")
+        print(f"  Team members: {counts['team']}")
+        print(f"  Contact details: {counts['contact']}")
+    
+    def _save_to_store(self):
+        """Upsert this run's pages into the content store, leaving pages it didn't fetch alone."""
+        assets_by_page: Dict[str, List[Dict]] = {}
+        for asset in self.assets:
+            assets_by_page.setdefault(asset.page_url, []).append(asset.to_dict())
+        for page in self.pages_data:
+            self.store.upsert_page(page.to_dict(), assets_by_page.get(page.url, []))
+        self.store.save_entities(self.entities)
+        self.store.refresh_sitemap(self.redirects)
+        
+        print(f"\nScraping complete!")
+        print(f"  Pages scraped: {len(self.pages_data)} (upserted into {self.store.path})")
+        print(f"  Pages in store: {len(self.store.page_urls())}")
+        print(f"  Assets found: {len(self.assets)}")
     
     def _build_hierarchy(self) -> Dict:
         """Build URL hierarchy."""
-        hierarchy = {}
-        
-        for page in self.pages_data:
-            url = page["url"]
-            parsed = urlparse(url)
-            path_parts = [p for p in parsed.path.split("/") if p]
-            
-            current = hierarchy
-            for part in path_parts:
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
-            current["_url"] = url
-        
-        return hierarchy
+        return build_hierarchy(page.url for page in self.pages_data)
+
+
+# Per-process scraper for the worker pool
+_worker_scraper: Optional[MotoRoverScraper] = None
+
+
+def _init_worker(output_dir: str, fetcher):
+    global _worker_scraper
+    _worker_scraper = MotoRoverScraper(output_dir, fetcher)
+
+
+def _scrape_in_worker(url: str):
+    """Scrape one page; returns (page data, assets, entities, redirects, metrics) for that page alone."""
+    scraper = _worker_scraper
+    scraper.assets = []
+    scraper.entities = EntityStore()
+    scraper.redirects = {}
+    scraper.metrics = Metrics("scraper")
+    page_data = scraper.scrape_page(url, check_robots=False)
+    return page_data, scraper.assets, scraper.entities, scraper.redirects, scraper.metrics.snapshot()
 
 
 def main():
@@ -796,24 +845,64 @@ def main():
         action="store_true",
         help="Ignore robots.txt restrictions (use with caution)"
     )
+    parser.add_argument(
+        "--source",
+        choices=["http", "local"],
+        default="http",
+        help="Fetch pages from the live site or from the checked-in HTML (default: http)"
+    )
+    parser.add_argument(
+        "--local-root",
+        type=str,
+        default=str(Path(__file__).parent.parent),
+        help="Site root served by --source local (default: repository root)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="content",
+        help="Directory for the JSON output (default: content)"
+    )
+    parser.add_argument(
+        "--store",
+        choices=["json", "sqlite"],
+        default="json",
+        help=f"Write the JSON files, or upsert into <output-dir>/{DB_NAME} (default: json)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for --source local (default: CPU count)"
+    )
+    instrumentation.add_arguments(parser)
     
     args = parser.parse_args()
     
-    scraper = MotoRoverScraper()
+    metrics = instrumentation.from_args("scraper", args)
+    fetcher = LocalFetcher(args.local_root) if args.source == "local" else None
+    store = ContentStore(Path(args.output_dir) / DB_NAME) if args.store == "sqlite" else None
+    scraper = MotoRoverScraper(args.output_dir, fetcher, metrics, store)
     
     if args.use_sitemap:
         # Load URLs from sitemap and scrape them
-        urls = scraper.load_urls_from_sitemap(args.sitemap)
+        with metrics.stage("sitemap"):
+            urls = scraper.load_urls_from_sitemap(args.sitemap)
         if urls:
-            scraper.crawl(url_list=urls, ignore_robots=args.ignore_robots)
+            with metrics.stage("crawl"):
+                scraper.crawl(url_list=urls, ignore_robots=args.ignore_robots, workers=args.workers)
         else:
             print("No URLs found in sitemap. Exiting.")
             return
     else:
         # Use link-following crawl
-        scraper.crawl(start_url=args.start_url, ignore_robots=args.ignore_robots)
+        with metrics.stage("crawl"):
+            scraper.crawl(start_url=args.start_url, ignore_robots=args.ignore_robots)
     
-    scraper.save()
+    with metrics.stage("save"):
+        scraper.save()
+    if store:
+        store.close()
+    instrumentation.finish(metrics, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Streaming Sitemap Reader
+Reads sitemap.xml one URL at a time, the counterpart of sitemap_writer:
+follows sitemap indexes to their shards and reads gzipped files, clearing
+each element once it has been read so memory stays flat however many URLs
+there are. A shard that is missing or broken is reported and skipped.
+"""
+
+import gzip
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import unquote, urlparse
+
+from sitemap_writer import SitemapEntry
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Indexes pointing at indexes deeper than this are treated as loops
+MAX_DEPTH = 3
+
+
+def _local_name(tag: str) -> str:
+    """Tag without its namespace; sitemaps without the xmlns are read too."""
+    return tag.rpartition("}")[2]
+
+
+def _open(path: Path):
+    """Open a sitemap for reading, decompressing it if it is gzipped (whatever its name)."""
+    handle = open(path, "rb")
+    if handle.read(2) == GZIP_MAGIC:
+        handle.close()
+        return gzip.open(path, "rb")
+    handle.seek(0)
+    return handle
+
+
+def _child_text(elem: ET.Element, name: str):
+    for child in elem:
+        if _local_name(child.tag) == name:
+            return child.text.strip() if child.text and child.text.strip() else None
+    return None
+
+
+def _shard_path(loc: str, index_path: Path) -> Path:
+    """Where a sitemap index entry lives on disk: next to the index, as the writer puts it."""
+    path = index_path.parent / Path(unquote(urlparse(loc).path)).name
+    if not path.exists() and path.suffix == ".gz":
+        # Indexes point at the gzipped shard; the plain copy is next to it
+        path = path.with_suffix("")
+    return path
+
+
+def read_sitemap(path, depth: int = 0) -> Iterator[SitemapEntry]:
+    """Yield (loc, lastmod, priority) for every URL in a sitemap, following indexes; lastmod and priority may be None."""
+    path = Path(path)
+    with _open(path) as source:
+        root = None
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if root is None:
+                root = elem
+                continue
+            if event != "end":
+                continue
+            name = _local_name(elem.tag)
+            if name == "url":
+                loc = _child_text(elem, "loc")
+                if loc:
+                    yield loc, _child_text(elem, "lastmod"), _child_text(elem, "priority")
+            elif name == "sitemap":
+                loc = _child_text(elem, "loc")
+                if loc and depth < MAX_DEPTH:
+                    yield from _read_shard(_shard_path(loc, path), depth + 1)
+            else:
+                continue
+            # Drop the entry, and the root's reference to it
+            root.clear()
+
+
+def _read_shard(path: Path, depth: int) -> Iterator[SitemapEntry]:
+    """read_sitemap for a file an index points at; a missing or broken shard is skipped, not fatal to the rest."""
+    try:
+        yield from read_sitemap(path, depth)
+    except (OSError, EOFError, ET.ParseError) as e:
+        print(f"Skipping sitemap {path.name}: {e}")
+
+
+def read_sitemap_urls(path) -> Iterator[str]:
+    """Just the URLs of a sitemap, in order."""
+    for loc, _, _ in read_sitemap(path):
+        yield loc
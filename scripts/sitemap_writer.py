@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Streaming Sitemap Writer
+Writes sitemap.xml one URL at a time, sharding into a sitemap index past the
+protocol limit and keeping a gzipped copy of every file.
+"""
+
+import gzip
+import shutil
+from pathlib import Path
+from typing import IO, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# (loc, lastmod, priority); lastmod and priority may be None
+SitemapEntry = Tuple[str, Optional[str], Optional[str]]
+
+
+class SitemapWriter:
+    """Stream sitemap entries to disk with automatic sharding."""
+
+    MAX_URLS = 50000  # Protocol limit per sitemap file
+
+    def __init__(self, output_dir: str = ".", base_url: str = "https://www.motorover.in",
+                 filename: str = "sitemap.xml", max_urls: int = MAX_URLS, gzip_copy: bool = True):
+        self.output_dir = Path(output_dir)
+        self.base_url = base_url.rstrip("/")
+        self.filename = filename
+        self.max_urls = max_urls
+        self.gzip_copy = gzip_copy
+
+        self.stem = Path(filename).stem
+        self.shards: List[Path] = []
+        self._handle: Optional[IO[str]] = None
+        self._count = 0
+        self.total = 0
+
+    def _open_shard(self):
+        """Start a new urlset shard file."""
+        path = self.output_dir / f"{self.stem}-{len(self.shards) + 1}.xml"
+        self.shards.append(path)
+        self._handle = open(path, "w", encoding="utf-8")
+        self._handle.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._handle.write(f'<urlset xmlns="{SITEMAP_NS}">\n')
+        self._count = 0
+
+    def _close_shard(self):
+        """Finish the current shard file."""
+        if self._handle:
+            self._handle.write("</urlset>\n")
+            self._handle.close()
+            self._handle = None
+
+    def add(self, loc: str, lastmod: Optional[str] = None, priority: Optional[str] = None):
+        """Append a single URL entry."""
+        if self._handle is None or self._count >= self.max_urls:
+            self._close_shard()
+            self._open_shard()
+
+        entry = f"  <url>\n    <loc>{escape(loc)}</loc>\n"
+        if lastmod:
+            entry += f"    <lastmod>{escape(lastmod)}</lastmod>\n"
+        if priority:
+            entry += f"    <priority>{priority}</priority>\n"
+        entry += "  </url>\n"
+
+        self._handle.write(entry)
+        self._count += 1
+        self.total += 1
+
+    def write(self, entries: Iterable[SitemapEntry]) -> List[Path]:
+        """Write all entries and finalize; returns the files produced."""
+        for loc, lastmod, priority in entries:
+            self.add(loc, lastmod, priority)
+        return self.close()
+
+    def close(self) -> List[Path]:
+        """Finalize shards, writing an index when more than one was needed."""
+        if self._handle is None and not self.shards:
+            self._open_shard()
+        self._close_shard()
+
+        target = self.output_dir / self.filename
+        if len(self.shards) == 1:
+            self.shards[0].replace(target)
+            written = [target]
+        else:
+            self._write_index(target)
+            written = [target] + self.shards
+
+        # Remove shards left over from a previous, larger build
+        for leftover in self.output_dir.glob(f"{self.stem}-*.xml*"):
+            if leftover.name.split(".xml")[0] + ".xml" not in {p.name for p in written}:
+                leftover.unlink()
+
+        if self.gzip_copy:
+            for path in written:
+                self._gzip(path)
+
+        return written
+
+    def _write_index(self, target: Path):
+        """Write a sitemap index pointing at each shard."""
+        suffix = ".gz" if self.gzip_copy else ""
+        with open(target, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write(f'<sitemapindex xmlns="{SITEMAP_NS}">\n')
+            for shard in self.shards:
+                f.write("  <sitemap>\n")
+                f.write(f"    <loc>{escape(self.base_url)}/{shard.name}{suffix}</loc>\n")
+                f.write("  </sitemap>\n")
+            f.write("</sitemapindex>\n")
+
+    @staticmethod
+    def _gzip(path: Path):
+        """Write a gzipped copy next to the file."""
+        with open(path, "rb") as src, gzip.open(path.with_name(path.name + ".gz"), "wb") as dst:
+            shutil.copyfileobj(src, dst)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+URL Canonicalization
+One set of rules for the URL a link or page is known by, shared by the
+scraper, the verifier and the sitemap generator:
+
+- http, https and scheme-relative URLs only, always written as https
+- the host lower-cased, without a default port; the bare domain is www.motorover.in
+- an empty path is "/", and index.html collapses into its directory
+- every other path is written without a trailing slash (/about/ is /about)
+- tracking parameters (utm_*, gclid, fbclid...) and the fragment are dropped
+
+Every page links to the same navigation and footer URLs, so results are
+memoized; canonical_url.cache_info() and resolve_url.cache_info() show how
+well that works.
+"""
+
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+SITE_HOST = "www.motorover.in"
+SITE_DOMAIN = "motorover.in"
+SITE_URL = f"https://{SITE_HOST}"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+DEFAULT_DOCUMENTS = ("index.html", "index.htm")
+TRACKING_PARAMETERS = {"gclid", "dclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl"}
+
+CACHE_SIZE = 16384
+
+
+def is_site_host(host: str) -> bool:
+    """Whether a host (or netloc) is this site's, with or without www."""
+    return host.lower().split(":", 1)[0] in (SITE_HOST, SITE_DOMAIN)
+
+
+def _is_tracking(parameter: str) -> bool:
+    name = parameter.split("=", 1)[0].lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMETERS
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical_url(url: str) -> Optional[str]:
+    """The canonical form of an absolute or site-relative URL; None for mailto:, tel:, data: and the like."""
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        # Unbalanced IPv6 brackets, a port that isn't a number
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in ("", "http", "https"):
+        return None
+
+    host = (parts.hostname or "").rstrip(".")
+    if not host or host == SITE_DOMAIN:
+        host = SITE_HOST
+    # Written as https, so 443 is a default port too
+    netloc = host if port in (None, 443) or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if not path.startswith("/"):
+        path = "/" + path
+    directory, _, document = path.rpartition("/")
+    if document.lower() in DEFAULT_DOCUMENTS:
+        path = directory + "/"
+    # One spelling per page: only the site root keeps its slash
+    path = path.rstrip("/") or "/"
+
+    query = "&".join(parameter for parameter in parts.query.split("&")
+                     if parameter and not _is_tracking(parameter))
+    return urlunsplit(("https", netloc, path, query, ""))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def resolve_url(href: str, base_url: Optional[str] = None) -> Optional[str]:
+    """canonical_url of a link as written on the page at base_url."""
+    if not href:
+        return None
+    href = href.strip()
+    if base_url:
+        try:
+            href = urljoin(base_url, href)
+        except ValueError:
+            return None
+    return canonical_url(href)
+
+
+def site_url(href: str, base_url: Optional[str] = None) -> Optional[str]:
+    """resolve_url, for links to this site only; None for other hosts."""
+    url = resolve_url(href, base_url)
+    # Canonical URLs of this site all start the same way
+    if url and url.startswith(SITE_URL + "/"):
+        return url
+    return None
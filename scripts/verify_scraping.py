@@ -2,223 +2,369 @@
 """
 Verification Script
 Verifies that all URLs from sitemap.xml have been scraped and all images downloaded.
+Each artifact is parsed once and summarised; summaries and per-image decode
+results are cached by mtime, so later runs only re-verify what changed.
 """
 
+import argparse
 import json
-import xml.etree.ElementTree as ET
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Set, List, Dict
+from typing import Dict, List, Optional, Set
+
+from PIL import Image
+
+import instrumentation
+from content_store import DB_NAME, open_store
+from html_tags import srcset_candidates
+from instrumentation import Metrics
+from sitemap_reader import read_sitemap_urls
+from url_canon import canonical_url
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif"}
+
+CACHE_VERSION = 1
+CACHE_NAME = "verify-scraping.json"
+
+# Findings listed per check in the console report; the JSON report has them all
+SHOW_FIRST = 10
+
+
+def normalize_for_comparison(url: str) -> str:
+    """Canonical form of a URL (see url_canon), so the sitemap and the scrape agree on spelling."""
+    return canonical_url(url) or url
+
+
+def _fingerprint(path: Path) -> Optional[List[int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
 
 
 def load_sitemap_urls(sitemap_path: str = "sitemap.xml") -> Set[str]:
-    """Load all URLs from sitemap.xml."""
+    """Load all URLs from sitemap.xml (or a sitemap index, gzipped or not)."""
     sitemap_file = Path(sitemap_path)
     if not sitemap_file.exists():
         print(f"Error: Sitemap file not found: {sitemap_path}")
         return set()
-    
+
     try:
-        tree = ET.parse(sitemap_file)
-        root = tree.getroot()
-        ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        
-        urls = set()
-        for url_elem in root.findall("ns:url", ns):
-            loc_elem = url_elem.find("ns:loc", ns)
-            if loc_elem is not None and loc_elem.text:
-                url = loc_elem.text.strip()
-                urls.add(url)
-        
+        urls = set(read_sitemap_urls(sitemap_file))
         return urls
     except Exception as e:
         print(f"Error parsing sitemap.xml: {e}")
         return set()
 
 
-def load_scraped_urls(content_path: str = "content/content.json") -> Set[str]:
-    """Load all scraped URLs from content.json."""
-    content_file = Path(content_path)
-    if not content_file.exists():
-        print(f"Error: Content file not found: {content_path}")
-        return set()
-    
-    try:
-        with open(content_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        urls = set()
-        for page in data.get("pages", []):
-            url = page.get("url")
-            if url:
-                urls.add(url)
-        
-        return urls
-    except Exception as e:
-        print(f"Error loading content.json: {e}")
-        return set()
+def summarize_content(content_path: Path) -> Dict:
+    """Scraped page URLs and the image URLs they reference, from one parse of content.json."""
+    with open(content_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
 
+    urls = set()
+    images = set()
+    for page in data.get("pages", []):
+        if page.get("url"):
+            urls.add(page["url"])
+        for image in page.get("images", []):
+            if image.get("src"):
+                images.add(image["src"])
+    return {"urls": sorted(urls), "images": sorted(images)}
 
-def load_image_assets(assets_path: str = "content/assets.json") -> List[Dict]:
-    """Load all image assets from assets.json."""
-    assets_file = Path(assets_path)
-    if not assets_file.exists():
-        print(f"Error: Assets file not found: {assets_path}")
-        return []
-    
-    try:
-        with open(assets_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        return [asset for asset in data.get("assets", []) if asset.get("type") == "image"]
-    except Exception as e:
-        print(f"Error loading assets.json: {e}")
-        return []
 
+def summarize_assets(assets_path: Path) -> Dict:
+    """Image assets reduced to their URL, page and the local files they point at."""
+    with open(assets_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return summarize_asset_records(data.get("assets", []))
 
-def get_images_from_pages(content_path: str = "content/content.json") -> Set[str]:
-    """Extract all image URLs referenced in scraped pages."""
-    content_file = Path(content_path)
-    if not content_file.exists():
-        return set()
-    
+
+def summarize_asset_records(assets: List[Dict]) -> Dict:
+    images = []
+    for asset in assets:
+        if asset.get("type") != "image":
+            continue
+        paths = []
+        srcset = []
+        for fmt in ("original", "webp", "avif"):
+            entry = asset.get(fmt) or {}
+            if entry.get("path"):
+                paths.append(entry["path"])
+            srcset += [url for url, _ in srcset_candidates(entry.get("srcset") or "")]
+        images.append({
+            "url": asset.get("url"),
+            "page_url": asset.get("page_url"),
+            "paths": paths,
+            "srcset": srcset,
+        })
+    return {"images": images}
+
+
+class VerificationCache:
+    """Artifact summaries and image decode results from earlier runs, keyed by mtime and size."""
+
+    def __init__(self, cache_file: Path, enabled: bool = True):
+        self.cache_file = cache_file
+        self.data = {"version": CACHE_VERSION, "artifacts": {}, "images": {}}
+        if enabled and cache_file.exists():
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.data = data
+            except (OSError, ValueError):
+                pass
+
+    def summary(self, name: str, path: Path, summarize) -> Optional[Dict]:
+        """Summary of an artifact, recomputed only if the file changed."""
+        fingerprint = _fingerprint(path)
+        if fingerprint is None:
+            self.data["artifacts"].pop(name, None)
+            return None
+        cached = self.data["artifacts"].get(name)
+        if cached and cached["fingerprint"] == fingerprint:
+            return dict(cached["summary"], reused=True)
+        summary = summarize(path)
+        self.data["artifacts"][name] = {"fingerprint": fingerprint, "summary": summary}
+        return dict(summary, reused=False)
+
+    def save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, separators=(",", ":"))
+
+
+def decode_image(path: str) -> Optional[str]:
+    """Fully decode an image; returns the error, or None if it is readable."""
     try:
-        with open(content_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        image_urls = set()
-        for page in data.get("pages", []):
-            for image in page.get("images", []):
-                src = image.get("src")
-                if src:
-                    image_urls.add(src)
-        
-        return image_urls
+        with Image.open(path) as img:
+            img.load()
+        return None
     except Exception as e:
-        print(f"Error extracting images from pages: {e}")
-        return set()
+        return f"{type(e).__name__}: {e}"
 
 
-def check_downloaded_images(assets_dir: str = "assets/img") -> Set[str]:
-    """Check which images have been downloaded locally."""
-    assets_path = Path(assets_dir)
-    if not assets_path.exists():
-        return set()
-    
-    # Get all image files
-    image_extensions = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif"}
-    downloaded = set()
-    
-    for img_file in assets_path.iterdir():
-        if img_file.is_file() and img_file.suffix.lower() in image_extensions:
-            # Extract base filename (without size suffix)
-            name = img_file.stem
-            # Remove size suffix like "-640w"
-            if "-" in name and name.split("-")[-1].endswith("w"):
-                name = "-".join(name.split("-")[:-1])
-            downloaded.add(name)
-    
-    return downloaded
+def check_images(img_dir: Path, cache: VerificationCache, workers: Optional[int] = None,
+                 metrics: Optional[Metrics] = None) -> Dict:
+    """Decode every image in img_dir, skipping files unchanged since they last passed or failed."""
+    previous = cache.data["images"]
+    current = {}
+    pending = []
+    for path in sorted(img_dir.iterdir()) if img_dir.exists() else []:
+        if not path.is_file() or path.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        fingerprint = _fingerprint(path)
+        cached = previous.get(path.name)
+        if cached and cached["fingerprint"] == fingerprint:
+            current[path.name] = cached
+        else:
+            pending.append((path, fingerprint))
 
+    workers = workers or os.cpu_count() or 1
+    paths = [str(path) for path, _ in pending]
+    if workers == 1 or len(paths) < 2 * workers:
+        errors = [decode_image(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(decode_image, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    for (path, fingerprint), error in zip(pending, errors):
+        current[path.name] = {"fingerprint": fingerprint, "error": error}
 
-def main():
-    """Main verification function."""
+    cache.data["images"] = current
+    if metrics:
+        metrics.count("images_decoded", len(pending))
+        metrics.count("image_cache_hits", len(current) - len(pending))
+    return {
+        "files": sorted(current),
+        "decoded": len(pending),
+        "reused": len(current) - len(pending),
+        "corrupt": {name: entry["error"] for name, entry in sorted(current.items()) if entry["error"]},
+    }
+
+
+def verify(root_dir: Path, cache: VerificationCache, workers: Optional[int] = None,
+           metrics: Optional[Metrics] = None) -> Dict:
+    """Run every check and return the machine-readable report."""
+    metrics = metrics or Metrics("verify_scraping")
+    started = time.perf_counter()
+    content_dir = root_dir / "content"
+    img_dir = root_dir / "assets" / "img"
+    errors: List[str] = []
+
+    store = open_store(content_dir)
+    with metrics.stage("artifacts"):
+        sitemap = cache.summary("sitemap", root_dir / "sitemap.xml",
+                                lambda path: {"urls": sorted(load_sitemap_urls(str(path)))})
+        if store:
+            # Indexed queries for just the columns needed; nothing worth caching
+            with store:
+                content = {"urls": sorted(store.page_urls()), "images": store.image_srcs(), "reused": None}
+                assets = dict(summarize_asset_records(store.assets(asset_type="image")), reused=None)
+            sources = (("sitemap.xml", sitemap), (f"content/{DB_NAME} (pages)", content),
+                       (f"content/{DB_NAME} (assets)", assets))
+        else:
+            content = cache.summary("content", content_dir / "content.json", summarize_content)
+            assets = cache.summary("assets", content_dir / "assets.json", summarize_assets)
+            sources = (("sitemap.xml", sitemap), ("content/content.json", content),
+                       ("content/assets.json", assets))
+    artifacts = {}
+    for name, summary in sources:
+        if summary is None:
+            errors.append(f"{name} not found")
+            artifacts[name] = "missing"
+        elif summary["reused"] is None:
+            artifacts[name] = "queried"
+            metrics.count("artifacts_queried", artifact=name)
+        else:
+            artifacts[name] = "cached" if summary["reused"] else "parsed"
+            metrics.count("artifact_cache_hits" if summary["reused"] else "artifacts_parsed", artifact=name)
+    sitemap = sitemap or {"urls": []}
+    content = content or {"urls": [], "images": []}
+    assets = assets or {"images": []}
+
+    # URL coverage (robots.txt and other non-HTML entries are not pages)
+    sitemap_urls = {normalize_for_comparison(url) for url in sitemap["urls"]}
+    html_sitemap_urls = {u for u in sitemap_urls if not u.endswith(".txt")}
+    scraped_urls = {normalize_for_comparison(url) for url in content["urls"]}
+    coverage = {
+        "sitemap": len(html_sitemap_urls),
+        "scraped": len(scraped_urls),
+        "missing": sorted(html_sitemap_urls - scraped_urls),
+        "extra": sorted(scraped_urls - html_sitemap_urls),
+    }
+
+    # Asset manifest consistency against the pages it was built from
+    asset_urls = {image["url"] for image in assets["images"]}
+    manifest = {
+        "images": len(assets["images"]),
+        "notInManifest": sorted(set(content["images"]) - asset_urls),
+        "orphanedEntries": sorted({
+            image["url"] for image in assets["images"]
+            if image["page_url"] and normalize_for_comparison(image["page_url"]) not in scraped_urls
+        }) if content["urls"] else [],
+    }
+
+    # Files the manifest points at must exist; stale srcset candidates are tolerated by the generator
+    on_disk = set(os.listdir(img_dir)) if img_dir.exists() else set()
+    referenced = {path for image in assets["images"] for path in image["paths"]}
+    files = {
+        "referenced": len(referenced),
+        "missing": sorted(path for path in referenced if os.path.basename(path) not in on_disk),
+        "staleSrcset": sorted({
+            url for image in assets["images"] for url in image["srcset"]
+            if os.path.basename(url) not in on_disk
+        }),
+    }
+
+    with metrics.stage("images"):
+        images = check_images(img_dir, cache, workers, metrics)
+
+    if coverage["missing"]:
+        errors.append(f"{len(coverage['missing'])} sitemap URLs not scraped")
+    if files["missing"]:
+        errors.append(f"{len(files['missing'])} manifest files missing from disk")
+    if images["corrupt"]:
+        errors.append(f"{len(images['corrupt'])} images cannot be decoded")
+
+    return {
+        "ok": not errors,
+        "errors": errors,
+        "artifacts": artifacts,
+        "coverage": coverage,
+        "manifest": manifest,
+        "files": files,
+        "images": {
+            "checked": len(images["files"]),
+            "decoded": images["decoded"],
+            "reused": images["reused"],
+            "corrupt": images["corrupt"],
+        },
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def _print_findings(label: str, items, marker: str):
+    if not items:
+        return
+    print(f"  {marker} {label}: {len(items)}")
+    for item in list(items)[:SHOW_FIRST]:
+        print(f"    - {item}")
+    if len(items) > SHOW_FIRST:
+        print(f"    ... and {len(items) - SHOW_FIRST} more")
+
+
+def print_report(report: Dict):
+    """Human-readable version of the report."""
     print("=" * 60)
     print("Scraping Verification Report")
     print("=" * 60)
-    print()
-    
-    # Load URLs
-    print("Loading URLs from sitemap.xml...")
-    sitemap_urls = load_sitemap_urls()
-    print(f"  Found {len(sitemap_urls)} URLs in sitemap.xml")
-    
-    print("Loading scraped URLs from content.json...")
-    scraped_urls = load_scraped_urls()
-    print(f"  Found {len(scraped_urls)} scraped pages")
-    
-    # Normalize URLs for comparison (handle trailing slash differences)
-    def normalize_for_comparison(url):
-        """Normalize URL for comparison - treat root with/without slash as same."""
-        if url in ("https://www.motorover.in", "https://www.motorover.in/"):
-            return "https://www.motorover.in/"
-        return url.rstrip("/")
-    
-    normalized_sitemap = {normalize_for_comparison(url) for url in sitemap_urls}
-    normalized_scraped = {normalize_for_comparison(url) for url in scraped_urls}
-    
-    # Compare URLs
+    for name, state in report["artifacts"].items():
+        print(f"  {name}: {state}")
+
+    coverage = report["coverage"]
     print()
     print("URL Verification:")
     print("-" * 60)
-    # Filter out robots.txt and non-HTML URLs
-    html_sitemap_urls = {u for u in normalized_sitemap if not u.endswith("/robots.txt") and not u.endswith(".txt")}
-    missing_urls = html_sitemap_urls - normalized_scraped
-    extra_urls = normalized_scraped - html_sitemap_urls
-    
-    if missing_urls:
-        print(f"  ❌ Missing URLs: {len(missing_urls)}")
-        print("  First 10 missing URLs:")
-        for url in list(missing_urls)[:10]:
-            print(f"    - {url}")
-    else:
-        print(f"  ✅ All {len(sitemap_urls)} URLs from sitemap have been scraped")
-    
-    if extra_urls:
-        print(f"  ⚠️  Extra URLs (not in sitemap): {len(extra_urls)}")
-        print("  First 5 extra URLs:")
-        for url in list(extra_urls)[:5]:
-            print(f"    - {url}")
-    
-    # Check images
+    print(f"  URLs in sitemap (HTML only): {coverage['sitemap']}")
+    print(f"  URLs scraped: {coverage['scraped']}")
+    _print_findings("Missing URLs", coverage["missing"], "❌")
+    _print_findings("Extra URLs (not in sitemap)", coverage["extra"], "⚠️ ")
+    if not coverage["missing"] and coverage["sitemap"]:
+        print(f"  ✅ All {coverage['sitemap']} URLs from sitemap have been scraped")
+
+    manifest = report["manifest"]
+    files = report["files"]
+    images = report["images"]
     print()
     print("Image Verification:")
     print("-" * 60)
-    
-    image_assets = load_image_assets()
-    print(f"  Found {len(image_assets)} image references in assets.json")
-    
-    images_from_pages = get_images_from_pages()
-    print(f"  Found {len(images_from_pages)} unique image URLs in scraped pages")
-    
-    downloaded_images = check_downloaded_images()
-    print(f"  Found {len(downloaded_images)} downloaded image files")
-    
-    # Check if all images from pages are in assets
-    missing_in_assets = images_from_pages - {img.get("url") for img in image_assets}
-    if missing_in_assets:
-        print(f"  ⚠️  {len(missing_in_assets)} image URLs from pages not in assets.json")
-        print("  First 5:")
-        for url in list(missing_in_assets)[:5]:
-            print(f"    - {url}")
-    else:
-        print("  ✅ All image URLs from pages are in assets.json")
-    
-    # Summary
+    print(f"  Image references in assets.json: {manifest['images']}")
+    _print_findings("Image URLs from pages not in assets.json", manifest["notInManifest"], "⚠️ ")
+    _print_findings("Manifest entries for pages that were not scraped", manifest["orphanedEntries"], "⚠️ ")
+    _print_findings("Manifest files missing from assets/img", files["missing"], "❌")
+    _print_findings("srcset candidates missing from assets/img", files["staleSrcset"], "⚠️ ")
+    print(f"  Decoded {images['decoded']} images ({images['reused']} unchanged since last run)")
+    _print_findings("Images that cannot be decoded",
+                    [f"{name}: {error}" for name, error in images["corrupt"].items()], "❌")
+
     print()
     print("=" * 60)
-    print("Summary")
-    print("=" * 60)
-    print(f"  URLs in sitemap (HTML only): {len(html_sitemap_urls)}")
-    print(f"  URLs scraped: {len(scraped_urls)}")
-    print(f"  URLs missing: {len(missing_urls)}")
-    print(f"  Image references: {len(image_assets)}")
-    print(f"  Images downloaded: {len(downloaded_images)}")
-    
-    # Check if all HTML URLs are scraped
-    if not missing_urls:
-        if len(image_assets) > 0:
-            print()
-            print("  ✅ All HTML URLs scraped and images found!")
-        else:
-            print()
-            print("  ✅ All HTML URLs scraped!")
-            print("  ⚠️  Images may still be downloading - check assets.json")
-    elif missing_urls:
-        print()
-        print(f"  ❌ {len(missing_urls)} URLs still need to be scraped")
+    if report["ok"]:
+        print(f"  ✅ All checks passed in {report['elapsed']}s")
     else:
-        print()
-        print("  ⚠️  No images found - may need to run download_images.py")
+        for error in report["errors"]:
+            print(f"  ❌ {error}")
+
+
+def main():
+    """Main verification function."""
+    parser = argparse.ArgumentParser(description="Verify scraped content, the asset manifest and downloaded images")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent), help="Site root directory")
+    parser.add_argument("--json", dest="json_path", help="Write the machine-readable report here (for CI)")
+    parser.add_argument("--workers", type=int, help="Image decoding processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-verify everything, ignoring earlier runs")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    root_dir = Path(args.root)
+    metrics = instrumentation.from_args("verify_scraping", args)
+    cache = VerificationCache(root_dir / ".cache" / CACHE_NAME, enabled=not args.no_cache)
+    report = verify(root_dir, cache, args.workers, metrics)
+    cache.save()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nWrote report to {args.json_path}")
+    instrumentation.finish(metrics, args)
+
+    if not report["ok"]:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":